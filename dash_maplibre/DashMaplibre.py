@@ -23,6 +23,8 @@ class DashMaplibre(Component):
 DashMaplibre is a React component for displaying interactive maps using MapLibre GL JS.
 It supports custom basemaps, layers, sources, and interactive features like hover popups and click events.
 It is designed to be used within a Dash application, allowing for dynamic updates and interactivity.
+The implementation is loaded as an async chunk when the first map renders,
+so pages without a map do not load MapLibre.
 
 Dependencies:
 - maplibre-gl: For rendering maps and handling layers/sources.
@@ -34,16 +36,55 @@ Keyword arguments:
 - id (string; optional):
     The unique ID of this component.
 
+- animation (dict; optional):
+    A time series played by the component itself, as built by
+    `dash_maplibre.frame_animation`:  `{source, source_layer,
+    state_key, ids, values, frames, loop}`, where  `values` holds
+    `frames` x `ids.length` numbers, frame by frame (a  packed array
+    or a plain list). The current frame is written into the
+    `state_key` feature state of the features, so paint expressions
+    can  use `[\"feature-state\", state_key]`; NaN clears it.
+
+    `animation` is a dict with keys:
+
+    - source (string; required)
+
+    - source_layer (string; optional)
+
+    - state_key (string; optional)
+
+    - ids (list | dict; required)
+
+    - values (list | dict; required)
+
+    - frames (number; required)
+
+    - loop (boolean; optional)
+
 - basemap (string | dict; default {  version: 8,  name: "Empty",  sources: {},  layers: []}):
     The basemap style, either as a URL string to a MapLibre style
-    JSON,  or as a style JSON object.
+    JSON,  or as a style JSON object. Server-relative URLs (e.g. from
+    `dash_maplibre.basemap_url`) are resolved against the page origin.
+    Changing it diffs the styles and keeps the app sources and layers.
 
 - bearing (number; default 0):
     The bearing (rotation) of the map in degrees.
 
+- bounds (list; optional):
+    Output: the visible bounds as [[west, south], [east, north]], set
+    once  the camera settles after a move.
+
 - center (list; default [0, 0]):
     The map center as a [longitude, latitude] array.
 
+- clickData (dict; optional):
+    Output: the last map click as  `{layer, features: [{id,
+    properties}], layers, lngLat: [lng, lat]}`,  where `layer` is the
+    topmost `send_click` layer under the pointer (None  if no such
+    layer was hit) and `features` its clicked features.  `layers` maps
+    every `send_click` layer that was hit to its features,  `{layerId:
+    [{id, properties}]}`. Clicked clusters also carry `cluster`.
+
 - colorbar_map (dict; optional):
     Configuration for the colorbar legend for the map.  Can be a
     single colorbar config object, or a dictionary where keys are zoom
@@ -57,28 +98,124 @@ Keyword arguments:
 - colorbar_risk (dict; optional):
     Configuration for the colorbar legend for risk visualization.
 
+- current_center (list; optional):
+    Output: the center as [lng, lat], set once the camera settles
+    after a move.
+
+- current_frame (number; default 0):
+    Frame of `animation` to show. While `playing`, frames advance in
+    the  browser without updating this prop; it is set to the frame
+    reached  when playback stops.
+
+- current_zoom (number; optional):
+    Output: the zoom level, set once the camera settles after a move.
+
+- debug (boolean; default False):
+    Log component activity to the browser console and report timings
+    through `perf_stats`. Off by default, which keeps the console
+    silent.
+
 - feature_state (dict; optional):
     Feature state to apply to map sources.  Structure:  {
     [sourceId]: {      [sourceLayerId]: {        [stateKey]: {
-    [featureId]: any        }      }    }  }.
+    [featureId]: any        }      }    }  }  Instead of
+    `{[featureId]: any}`, a state key can hold the bulk form
+    `{\"ids\": [...], \"values\": [...] or any}` (see
+    `dash_maplibre.feature_state`).  A None value clears the key for
+    that feature. Only differences to the  previously applied state
+    are pushed to the map.
+
+- fps (number; default 30):
+    Playback speed of `animation` in frames per second.
 
 - layers (list; optional):
     The array of MapLibre layer definitions to display on the map.
+    Besides the MapLibre layer keys, a layer may set `display_name`
+    (show it in  the legend), `hover_html` (popup template like
+    `\"{name}: {risk:.2f}\"`;  formats are d3-format specifiers with
+    optional math as in the colorbar,  e.g.
+    `\"{ratio:100*_val.1f}%\"`),  `hover_index` (look up hovered
+    points in a client-side KD-tree of the  geojson source instead of
+    querying rendered features; ignores `filter`)  and `send_click`
+    (report clicks through `clickData`). Clicked features  can be
+    trimmed with `click_properties` (list of property names to send;
+    `[]` sends ids only) and `click_max_features`.  On clustered
+    sources, `cluster_hover_html` is the popup template of  clusters
+    (default `\"{point_count_abbreviated} points\"`), clicking a
+    cluster zooms in until it expands unless `expand_clusters` is
+    False,  and `clickData` features carry `cluster: {id,
+    point_count}` plus the  properties of up to `cluster_leaves` of
+    its points as `leaves`.  Layers with `send_selection` report the
+    features of their geojson  source caught by a box or lasso
+    selection (see `selection_mode`).
 
 - max_bounds (list; optional):
     The maximum bounds of the map as [[west, south], [east, north]].
 
+- perf_stats (dict; optional):
+    Output, only with `debug`: timings collected since the previous
+    report,  sent at most once per second, as  `{timestamp,
+    interval_ms, timings: {name: {count, total_ms, mean_ms,  max_ms,
+    last_ms}}, frames: {count, fps, mean_frame_ms}}`. Timed names  are
+    `style` (until the map is idle), `sources`, `source_data`,
+    `layers`, `feature_state`, `hover` and `animation`. Every timing
+    is  also recorded as a `dash-maplibre:<name>` performance measure.
+
 - pitch (number; default 0):
     The pitch (tilt) of the map in degrees.
 
+- playing (boolean; default False):
+    Whether `animation` is playing. Set back to False when an
+    animation  without `loop` reaches its last frame.
+
+- selectedData (dict; optional):
+    Output: the last box or lasso selection as  `{mode, geometry, ids:
+    {layerId: [...]}}`, where `geometry` is the  selection as a
+    GeoJSON Polygon and `ids` holds, for every  `send_selection` layer
+    whose source data is in the browser, the ids  of its features
+    intersecting the selection. Features of other  sources can be
+    looked up on the server with  `dash_maplibre.select_features`.
+
+- selection_mode (a value equal to: "box", "lasso"; optional):
+    Dragging on the map draws a `\"box\"` or `\"lasso\"` selection
+    instead of  panning; None (the default) turns selection off. A
+    finished selection  is reported through `selectedData`.
+
 - sources (dict; optional):
     The sources definition for MapLibre, as an object mapping source
-    IDs to source definitions.
+    IDs to source definitions.  Besides the MapLibre source types,
+    `\"geojson-columnar\"` sources with packed  binary coordinates and
+    columnar properties are accepted (see
+    `dash_maplibre.columnar_source`) and `\"geojson-serialized\"`
+    sources carrying  FeatureCollection text in `json` (see
+    `dash_maplibre.serialized_source`);  both are decoded into geojson
+    sources.  Geojson sources can carry `zoom_data`, an object mapping
+    zoom breakpoints  to data (see `dash_maplibre.zoom_variants`); the
+    data of the highest  breakpoint at or below the map zoom is shown
+    and swapped as the zoom  crosses breakpoints.
+    `\"geojson-shared\"` sources only carry a `url` (see
+    `dash_maplibre.register_shared_source`); its data is fetched and
+    parsed  once per page and shared by every map using it.
+    `\"geojson-stream\"` sources carry the `url` of newline-delimited
+    GeoJSON  features (see `dash_maplibre.register_stream`); the
+    features are added  to the map in batches of `batch_size` as they
+    arrive.  Point sources can set `cluster: True` (with
+    `clusterRadius`,  `clusterMaxZoom`, `clusterProperties`) to
+    cluster points on the client.
+
+- sync_group (string; optional):
+    Name of a camera group: maps on the page with the same
+    `sync_group`  follow each other's moves directly in the browser,
+    without Dash  callbacks.
 
 - version (string; default ""):
     Optional version string to display in the lower right corner of
     the legend.
 
+- viewport_debounce (number; default 200):
+    Milliseconds the camera has to rest after a move before `bounds`,
+    `current_zoom` and `current_center` are reported.
+
 - zoom (number; default 2):
     The zoom level of the map."""
     _children_props = []
@@ -92,6 +229,19 @@ Keyword arguments:
         }
     )
 
+    Animation = TypedDict(
+        "Animation",
+            {
+            "source": str,
+            "source_layer": NotRequired[str],
+            "state_key": NotRequired[str],
+            "ids": typing.Union[typing.Sequence, dict],
+            "values": typing.Union[typing.Sequence, dict],
+            "frames": NumberType,
+            "loop": NotRequired[bool]
+        }
+    )
+
 
     def __init__(
         self,
@@ -109,11 +259,25 @@ Keyword arguments:
         colorbar_risk: typing.Optional[dict] = None,
         version: typing.Optional[str] = None,
         feature_state: typing.Optional[dict] = None,
+        viewport_debounce: typing.Optional[NumberType] = None,
+        sync_group: typing.Optional[str] = None,
+        animation: typing.Optional["Animation"] = None,
+        current_frame: typing.Optional[NumberType] = None,
+        playing: typing.Optional[bool] = None,
+        fps: typing.Optional[NumberType] = None,
+        selection_mode: typing.Optional[Literal["box", "lasso"]] = None,
+        bounds: typing.Optional[typing.Sequence] = None,
+        current_zoom: typing.Optional[NumberType] = None,
+        current_center: typing.Optional[typing.Sequence] = None,
+        debug: typing.Optional[bool] = None,
+        perf_stats: typing.Optional[dict] = None,
+        clickData: typing.Optional[dict] = None,
+        selectedData: typing.Optional[dict] = None,
         **kwargs
     ):
-        self._prop_names = ['id', 'basemap', 'bearing', 'center', 'colorbar_map', 'colorbar_risk', 'feature_state', 'layers', 'max_bounds', 'pitch', 'sources', 'style', 'version', 'zoom']
+        self._prop_names = ['id', 'animation', 'basemap', 'bearing', 'bounds', 'center', 'clickData', 'colorbar_map', 'colorbar_risk', 'current_center', 'current_frame', 'current_zoom', 'debug', 'feature_state', 'fps', 'layers', 'max_bounds', 'perf_stats', 'pitch', 'playing', 'selectedData', 'selection_mode', 'sources', 'style', 'sync_group', 'version', 'viewport_debounce', 'zoom']
         self._valid_wildcard_attributes =            []
-        self.available_properties = ['id', 'basemap', 'bearing', 'center', 'colorbar_map', 'colorbar_risk', 'feature_state', 'layers', 'max_bounds', 'pitch', 'sources', 'style', 'version', 'zoom']
+        self.available_properties = ['id', 'animation', 'basemap', 'bearing', 'bounds', 'center', 'clickData', 'colorbar_map', 'colorbar_risk', 'current_center', 'current_frame', 'current_zoom', 'debug', 'feature_state', 'fps', 'layers', 'max_bounds', 'perf_stats', 'pitch', 'playing', 'selectedData', 'selection_mode', 'sources', 'style', 'sync_group', 'version', 'viewport_debounce', 'zoom']
         self.available_wildcard_properties =            []
         _explicit_args = kwargs.pop('_explicit_args')
         _locals = locals()
@@ -28,6 +28,9 @@ _current_path = _os.path.dirname(_os.path.abspath(__file__))
 
 _this_module = _sys.modules[__name__]
 
+# The map implementation is split into an async-DashMaplibre.js chunk, but
+# the committed bundle predates the split. List "DashMaplibre" here again
+# once the rebuilt bundle and its async chunk are committed.
 async_resources = []
 
 _js_dist = []
@@ -85,3 +88,18 @@ _css_dist = []
 for _component in __all__:
     setattr(locals()[_component], '_js_dist', _js_dist)
     setattr(locals()[_component], '_css_dist', _css_dist)
+
+from .vector_tiles import register_vector_tiles, vector_tile_source  # noqa: E402,F401
+from .patches import MapState, diff_features, patch_features  # noqa: E402,F401
+from .columnar import columnar_source, columnar_source_from_geodataframe  # noqa: E402,F401
+from .feature_state import bulk_feature_state, bulk_state  # noqa: E402,F401
+from .basemaps import register_basemap, basemap_url, get_basemap  # noqa: E402,F401
+from .aggregation import PointAggregator, bin_points  # noqa: E402,F401
+from .viewport import register_dataset, visible_features, select_features  # noqa: E402,F401
+from .encoding import encode_points, encode_geodataframe, serialized_source  # noqa: E402,F401
+from .simplify import simplify_features, zoom_variants  # noqa: E402,F401
+from .shared import register_shared_source, shared_source  # noqa: E402,F401
+from .streaming import register_stream, stream_source, points_stream  # noqa: E402,F401
+from .tile_archives import register_tile_archive, tile_archive_source  # noqa: E402,F401
+from .density_tiles import register_density_tiles, density_tile_source  # noqa: E402,F401
+from .animation import frame_animation  # noqa: E402,F401
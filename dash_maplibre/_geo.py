@@ -0,0 +1,259 @@
+"""Geometry helpers shared by the server-side data helpers.
+
+Everything in here works on plain GeoJSON-like dicts and tuples so the
+helpers stay usable without optional dependencies.  Coordinates are
+projected to "world" Web Mercator coordinates, where the whole map spans
+``[0, 1]`` in x (west to east) and y (north to south), which makes tile
+math a matter of multiplying by ``2 ** z``.
+"""
+import math
+
+MAX_LATITUDE = 85.0511287798066
+
+
+def lnglat_to_world(lng, lat):
+    """Project a longitude/latitude pair to world coordinates in [0, 1]."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin_lat = math.sin(math.radians(lat))
+    x = lng / 360.0 + 0.5
+    y = 0.5 - 0.25 * math.log((1 + sin_lat) / (1 - sin_lat)) / math.pi
+    return x, y
+
+
+def world_to_lnglat(x, y):
+    """Inverse of :func:`lnglat_to_world`."""
+    lng = (x - 0.5) * 360.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lng, lat
+
+
+def tile_bounds(z, x, y):
+    """Return ``(west, south, east, north)`` of a tile in degrees."""
+    n = 2 ** z
+    west, north = world_to_lnglat(x / n, y / n)
+    east, south = world_to_lnglat((x + 1) / n, (y + 1) / n)
+    return west, south, east, north
+
+
+def iter_coords(geometry):
+    """Yield every ``(lng, lat)`` position of a GeoJSON geometry."""
+    geom_type = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if geom_type == "Point":
+        yield coords
+    elif geom_type in ("MultiPoint", "LineString"):
+        yield from coords
+    elif geom_type in ("MultiLineString", "Polygon"):
+        for part in coords:
+            yield from part
+    elif geom_type == "MultiPolygon":
+        for polygon in coords:
+            for ring in polygon:
+                yield from ring
+    elif geom_type == "GeometryCollection":
+        for child in geometry.get("geometries", []):
+            yield from iter_coords(child)
+
+
+def geometry_bbox(geometry):
+    """Return ``(min_x, min_y, max_x, max_y)`` of a geometry, or None if empty."""
+    xs = []
+    ys = []
+    for position in iter_coords(geometry):
+        xs.append(position[0])
+        ys.append(position[1])
+    if not xs:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def point_in_polygon(x, y, rings):
+    """Even-odd test of a point against a polygon given as a list of rings."""
+    inside = False
+    for ring in rings:
+        j = len(ring) - 1
+        for i in range(len(ring)):
+            xi, yi = ring[i][0], ring[i][1]
+            xj, yj = ring[j][0], ring[j][1]
+            if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                inside = not inside
+            j = i
+    return inside
+
+
+def _orientation(a, b, c):
+    value = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (value > 0) - (value < 0)
+
+
+def _paths_cross(path, other):
+    for a, b in zip(path, path[1:]):
+        for c, d in zip(other, other[1:]):
+            if _orientation(a, b, c) != _orientation(a, b, d) and _orientation(c, d, a) != _orientation(c, d, b):
+                return True
+    return False
+
+
+def _geometry_parts(geometry, paths, polygons):
+    geom_type = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if geom_type == "Point":
+        paths.append([coords])
+    elif geom_type in ("MultiPoint", "LineString"):
+        paths.append(coords)
+    elif geom_type == "MultiLineString":
+        paths.extend(coords)
+    elif geom_type == "Polygon":
+        polygons.append(coords)
+    elif geom_type == "MultiPolygon":
+        polygons.extend(coords)
+    elif geom_type == "GeometryCollection":
+        for child in geometry.get("geometries", []):
+            _geometry_parts(child, paths, polygons)
+
+
+def intersects_polygon(geometry, rings):
+    """Whether a GeoJSON geometry intersects the polygon ``rings`` (planar lng/lat)."""
+    paths = []
+    polygons = []
+    _geometry_parts(geometry, paths, polygons)
+    paths.extend(ring for polygon in polygons for ring in polygon)
+    if any(point_in_polygon(p[0], p[1], rings) for path in paths for p in path):
+        return True
+    # The polygon lies inside a polygon feature
+    first = rings[0][0]
+    if any(point_in_polygon(first[0], first[1], polygon) for polygon in polygons):
+        return True
+    return any(_paths_cross(path, ring) for path in paths if len(path) > 1 for ring in rings)
+
+
+def to_feature_list(data):
+    """Normalise supported inputs to a list of GeoJSON feature dicts.
+
+    Accepts a FeatureCollection dict, a single Feature, a list of features,
+    or any object implementing ``__geo_interface__`` (e.g. a GeoPandas
+    GeoDataFrame, which is reprojected to EPSG:4326 if needed).
+    """
+    crs = getattr(data, "crs", None)
+    if crs is not None and hasattr(data, "to_crs"):
+        epsg = crs.to_epsg() if hasattr(crs, "to_epsg") else None
+        if epsg != 4326:
+            data = data.to_crs(epsg=4326)
+    if hasattr(data, "__geo_interface__"):
+        data = data.__geo_interface__
+    if isinstance(data, dict):
+        if data.get("type") == "FeatureCollection":
+            return list(data.get("features") or [])
+        if data.get("type") == "Feature":
+            return [data]
+        raise ValueError("Expected a GeoJSON Feature or FeatureCollection, got type {!r}".format(data.get("type")))
+    if isinstance(data, (list, tuple)):
+        return list(data)
+    raise TypeError("Unsupported data type {!r}; pass GeoJSON or an object with __geo_interface__".format(type(data)))
+
+
+def simplify_dp(points, tolerance):
+    """Douglas-Peucker simplification of a list of ``(x, y)`` tuples.
+
+    The first and last points are always kept, so closed rings stay closed.
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+    sq_tolerance = tolerance * tolerance
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx = bx - ax
+        dy = by - ay
+        seg_sq = dx * dx + dy * dy
+        max_sq = 0.0
+        index = None
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if seg_sq == 0:
+                ex, ey = px - ax, py - ay
+            else:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / seg_sq))
+                ex, ey = px - (ax + t * dx), py - (ay + t * dy)
+            dist_sq = ex * ex + ey * ey
+            if dist_sq > max_sq:
+                max_sq = dist_sq
+                index = i
+        if index is not None and max_sq > sq_tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+class GridIndex:
+    """A uniform grid over bounding boxes for fast rectangle queries.
+
+    Pure Python and built in a single pass, which is plenty for the
+    "which features touch this tile / viewport" queries the helpers need.
+    Boxes are ``(min_x, min_y, max_x, max_y)``; ``None`` entries are skipped.
+    """
+
+    def __init__(self, bboxes, cells_per_axis=None):
+        self.bboxes = list(bboxes)
+        valid = [b for b in self.bboxes if b is not None]
+        if not valid:
+            self.extent = (0.0, 0.0, 0.0, 0.0)
+            self.cells = {}
+            self.nx = self.ny = 1
+            self.cell_w = self.cell_h = 1.0
+            return
+        min_x = min(b[0] for b in valid)
+        min_y = min(b[1] for b in valid)
+        max_x = max(b[2] for b in valid)
+        max_y = max(b[3] for b in valid)
+        self.extent = (min_x, min_y, max_x, max_y)
+        if cells_per_axis is None:
+            cells_per_axis = max(1, min(1024, int(math.sqrt(len(valid)))))
+        self.nx = self.ny = cells_per_axis
+        self.cell_w = (max_x - min_x) / self.nx or 1.0
+        self.cell_h = (max_y - min_y) / self.ny or 1.0
+        self.cells = {}
+        for i, bbox in enumerate(self.bboxes):
+            if bbox is None:
+                continue
+            x0, y0, x1, y1 = self._cell_range(bbox)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    self.cells.setdefault((cx, cy), []).append(i)
+
+    def _cell_range(self, bbox):
+        min_x, min_y = self.extent[0], self.extent[1]
+
+        def clamp(value, upper):
+            return max(0, min(upper - 1, int(value)))
+
+        return (
+            clamp((bbox[0] - min_x) / self.cell_w, self.nx),
+            clamp((bbox[1] - min_y) / self.cell_h, self.ny),
+            clamp((bbox[2] - min_x) / self.cell_w, self.nx),
+            clamp((bbox[3] - min_y) / self.cell_h, self.ny),
+        )
+
+    def query(self, bbox):
+        """Return the sorted indices of boxes intersecting ``bbox``."""
+        if not self.cells:
+            return []
+        ext = self.extent
+        if bbox[0] > ext[2] or bbox[2] < ext[0] or bbox[1] > ext[3] or bbox[3] < ext[1]:
+            return []
+        x0, y0, x1, y1 = self._cell_range(bbox)
+        found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for i in self.cells.get((cx, cy), ()):
+                    if i in found:
+                        continue
+                    b = self.bboxes[i]
+                    if b[0] <= bbox[2] and b[2] >= bbox[0] and b[1] <= bbox[3] and b[3] >= bbox[1]:
+                        found.add(i)
+        return sorted(found)
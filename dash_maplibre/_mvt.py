@@ -0,0 +1,164 @@
+"""Minimal Mapbox Vector Tile (v2.1) encoder.
+
+Only the write path of the spec is implemented, which keeps the tile
+server free of a protobuf dependency.  Geometries passed in are already
+in integer tile coordinates.
+"""
+import json
+import struct
+
+POINT = 1
+LINESTRING = 2
+POLYGON = 3
+
+_CMD_MOVE_TO = 1
+_CMD_LINE_TO = 2
+_CMD_CLOSE_PATH = 7
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field, payload):
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _uint_field(field, value):
+    return _key(field, 0) + _varint(value)
+
+
+def _packed_field(field, values):
+    return _bytes_field(field, b"".join(_varint(v) for v in values))
+
+
+def _encode_value(value):
+    if isinstance(value, bool):
+        return _uint_field(7, int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _uint_field(5, value)
+        return _uint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack("<d", value)
+    if not isinstance(value, str):
+        value = json.dumps(value)
+    return _bytes_field(1, value.encode("utf-8"))
+
+
+def _command(cmd, count):
+    return (cmd & 0x7) | (count << 3)
+
+
+def ring_area(ring):
+    """Signed area (surveyor's formula) of a ring in tile coordinates."""
+    area = 0
+    for i in range(len(ring)):
+        x1, y1 = ring[i - 1]
+        x2, y2 = ring[i]
+        area += x1 * y2 - x2 * y1
+    return area / 2.0
+
+
+def encode_geometry(geom_type, parts):
+    """Encode geometry commands for one feature.
+
+    ``parts`` is a list of points for POINT, a list of lines for LINESTRING
+    and a list of rings (exterior rings followed by their holes, already in
+    the winding order required by the spec) for POLYGON.
+    """
+    commands = []
+    cursor_x = cursor_y = 0
+
+    def push(x, y):
+        nonlocal cursor_x, cursor_y
+        commands.append(_zigzag(x - cursor_x))
+        commands.append(_zigzag(y - cursor_y))
+        cursor_x, cursor_y = x, y
+
+    if geom_type == POINT:
+        commands.append(_command(_CMD_MOVE_TO, len(parts)))
+        for x, y in parts:
+            push(x, y)
+        return commands
+
+    for part in parts:
+        if geom_type == POLYGON and part[0] == part[-1]:
+            part = part[:-1]
+        commands.append(_command(_CMD_MOVE_TO, 1))
+        push(*part[0])
+        commands.append(_command(_CMD_LINE_TO, len(part) - 1))
+        for x, y in part[1:]:
+            push(x, y)
+        if geom_type == POLYGON:
+            commands.append(_command(_CMD_CLOSE_PATH, 1))
+    return commands
+
+
+class LayerEncoder:
+    """Accumulates features of one tile layer and serialises them."""
+
+    def __init__(self, name, extent=4096):
+        self.name = name
+        self.extent = extent
+        self._features = []
+        self._keys = {}
+        self._values = {}
+
+    def _index(self, table, item):
+        index = table.get(item)
+        if index is None:
+            index = table[item] = len(table)
+        return index
+
+    def add_feature(self, geom_type, parts, properties=None, feature_id=None):
+        tags = []
+        for key, value in (properties or {}).items():
+            if value is None:
+                continue
+            tags.append(self._index(self._keys, key))
+            # Keep 1 and 1.0 / True apart, they encode to different value types.
+            tags.append(self._index(self._values, (type(value).__name__, _encode_value(value))))
+        payload = b""
+        if feature_id is not None:
+            payload += _uint_field(1, feature_id)
+        if tags:
+            payload += _packed_field(2, tags)
+        payload += _uint_field(3, geom_type)
+        payload += _packed_field(4, encode_geometry(geom_type, parts))
+        self._features.append(payload)
+
+    def __len__(self):
+        return len(self._features)
+
+    def encode(self):
+        out = _uint_field(15, 2) + _bytes_field(1, self.name.encode("utf-8"))
+        for feature in self._features:
+            out += _bytes_field(2, feature)
+        for key in self._keys:
+            out += _bytes_field(3, key.encode("utf-8"))
+        for _, value in self._values:
+            out += _bytes_field(4, value)
+        out += _uint_field(5, self.extent)
+        return out
+
+
+def encode_tile(layers):
+    """Serialise a list of :class:`LayerEncoder` into tile bytes."""
+    return b"".join(_bytes_field(3, layer.encode()) for layer in layers if len(layer))
@@ -0,0 +1,14 @@
+"""Lazy imports of optional dependencies used by some helpers."""
+import importlib
+
+
+def import_optional(module, feature):
+    """Import ``module`` or raise an ImportError naming the feature needing it."""
+    try:
+        return importlib.import_module(module)
+    except ImportError as err:
+        package = module.split(".")[0]
+        raise ImportError(
+            "{} requires the optional dependency '{}'. "
+            "Install it with `pip install {}`.".format(feature, package, package)
+        ) from err
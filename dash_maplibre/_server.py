@@ -0,0 +1,75 @@
+"""Plumbing for helpers that serve data from the Dash app's Flask server."""
+import threading
+from collections import OrderedDict
+
+ROUTE_PREFIX = "_dash-maplibre"
+
+
+class LRUCache:
+    """A small thread-safe least-recently-used cache.
+
+    Flask serves requests from several threads, so every access goes
+    through a lock.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+def get_registry(app, kind):
+    """Return the per-server registry dict for a kind of served resource."""
+    server = app.server
+    registries = server.extensions.setdefault("dash_maplibre", {})
+    return registries.setdefault(kind, {})
+
+
+def add_route(app, rule, endpoint, view_func):
+    """Register ``view_func`` under the app's routes prefix, once per server."""
+    server = app.server
+    if endpoint in server.view_functions:
+        return
+    prefix = app.config.routes_pathname_prefix
+    server.add_url_rule(
+        "{}{}/{}".format(prefix, ROUTE_PREFIX, rule.lstrip("/")),
+        endpoint=endpoint,
+        view_func=view_func,
+    )
+
+
+def relative_url(app, path):
+    """Return the URL browsers should use for a route registered by :func:`add_route`."""
+    return app.get_relative_path("/{}/{}".format(ROUTE_PREFIX, path.lstrip("/")))
@@ -0,0 +1,224 @@
+"""Server-side pre-aggregation of point data into hexagon or grid bins.
+
+At low zoom a few hundred bins carry the same picture as millions of
+points.  :class:`PointAggregator` bins the points once per zoom level with
+NumPy and returns a columnar source holding either the bins (below
+``raw_min_zoom``) or the raw points::
+
+    aggregator = PointAggregator(df["lon"], df["lat"], weights=df["insured_value"],
+                                 properties=df[["name"]], raw_min_zoom=11)
+
+    @app.callback(Output("map", "sources"), Input("map", "current_zoom"))
+    def update(zoom):
+        return {"events": aggregator.source(zoom or 0)}
+
+Bins are sized in screen pixels (``cell_size``), so they look the same at
+every zoom.  Bin sources have ``count``, ``total`` and ``mean`` properties;
+with ``polygons=True`` they are hexagon/square polygons instead of centre
+points.
+"""
+import math
+from collections import namedtuple
+
+from ._geo import MAX_LATITUDE
+from ._optional import import_optional
+from .columnar import _build_source, columnar_source
+
+# MapLibre renders 512 pixel tiles, so the world is 512 * 2 ** zoom pixels wide.
+TILE_SIZE = 512
+KINDS = ("hex", "grid")
+
+Bins = namedtuple("Bins", ["lng", "lat", "count", "total", "members"])
+Bins.__doc__ = """Points binned at one zoom level.
+
+``lng``/``lat`` are the bin centres, ``count`` the number of points and
+``total`` the sum of the weights (the count without weights) per bin.
+``members`` maps each input point to its bin.
+"""
+
+
+def _np():
+    return import_optional("numpy", "Point aggregation")
+
+
+def _to_pixels(lng, lat, zoom):
+    np = _np()
+    scale = TILE_SIZE * 2.0 ** zoom
+    sin_lat = np.sin(np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE)))
+    x = (np.asarray(lng, dtype="float64") / 360.0 + 0.5) * scale
+    y = (0.5 - 0.25 * np.log((1 + sin_lat) / (1 - sin_lat)) / math.pi) * scale
+    return x, y
+
+
+def _to_lnglat(x, y, zoom):
+    np = _np()
+    scale = TILE_SIZE * 2.0 ** zoom
+    lng = (x / scale - 0.5) * 360.0
+    lat = np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * y / scale))))
+    return lng, lat
+
+
+def _hex_centers(i, j, radius):
+    dx = radius * 2 * math.sin(math.pi / 3)
+    return (i + (j & 1) / 2) * dx, j * radius * 1.5
+
+
+def _hex_cells(x, y, radius):
+    """Pointy-top hexagon cell of each pixel position.
+
+    The closest hexagon centre lies in one of the two rows around the point;
+    within a row it is the closest column.
+    """
+    np = _np()
+    dx = radius * 2 * math.sin(math.pi / 3)
+    below = np.floor(y / (radius * 1.5)).astype("int64")
+    best_i = best_j = best_d = None
+    for j in (below, below + 1):
+        i = np.round(x / dx - (j & 1) / 2).astype("int64")
+        cx, cy = _hex_centers(i, j, radius)
+        d = (x - cx) ** 2 + (y - cy) ** 2
+        if best_d is None:
+            best_i, best_j, best_d = i, j, d
+        else:
+            closer = d < best_d
+            best_i = np.where(closer, i, best_i)
+            best_j = np.where(closer, j, best_j)
+    return best_i, best_j
+
+
+def bin_points(lng, lat, zoom, kind="hex", cell_size=60, weights=None):
+    """Bin points into hexagons or squares of ``cell_size`` pixels at ``zoom``.
+
+    :param lng: Longitudes, any array-like.
+    :param lat: Latitudes, same length as ``lng``.
+    :param zoom: Zoom level the bins are sized for.
+    :param kind: ``"hex"`` (hexagons of radius ``cell_size / 2``) or
+        ``"grid"`` (squares of side ``cell_size``).
+    :param cell_size: Bin size in screen pixels.
+    :param weights: Optional value per point summed into ``total``.
+    :return: A :class:`Bins` tuple of arrays.
+    """
+    np = _np()
+    if kind not in KINDS:
+        raise ValueError("kind must be one of {}, not {!r}".format(KINDS, kind))
+    lng = np.asarray(lng, dtype="float64")
+    lat = np.asarray(lat, dtype="float64")
+    if lng.shape != lat.shape:
+        raise ValueError("lng and lat must have the same length")
+    x, y = _to_pixels(lng, lat, zoom)
+
+    if kind == "hex":
+        i, j = _hex_cells(x, y, cell_size / 2)
+    else:
+        i = np.floor(x / cell_size).astype("int64")
+        j = np.floor(y / cell_size).astype("int64")
+
+    cells, members = np.unique(np.column_stack([i, j]), axis=0, return_inverse=True)
+    members = members.ravel()
+    count = np.bincount(members, minlength=len(cells))
+    if weights is None:
+        total = count.astype("float64")
+    else:
+        total = np.bincount(members, weights=np.asarray(weights, dtype="float64"), minlength=len(cells))
+
+    if kind == "hex":
+        cx, cy = _hex_centers(cells[:, 0], cells[:, 1], cell_size / 2)
+    else:
+        cx = (cells[:, 0] + 0.5) * cell_size
+        cy = (cells[:, 1] + 0.5) * cell_size
+    center_lng, center_lat = _to_lnglat(cx, cy, zoom)
+    return Bins(center_lng, center_lat, count, total, members)
+
+
+def _bin_polygons(bins, zoom, kind, cell_size):
+    """Closed outline rings of the bins as interleaved lng/lat coordinates."""
+    np = _np()
+    cx, cy = _to_pixels(bins.lng, bins.lat, zoom)
+    if kind == "hex":
+        radius = cell_size / 2
+        angles = np.arange(7) * math.pi / 3
+        ox, oy = radius * np.sin(angles), -radius * np.cos(angles)
+    else:
+        half = cell_size / 2
+        ox = np.array([-half, half, half, -half, -half])
+        oy = np.array([-half, -half, half, half, -half])
+    ring_lng, ring_lat = _to_lnglat(cx[:, None] + ox, cy[:, None] + oy, zoom)
+    coordinates = np.stack([ring_lng, ring_lat], axis=-1).ravel()
+    n, size = len(cx), len(ox)
+    offsets = [np.arange(n + 1) * size, np.arange(n + 1)]
+    return coordinates, offsets
+
+
+class PointAggregator:
+    """Per-zoom bins of a point dataset, with raw points at high zoom.
+
+    :param lng: Longitudes, any array-like.
+    :param lat: Latitudes, same length as ``lng``.
+    :param weights: Optional value per point, summed per bin.
+    :param properties: Properties of the raw points (a DataFrame or a
+        mapping of column name to array), used from ``raw_min_zoom`` on.
+    :param ids: Optional ids of the raw points.
+    :param kind: ``"hex"`` or ``"grid"``.
+    :param cell_size: Bin size in screen pixels.
+    :param raw_min_zoom: First zoom level that ships the raw points.
+    """
+
+    def __init__(self, lng, lat, weights=None, properties=None, ids=None,
+                 kind="hex", cell_size=60, raw_min_zoom=12):
+        np = _np()
+        if kind not in KINDS:
+            raise ValueError("kind must be one of {}, not {!r}".format(KINDS, kind))
+        self.lng = np.asarray(lng, dtype="float64")
+        self.lat = np.asarray(lat, dtype="float64")
+        self.weights = None if weights is None else np.asarray(weights, dtype="float64")
+        self.properties = properties
+        self.ids = ids
+        self.kind = kind
+        self.cell_size = cell_size
+        self.raw_min_zoom = raw_min_zoom
+        self._bins = {}
+
+    def bins(self, zoom):
+        """Return the :class:`Bins` for the integer zoom level below ``zoom``."""
+        level = max(0, int(math.floor(zoom)))
+        bins = self._bins.get(level)
+        if bins is None:
+            bins = bin_points(self.lng, self.lat, level, kind=self.kind,
+                              cell_size=self.cell_size, weights=self.weights)
+            self._bins[level] = bins
+        return bins
+
+    def is_raw(self, zoom):
+        """Whether :meth:`source` ships the raw points at ``zoom``."""
+        return zoom >= self.raw_min_zoom
+
+    def source(self, zoom, polygons=False, coordinate_dtype="float32",
+               property_dtype="float32", **source_options):
+        """Return a columnar source of the bins or raw points for ``zoom``.
+
+        :param zoom: Current map zoom.
+        :param polygons: Ship bins as hexagon/square polygons instead of
+            centre points.
+        :param coordinate_dtype: Packing type of the coordinates.
+        :param property_dtype: Packing type of float properties.
+        :param source_options: Extra geojson source options.
+        """
+        if self.is_raw(zoom):
+            return columnar_source(self.lng, self.lat, properties=self.properties, ids=self.ids,
+                                   coordinate_dtype=coordinate_dtype,
+                                   property_dtype=property_dtype, **source_options)
+        np = _np()
+        bins = self.bins(zoom)
+        properties = {
+            "count": bins.count,
+            "total": bins.total,
+            "mean": bins.total / np.maximum(bins.count, 1),
+        }
+        if not polygons:
+            return columnar_source(bins.lng, bins.lat, properties=properties,
+                                   coordinate_dtype=coordinate_dtype,
+                                   property_dtype=property_dtype, **source_options)
+        level = max(0, int(math.floor(zoom)))
+        coordinates, offsets = _bin_polygons(bins, level, self.kind, self.cell_size)
+        return _build_source("Polygon", coordinates, offsets, len(bins.count), properties, None,
+                             coordinate_dtype, property_dtype, source_options)
@@ -0,0 +1,61 @@
+"""Pack time series for the ``animation`` prop.
+
+Animating values over time with one callback per frame costs a server
+round-trip and a full ``feature_state`` update every frame.  Instead, send
+the whole features x timesteps matrix once and let the component play it::
+
+    from dash_maplibre import frame_animation
+
+    # risk: DataFrame indexed by region id, one column per timestep
+    DashMaplibre(
+        sources={"regions": regions},
+        layers=[{"id": "regions", "type": "fill", "source": "regions",
+                 "paint": {"fill-color": ["interpolate", ["linear"], ["feature-state", "risk"], 0, "#fff", 1, "#f00"]}}],
+        animation=frame_animation("regions", risk, state_key="risk"),
+        playing=True,
+        fps=30,
+    )
+
+Values are packed frame by frame, so the component reads one contiguous
+slice per frame and pushes only the feature states that changed.  ``NaN``
+clears the state key of a feature for that frame.
+"""
+from .columnar import _np, encode_column, pack_array
+
+
+def frame_animation(source_id, values, ids=None, state_key="value", source_layer="", loop=True,
+                    float_dtype="float32"):
+    """Return an ``animation`` prop value for a features x timesteps matrix.
+
+    :param source_id: Id of the map source holding the features.
+    :param values: 2-d array-like with one row per feature and one column
+        per timestep, e.g. a DataFrame indexed by feature id.
+    :param ids: Feature ids of the rows.  Defaults to the index of a
+        DataFrame ``values``.
+    :param state_key: Feature state key the values are written to; use it
+        in paint expressions as ``["feature-state", state_key]``.
+    :param source_layer: Source layer for vector sources; leave empty for
+        geojson sources.
+    :param loop: Start over after the last frame instead of stopping.
+    :param float_dtype: Packing type of the values.
+    """
+    np = _np()
+    if ids is None:
+        if not hasattr(values, "columns"):
+            raise ValueError("ids are needed unless values is a DataFrame indexed by feature id")
+        ids = values.index.to_numpy()
+    matrix = np.asarray(values, dtype="float64")
+    if matrix.ndim != 2:
+        raise ValueError("values must be a 2-d features x timesteps array")
+    if len(ids) != matrix.shape[0]:
+        raise ValueError("values has {} rows for {} ids".format(matrix.shape[0], len(ids)))
+    return {
+        "source": source_id,
+        "source_layer": source_layer,
+        "state_key": state_key,
+        "ids": encode_column(np.asarray(ids), "float64"),
+        # Frame-major: frame t is values[t * n_features:(t + 1) * n_features]
+        "values": pack_array(matrix.T.ravel(), float_dtype),
+        "frames": matrix.shape[1],
+        "loop": loop,
+    }
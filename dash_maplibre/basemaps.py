@@ -0,0 +1,373 @@
+"""Basemap styles cached and served by the Dash app.
+
+Loading a style URL in every callback (or letting every browser fetch the
+style, sprites and glyphs from a third-party CDN) costs a network round
+trip per toggle and breaks in air-gapped deployments.  Register basemaps
+once instead::
+
+    from dash_maplibre import register_basemap, basemap_url
+
+    register_basemap(app, "light", "https://basemaps.cartocdn.com/gl/positron-gl-style/style.json",
+                     assets_dir="basemaps/light")
+
+    @app.callback(Output("map", "basemap"), Input("theme", "value"))
+    def set_basemap(theme):
+        return basemap_url(app, theme)
+
+The style is fetched on first use, kept in memory and revalidated with its
+ETag once ``revalidate_after`` seconds have passed (a failing upstream keeps
+the cached copy).  Sprite, glyph and tile URLs are rewritten to routes of the
+Dash app, which proxy the upstream resources through an LRU cache.  With
+``assets_dir`` every fetched resource is also written to disk, and resources
+found there are served without touching the network, so a warmed-up
+directory (or one filled by hand) makes the basemap work fully offline:
+
+- ``<assets_dir>/style.json``
+- ``<assets_dir>/sprite/<id>/sprite.json``, ``sprite.png``, ``sprite@2x.*``
+- ``<assets_dir>/glyphs/<fontstack>/<range>.pbf``
+- ``<assets_dir>/tiles/<source>/<template>/<z>/<x>/<y>``
+
+Only tile templates using nothing but ``{z}``, ``{x}`` and ``{y}`` are
+proxied; other templates are left pointing at their origin.
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from . import _server
+
+_REGISTRY = "basemaps"
+_TILE_TOKENS = ("{z}", "{x}", "{y}")
+DEFAULT_RESOURCE_CACHE_SIZE = 2048
+RESOURCE_MAX_AGE = 86400
+
+
+def _is_url(value):
+    return isinstance(value, str) and value.split(":", 1)[0] in ("http", "https")
+
+
+def _guess_type(path):
+    if path.endswith((".pbf", ".mvt")):
+        return "application/x-protobuf"
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class Basemap:
+    """A cached, URL-rewritten MapLibre style and its resources.
+
+    Parameters mirror :func:`register_basemap`.
+    """
+
+    def __init__(
+        self,
+        name,
+        style,
+        assets_dir=None,
+        revalidate_after=3600,
+        cache_size=DEFAULT_RESOURCE_CACHE_SIZE,
+        timeout=10,
+    ):
+        self.name = name
+        self.style_source = style
+        self.assets_dir = assets_dir
+        self.revalidate_after = revalidate_after
+        self.timeout = timeout
+        # URL prefix of this basemap's routes, set on registration
+        self.relative_base = ""
+        self.cache = _server.LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self._raw = style if isinstance(style, dict) else None
+        self._etag = None
+        self._checked_at = time.time() if self._raw is not None else 0.0
+        self._version = 0
+        self._rewritten = {}
+        # Upstream URL (templates) of proxied resources, filled by _rewrite
+        self._sprites = {}
+        self._glyphs = None
+        self._tiles = {}
+
+    # -- upstream access -------------------------------------------------
+
+    def _fetch(self, url, etag=None):
+        """GET ``url``; returns ``(status, body, headers)``."""
+        request = urllib.request.Request(url, headers={"User-Agent": "dash-maplibre"})
+        if etag:
+            request.add_header("If-None-Match", etag)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read(), response.headers
+        except urllib.error.HTTPError as err:
+            if err.code == 304:
+                return 304, b"", err.headers
+            raise
+
+    def _disk_path(self, relative):
+        if self.assets_dir is None:
+            return None
+        path = os.path.normpath(os.path.join(self.assets_dir, relative))
+        # Never serve files outside the assets directory.
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(self.assets_dir)]) != os.path.abspath(self.assets_dir):
+            return None
+        return path
+
+    def _write_disk(self, relative, body):
+        path = self._disk_path(relative)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(body)
+        except OSError:
+            pass
+
+    def _load_style(self):
+        if isinstance(self.style_source, dict):
+            return self.style_source
+        disk = self._disk_path("style.json")
+        if not _is_url(self.style_source):
+            with open(self.style_source) as f:
+                return json.load(f)
+        try:
+            status, body, headers = self._fetch(self.style_source, self._etag)
+        except (urllib.error.URLError, OSError):
+            if self._raw is not None:
+                return self._raw
+            if disk and os.path.exists(disk):
+                with open(disk) as f:
+                    return json.load(f)
+            raise
+        if status == 304:
+            return self._raw
+        self._etag = headers.get("ETag")
+        self._write_disk("style.json", body)
+        return json.loads(body)
+
+    def raw_style(self):
+        """The upstream style, fetched on first use and revalidated when stale."""
+        with self._lock:
+            stale = time.time() - self._checked_at > self.revalidate_after
+            if self._raw is None or (stale and _is_url(self.style_source)):
+                style = self._load_style()
+                self._checked_at = time.time()
+                if style is not self._raw:
+                    self._raw = style
+                    self._version += 1
+                    self._rewritten = {}
+                    self.cache.clear()
+            return self._raw
+
+    # -- rewriting ---------------------------------------------------------
+
+    def _rewrite(self, base):
+        """Return a copy of the style whose resource URLs point at ``base``."""
+        style = json.loads(json.dumps(self.raw_style()))
+        sprite = style.get("sprite")
+        if isinstance(sprite, str):
+            self._sprites = {"default": sprite}
+            style["sprite"] = "{}/sprite/default/sprite".format(base)
+        elif isinstance(sprite, list):
+            self._sprites = {entry["id"]: entry["url"] for entry in sprite}
+            style["sprite"] = [
+                {"id": entry["id"], "url": "{}/sprite/{}/sprite".format(base, urllib.parse.quote(entry["id"]))}
+                for entry in sprite
+            ]
+        if style.get("glyphs"):
+            self._glyphs = style["glyphs"]
+            style["glyphs"] = "{}/glyphs/{{fontstack}}/{{range}}.pbf".format(base)
+
+        for source_id, source in style.get("sources", {}).items():
+            if _is_url(source.get("url")) and "tiles" not in source:
+                # Inline the TileJSON so its tile templates can be proxied too.
+                try:
+                    tilejson = json.loads(self._resource_bytes("tilejson/{}.json".format(source_id), source["url"])[0])
+                except (KeyError, ValueError, urllib.error.URLError, OSError):
+                    continue
+                for key in ("tiles", "minzoom", "maxzoom", "bounds", "attribution", "scheme", "tileSize", "encoding"):
+                    if key in tilejson and key not in source:
+                        source[key] = tilejson[key]
+                del source["url"]
+            tiles = source.get("tiles")
+            if not tiles:
+                continue
+            rewritten = []
+            for i, template in enumerate(tiles):
+                tokens = [t for t in _TILE_TOKENS if t in template]
+                if len(tokens) != 3 or template.count("{") != 3:
+                    rewritten.append(template)
+                    continue
+                self._tiles[(source_id, str(i))] = template
+                rewritten.append("{}/tiles/{}/{}/{{z}}/{{x}}/{{y}}".format(base, urllib.parse.quote(source_id), i))
+            source["tiles"] = rewritten
+        return style
+
+    def style(self, base):
+        """The rewritten style for resource URLs under ``base``, cached."""
+        self.raw_style()
+        key = (base, self._version)
+        style = self._rewritten.get(key)
+        if style is None:
+            style = self._rewritten[key] = self._rewrite(base)
+        return style
+
+    # -- resources ---------------------------------------------------------
+
+    def _resource_bytes(self, relative, upstream):
+        """Bytes and content type of a resource: memory, then disk, then upstream."""
+        cached = self.cache.get(relative)
+        if cached is not None:
+            return cached
+        disk = self._disk_path(relative)
+        if disk and os.path.exists(disk):
+            with open(disk, "rb") as f:
+                result = (f.read(), _guess_type(relative))
+        else:
+            if upstream is None or not _is_url(upstream):
+                raise KeyError(relative)
+            _, body, headers = self._fetch(upstream)
+            result = (body, headers.get("Content-Type") or _guess_type(upstream))
+            self._write_disk(relative, body)
+        self.cache.set(relative, result)
+        return result
+
+    def resource(self, kind, path):
+        """Serve ``kind`` (sprite, glyphs or tiles) at ``path``."""
+        relative = "{}/{}".format(kind, path)
+        upstream = None
+        if kind == "sprite":
+            sprite_id, _, filename = path.partition("/")
+            base = self._sprites.get(sprite_id)
+            if base is not None and filename.startswith("sprite"):
+                upstream = base + filename[len("sprite"):]
+        elif kind == "glyphs" and self._glyphs:
+            fontstack, _, filename = path.partition("/")
+            upstream = self._glyphs.replace("{fontstack}", urllib.parse.quote(fontstack)).replace(
+                "{range}", filename[: -len(".pbf")] if filename.endswith(".pbf") else filename
+            )
+        elif kind == "tiles":
+            source_id, index, z, x, y = path.split("/")
+            template = self._tiles.get((source_id, index))
+            if template is not None:
+                upstream = template.replace("{z}", z).replace("{x}", x).replace("{y}", y)
+        return self._resource_bytes(relative, upstream)
+
+
+def _registered(name):
+    import flask
+
+    basemaps = flask.current_app.extensions.get("dash_maplibre", {}).get(_REGISTRY, {})
+    basemap = basemaps.get(name)
+    if basemap is None:
+        flask.abort(404)
+    return basemap
+
+
+def _serve_style(name):
+    import flask
+
+    basemap = _registered(name)
+    # Server-relative URLs, which the component resolves against the page, so
+    # they stay right behind proxies terminating TLS
+    try:
+        style = basemap.style(basemap.relative_base)
+    except (ValueError, urllib.error.URLError, OSError):
+        flask.abort(502)
+    body = json.dumps(style).encode("utf-8")
+    response = flask.Response(body, mimetype="application/json")
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(flask.request)
+
+
+def _serve_resource(name, kind, path):
+    import flask
+
+    basemap = _registered(name)
+    try:
+        # Rewriting the style records the upstream URLs resources are proxied from.
+        basemap.style(basemap.relative_base)
+    except (ValueError, urllib.error.URLError, OSError):
+        # Upstream unreachable: resources in memory or on disk are still served
+        pass
+    try:
+        body, content_type = basemap.resource(kind, path)
+    except (KeyError, ValueError, urllib.error.URLError, OSError):
+        flask.abort(404)
+    response = flask.Response(body, content_type=content_type)
+    response.headers["Cache-Control"] = "public, max-age={}".format(RESOURCE_MAX_AGE)
+    return response
+
+
+def register_basemap(
+    app,
+    name,
+    style,
+    assets_dir=None,
+    revalidate_after=3600,
+    cache_size=DEFAULT_RESOURCE_CACHE_SIZE,
+    timeout=10,
+):
+    """Register a basemap style to be cached and served by the Dash app.
+
+    :param app: The ``dash.Dash`` app.
+    :param name: Name of the basemap, used in its URLs.
+    :param style: Style URL, path to a style JSON file, or style dict.
+    :param assets_dir: Optional directory used as persistent cache and as
+        offline source of the style and its resources (layout in the module
+        docstring).
+    :param revalidate_after: Seconds after which a URL style is revalidated
+        with its ETag on next use.
+    :param cache_size: Number of sprites, glyph ranges and tiles kept in
+        memory.
+    :param timeout: Timeout in seconds for upstream requests.
+    :return: The basemap URL, see :func:`basemap_url`.
+    """
+    basemap = Basemap(
+        name,
+        style,
+        assets_dir=assets_dir,
+        revalidate_after=revalidate_after,
+        cache_size=cache_size,
+        timeout=timeout,
+    )
+    basemap.relative_base = _server.relative_url(app, "basemaps/{}".format(urllib.parse.quote(name)))
+    _server.get_registry(app, _REGISTRY)[name] = basemap
+    _server.add_route(app, "basemaps/<name>/style.json", "dash_maplibre_basemap_style", _serve_style)
+    _server.add_route(
+        app,
+        "basemaps/<name>/<any(sprite, glyphs, tiles):kind>/<path:path>",
+        "dash_maplibre_basemap_resource",
+        _serve_resource,
+    )
+    return basemap_url(app, name)
+
+
+def basemap_url(app, name):
+    """Return the ``basemap`` prop value for a registered basemap.
+
+    This is a short URL string, so returning it from callbacks is cheap;
+    the browser revalidates the style with its ETag.
+    """
+    if name not in _server.get_registry(app, _REGISTRY):
+        raise KeyError("No basemap named {!r} is registered on this app".format(name))
+    return _server.relative_url(app, "basemaps/{}/style.json".format(urllib.parse.quote(name)))
+
+
+def get_basemap(app, name):
+    """Return the cached style dict of a registered basemap.
+
+    Resource URLs in the returned style are relative to the app (the
+    component makes them absolute), and the same dict object is returned
+    until the upstream style changes.  Prefer :func:`basemap_url` in
+    callbacks, which avoids sending the style through the callback.
+    """
+    basemap = _server.get_registry(app, _REGISTRY).get(name)
+    if basemap is None:
+        raise KeyError("No basemap named {!r} is registered on this app".format(name))
+    return basemap.style(basemap.relative_base)
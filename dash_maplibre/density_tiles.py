@@ -0,0 +1,339 @@
+"""Raster density tiles for point datasets too large to draw in the browser.
+
+Tens of millions of points cannot be shipped to the client as a ``circle``
+layer.  Register them once and the app renders 256 pixel PNG tiles instead:
+the points inside a tile are binned into a density grid with NumPy and
+colour-mapped with the same stops as the ``Colorbar``, so the legend and the
+raster always agree::
+
+    from dash_maplibre import register_density_tiles
+
+    stops = {0: ["#ffffcc", "#ffffcc"], 10: ["#fd8d3c", "#fd8d3c"], 100: ["#800026", "#800026"]}
+    source = register_density_tiles(app, "events", df["lon"], df["lat"], stops)
+    DashMaplibre(
+        sources={"events": source},
+        layers=[{"id": "events", "type": "raster", "source": "events"}],
+        colorbar_map={"stops": stops, "title": "Events per pixel"},
+    )
+
+Points are sorted along a Z-order curve once, so the points of any tile are a
+contiguous slice found by binary search.  Rendered tiles are kept in an LRU
+cache.
+"""
+import re
+import struct
+import zlib
+
+from . import _server
+from ._optional import import_optional
+from .aggregation import TILE_SIZE, _to_pixels
+
+DEFAULT_TILE_CACHE_SIZE = 1024
+STATISTICS = ("count", "sum", "mean")
+PNG_MIMETYPE = "image/png"
+# Zoom level of the Z-order index; deeper tiles filter their ancestor's slice
+INDEX_ZOOM = 16
+_REGISTRY = "density_tiles"
+_RGB_RE = re.compile(r"^rgba?\((.*)\)$")
+
+
+def _np():
+    return import_optional("numpy", "Density tiles")
+
+
+def parse_color(color):
+    """Parse a ``#rgb``, ``#rrggbb(aa)``, ``rgb()`` or ``rgba()`` colour to RGBA 0-255."""
+    text = color.strip().lower()
+    if text.startswith("#"):
+        digits = text[1:]
+        if len(digits) in (3, 4):
+            digits = "".join(c * 2 for c in digits)
+        if len(digits) == 6:
+            digits += "ff"
+        if len(digits) == 8:
+            try:
+                return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4, 6))
+            except ValueError:
+                pass
+    match = _RGB_RE.match(text)
+    if match:
+        parts = [part.strip() for part in match.group(1).split(",")]
+        if len(parts) in (3, 4):
+            rgb = [float(p[:-1]) * 2.55 if p.endswith("%") else float(p) for p in parts[:3]]
+            alpha = float(parts[3]) if len(parts) == 4 else 1.0
+            return tuple(rgb) + (alpha * 255,)
+    raise ValueError("Unsupported colour {!r}, use #rrggbb, rgb() or rgba()".format(color))
+
+
+def _color_ramp(stops):
+    """Breakpoints and RGBA colours of Colorbar ``stops``.
+
+    Every stop is ``value: [colour left of it, colour right of it]``; between
+    two stops the colour blends from the right colour of the lower stop to
+    the left colour of the upper one, as in the ``Colorbar`` gradient.
+    """
+    np = _np()
+    if not stops:
+        raise ValueError("Density tiles need at least one colour stop")
+    values = []
+    colors = []
+    for value, pair in sorted(((float(v), c) for v, c in stops.items()), key=lambda item: item[0]):
+        left, right = (pair, pair) if isinstance(pair, str) else pair
+        values.extend([value, value])
+        colors.extend([parse_color(left), parse_color(right)])
+    return np.asarray(values, dtype="float64"), np.asarray(colors, dtype="float64")
+
+
+def _spread_bits(values):
+    """Interleave zeros between the low 16 bits of ``values`` (Morton code).
+
+    Works on Python ints and NumPy integer arrays alike.
+    """
+    values = values & 0xFFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    values = (values | (values << 1)) & 0x55555555
+    return values
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def encode_png(image, level=6):
+    """Encode an ``(height, width, 4)`` uint8 RGBA array as PNG."""
+    np = _np()
+    height, width = image.shape[:2]
+    raw = np.zeros((height, width * 4 + 1), dtype="uint8")
+    # Filter type 0 (none) in the first byte of every row
+    raw[:, 1:] = image.reshape(height, width * 4)
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), level)),
+        _png_chunk(b"IEND", b""),
+    ])
+
+
+class DensityTileSet:
+    """Points rendered as colour-mapped density tiles.
+
+    Parameters mirror :func:`register_density_tiles`.
+    """
+
+    def __init__(
+        self,
+        lng,
+        lat,
+        stops,
+        weights=None,
+        statistic="count",
+        bin_size=4,
+        tile_size=256,
+        min_zoom=0,
+        max_zoom=14,
+        cache_size=DEFAULT_TILE_CACHE_SIZE,
+    ):
+        np = _np()
+        if statistic not in STATISTICS:
+            raise ValueError("statistic must be one of {}, not {!r}".format(STATISTICS, statistic))
+        if statistic != "count" and weights is None:
+            raise ValueError("statistic {!r} needs weights".format(statistic))
+        if tile_size % bin_size:
+            raise ValueError("tile_size must be a multiple of bin_size")
+        lng = np.asarray(lng, dtype="float64")
+        lat = np.asarray(lat, dtype="float64")
+        if lng.shape != lat.shape:
+            raise ValueError("lng and lat must have the same length")
+        self.stops = stops
+        self._ramp = _color_ramp(stops)
+        self.statistic = statistic
+        self.bin_size = bin_size
+        self.tile_size = tile_size
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.cache = _server.LRUCache(cache_size)
+
+        valid = np.isfinite(lng) & np.isfinite(lat)
+        if weights is not None:
+            weights = np.asarray(weights, dtype="float64")
+            valid &= np.isfinite(weights)
+        # Web mercator position in [0, 1) of the whole world
+        x, y = _to_pixels(lng[valid], lat[valid], 0)
+        x = np.clip(x / TILE_SIZE, 0.0, np.nextafter(1.0, 0.0))
+        y = np.clip(y / TILE_SIZE, 0.0, np.nextafter(1.0, 0.0))
+        cells = 1 << INDEX_ZOOM
+        ix = (x * cells).astype("int64")
+        iy = (y * cells).astype("int64")
+        keys = _spread_bits(ix) | (_spread_bits(iy) << 1)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._x = x[order]
+        self._y = y[order]
+        self._weights = None if weights is None else weights[valid][order]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _tile_slice(self, z, x, y):
+        """Range of sorted points inside tile ``z/x/y`` (or its index ancestor)."""
+        np = _np()
+        if z > INDEX_ZOOM:
+            shift = z - INDEX_ZOOM
+            z, x, y = INDEX_ZOOM, x >> shift, y >> shift
+        span = 1 << (2 * (INDEX_ZOOM - z))
+        first = (_spread_bits(x) | (_spread_bits(y) << 1)) * span
+        return (
+            int(np.searchsorted(self._keys, first, side="left")),
+            int(np.searchsorted(self._keys, first + span, side="left")),
+        )
+
+    def grid(self, z, x, y):
+        """Per-bin values and point counts of tile ``z/x/y`` as square arrays."""
+        np = _np()
+        size = self.tile_size // self.bin_size
+        start, stop = self._tile_slice(z, x, y)
+        n = 2 ** z
+        col = np.floor((self._x[start:stop] * n - x) * size).astype("int64")
+        row = np.floor((self._y[start:stop] * n - y) * size).astype("int64")
+        inside = (col >= 0) & (col < size) & (row >= 0) & (row < size)
+        cells = row[inside] * size + col[inside]
+        counts = np.bincount(cells, minlength=size * size)
+        if self.statistic == "count":
+            values = counts.astype("float64")
+        else:
+            values = np.bincount(cells, weights=self._weights[start:stop][inside], minlength=size * size)
+            if self.statistic == "mean":
+                values = values / np.maximum(counts, 1)
+        return values.reshape(size, size), counts.reshape(size, size)
+
+    def colorize(self, values, mask):
+        """RGBA uint8 colours of ``values``; pixels outside ``mask`` are transparent."""
+        np = _np()
+        breakpoints, colors = self._ramp
+        rgba = np.stack([np.interp(values, breakpoints, colors[:, c]) for c in range(4)], axis=-1)
+        rgba = np.clip(np.round(rgba), 0, 255).astype("uint8")
+        rgba[~mask] = 0
+        return rgba
+
+    def get_tile(self, z, x, y):
+        """Return tile ``z/x/y`` as PNG bytes (empty if it has no points)."""
+        key = (z, x, y)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        tile = self._build_tile(z, x, y)
+        self.cache.set(key, tile)
+        return tile
+
+    def _build_tile(self, z, x, y):
+        np = _np()
+        if z < self.min_zoom or z > self.max_zoom:
+            return b""
+        values, counts = self.grid(z, x, y)
+        mask = counts > 0
+        if not mask.any():
+            return b""
+        image = self.colorize(values, mask)
+        if self.bin_size > 1:
+            image = np.repeat(np.repeat(image, self.bin_size, axis=0), self.bin_size, axis=1)
+        return encode_png(image)
+
+    def colorbar(self, **options):
+        """A ``colorbar_map`` config using the stops of the tiles."""
+        return dict(options, stops=self.stops)
+
+
+def _serve_tile(name, z, x, y):
+    import flask
+
+    tilesets = flask.current_app.extensions.get("dash_maplibre", {}).get(_REGISTRY, {})
+    tileset = tilesets.get(name)
+    if tileset is None:
+        flask.abort(404)
+    tile = tileset.get_tile(z, x, y)
+    if not tile:
+        return flask.Response(status=204)
+    response = flask.Response(tile, mimetype=PNG_MIMETYPE)
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return response
+
+
+def register_density_tiles(
+    app,
+    name,
+    lng,
+    lat,
+    stops,
+    weights=None,
+    statistic="count",
+    bin_size=4,
+    tile_size=256,
+    min_zoom=0,
+    max_zoom=14,
+    cache_size=DEFAULT_TILE_CACHE_SIZE,
+):
+    """Register points to be served as raster density tiles.
+
+    :param app: The ``dash.Dash`` app whose Flask server should serve the tiles.
+    :param name: Name of the tileset, used in the tile URL.  Registering the
+        same name again replaces the data (and drops cached tiles).
+    :param lng: Longitudes, any array-like.
+    :param lat: Latitudes, same length as ``lng``.
+    :param stops: Colour stops in the ``Colorbar`` format,
+        ``{value: [colour_left, colour_right]}``.  Values outside the stops
+        get the colour of the nearest end.
+    :param weights: Optional value per point, needed for ``"sum"`` and
+        ``"mean"``.
+    :param statistic: Value of a bin: ``"count"`` of points, ``"sum"`` or
+        ``"mean"`` of the weights.
+    :param bin_size: Bin size in tile pixels.  Bins cover the same screen
+        area at every zoom, so counts per bin compare across zoom levels
+        only as densities per screen area.
+    :param tile_size: Tile size in pixels.
+    :param min_zoom: Lowest zoom level tiles are produced for.
+    :param max_zoom: Highest zoom level; MapLibre overzooms beyond it.
+    :param cache_size: Number of rendered tiles to keep in memory.
+    :return: A ``{"type": "raster", ...}`` dict usable in ``DashMaplibre.sources``.
+    """
+    tileset = DensityTileSet(
+        lng,
+        lat,
+        stops,
+        weights=weights,
+        statistic=statistic,
+        bin_size=bin_size,
+        tile_size=tile_size,
+        min_zoom=min_zoom,
+        max_zoom=max_zoom,
+        cache_size=cache_size,
+    )
+    _server.get_registry(app, _REGISTRY)[name] = tileset
+    _server.add_route(
+        app,
+        "density/<name>/<int:z>/<int:x>/<int:y>.png",
+        "dash_maplibre_density_tiles",
+        _serve_tile,
+    )
+    return density_tile_source(app, name)
+
+
+def density_tile_source(app, name, **source_options):
+    """Return the ``{"type": "raster"}`` sources entry of registered density tiles.
+
+    Extra keyword arguments (e.g. ``attribution``) are merged into the
+    source definition.
+    """
+    tileset = _server.get_registry(app, _REGISTRY).get(name)
+    if tileset is None:
+        raise KeyError("No density tileset named {!r} is registered on this app".format(name))
+    source = {
+        "type": "raster",
+        "tiles": [_server.relative_url(app, "density/{}/{{z}}/{{x}}/{{y}}.png".format(name))],
+        "tileSize": tileset.tile_size,
+        "minzoom": tileset.min_zoom,
+        "maxzoom": tileset.max_zoom,
+    }
+    source.update(source_options)
+    return source
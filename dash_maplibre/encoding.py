@@ -0,0 +1,181 @@
+"""Fast GeoJSON text encoding from arrays and DataFrames.
+
+Building a FeatureCollection as nested dicts and letting Dash serialise it
+walks every feature twice in Python.  The encoders here turn whole columns
+into JSON text with NumPy and join the pieces once, which is an order of
+magnitude faster for large frames.  The resulting text is shipped as a
+single string inside a ``"geojson-serialized"`` source, which the component
+parses with the browser's native ``JSON.parse``::
+
+    text = encode_points(df["lon"], df["lat"], properties=df, columns=["name", "risk"], precision=5)
+    DashMaplibre(sources={"events": serialized_source(text, promoteId="name")}, ...)
+
+The same text can also be served from a Flask route and used as the URL
+``data`` of a plain geojson source.
+"""
+import json
+from itertools import repeat
+
+from ._optional import import_optional
+from .columnar import _is_missing, _json_value
+
+
+def _np():
+    return import_optional("numpy", "GeoJSON encoding")
+
+
+def _encode_value(value):
+    if hasattr(value, "isoformat"):
+        # datetime, date and pandas Timestamp as Dash's JSON encoder writes them; NaT is null
+        return json.dumps(value.isoformat() if value == value else None)
+    return json.dumps(_json_value(value), ensure_ascii=False)
+
+
+def _json_datetimes(array):
+    """Encode a datetime64 array as ISO strings, dropping the fraction of whole seconds."""
+    np = _np()
+    missing = np.isnat(array)
+    seconds = array.astype("datetime64[s]")
+    whole = bool((array[~missing] == seconds[~missing]).all())
+    text = np.datetime_as_string(seconds if whole else array)
+    return np.where(missing, "null", np.char.add(np.char.add('"', text), '"')).tolist()
+
+
+def _json_column(values, precision=None):
+    """Encode a column as a list of JSON value strings.
+
+    :param values: Any array-like.
+    :param precision: Decimals to round floating point values to; ``None``
+        keeps the shortest representation of each value.
+    """
+    np = _np()
+    array = np.asarray(values)
+    kind = array.dtype.kind
+    if kind == "b":
+        return np.where(array, "true", "false").tolist()
+    if kind in "iu":
+        return array.astype(str).tolist()
+    if kind == "f":
+        rounded = np.round(array, precision) if precision is not None else array
+        return np.where(np.isfinite(array), rounded.astype(str), "null").tolist()
+    if kind == "M":
+        return _json_datetimes(array)
+
+    # Text and other objects: encode each distinct value once
+    encoded = {}
+    out = []
+    for value in array.tolist():
+        if _is_missing(value):
+            out.append("null")
+            continue
+        try:
+            # Keyed by type too, so True and 1 do not share an entry
+            key = (type(value), value)
+            text = encoded.get(key)
+            if text is None:
+                text = encoded[key] = _encode_value(value)
+        except TypeError:
+            # Unhashable values (lists, dicts) are encoded as they come
+            text = json.dumps(value, default=str, ensure_ascii=False)
+        out.append(text)
+    return out
+
+
+def _property_columns(properties, columns):
+    if properties is None:
+        return []
+    if columns is None:
+        columns = list(properties.columns) if hasattr(properties, "columns") else list(properties)
+    if hasattr(properties, "columns"):
+        return [(str(name), properties[name].to_numpy()) for name in columns]
+    return [(str(name), properties[name]) for name in columns]
+
+
+def _feature_texts(geometries, properties, columns, ids, property_precision):
+    """JSON text of every feature, joined from per-column JSON pieces."""
+    pieces = [repeat('{"type":"Feature","geometry":'), geometries]
+    if ids is not None:
+        pieces += [repeat(',"id":'), _json_column(ids)]
+    pieces.append(repeat(',"properties":{'))
+    for i, (name, values) in enumerate(_property_columns(properties, columns)):
+        key = json.dumps(name, ensure_ascii=False) + ":"
+        pieces += [repeat(key if i == 0 else "," + key), _json_column(values, property_precision)]
+    pieces.append(repeat("}}"))
+    return map("".join, zip(*pieces))
+
+
+def _feature_collection(feature_texts):
+    return '{"type":"FeatureCollection","features":[' + ",".join(feature_texts) + "]}"
+
+
+def _point_feature_texts(lng, lat, properties, ids, columns, precision, property_precision):
+    np = _np()
+    lng = np.asarray(lng, dtype="float64")
+    lat = np.asarray(lat, dtype="float64")
+    if lng.shape != lat.shape:
+        raise ValueError("lng and lat must have the same length")
+    geometries = map(
+        '{{"type":"Point","coordinates":[{},{}]}}'.format,
+        _json_column(lng, precision),
+        _json_column(lat, precision),
+    )
+    return _feature_texts(list(geometries), properties, columns, ids, property_precision)
+
+
+def encode_points(lng, lat, properties=None, ids=None, columns=None, precision=6, property_precision=None):
+    """Encode point coordinates and property columns as FeatureCollection text.
+
+    :param lng: Longitudes, any array-like.
+    :param lat: Latitudes, same length as ``lng``.
+    :param properties: A DataFrame or a mapping of column name to array.
+    :param ids: Optional feature ids.
+    :param columns: Property columns to include, defaults to all.
+    :param precision: Decimals kept for coordinates (6 is about 0.1 m).
+    :param property_precision: Decimals kept for float properties, ``None``
+        keeps them as they are.
+    :return: The GeoJSON text.
+    """
+    return _feature_collection(
+        _point_feature_texts(lng, lat, properties, ids, columns, precision, property_precision)
+    )
+
+
+def encode_geodataframe(gdf, columns=None, id_column=None, precision=6, property_precision=None):
+    """Encode a GeoPandas GeoDataFrame as FeatureCollection text.
+
+    Geometries are reprojected to EPSG:4326 if needed and encoded by
+    shapely (>= 2) in one vectorised call.
+
+    :param gdf: The GeoDataFrame.
+    :param columns: Property columns to include, defaults to all
+        non-geometry columns.
+    :param id_column: Column to use as feature id.
+    :param precision: Decimals kept for coordinates.
+    :param property_precision: Decimals kept for float properties.
+    :return: The GeoJSON text.
+    """
+    np = _np()
+    shapely = import_optional("shapely", "encode_geodataframe")
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(epsg=4326)
+    geometries = gdf.geometry.values
+    if precision is not None:
+        geometries = shapely.transform(geometries, lambda coords: np.round(coords, precision))
+    encoded = [text if text is not None else "null" for text in shapely.to_geojson(geometries).tolist()]
+    if columns is None:
+        columns = [c for c in gdf.columns if c != gdf.geometry.name]
+    ids = gdf[id_column].to_numpy() if id_column is not None else None
+    return _feature_collection(_feature_texts(encoded, gdf, columns, ids, property_precision))
+
+
+def serialized_source(text, **source_options):
+    """Wrap GeoJSON text as a ``"geojson-serialized"`` source.
+
+    The component parses the text into a regular geojson source; extra
+    keyword arguments (``promoteId``, ``cluster``, ...) are passed on.
+    """
+    if isinstance(text, bytes):
+        text = text.decode("utf-8")
+    source = {"type": "geojson-serialized", "json": text}
+    source.update(source_options)
+    return source
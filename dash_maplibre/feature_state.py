@@ -0,0 +1,58 @@
+"""Build the compact bulk form of the ``feature_state`` prop.
+
+The nested ``{featureId: value}`` form of ``DashMaplibre.feature_state``
+costs one JSON key per feature.  For choropleth-style updates driven by
+arrays, a state key can instead hold ``{"ids": ..., "values": ...}`` with
+numeric columns packed as binary arrays::
+
+    state = bulk_feature_state("regions", {"risk": df["risk"], "selected": df["risk"] > 0.9},
+                               ids=df["region_id"])
+    return state  # Output("map", "feature_state")
+
+The component only pushes values that differ from the state it applied
+before, so recolouring costs in proportion to what changed.  ``NaN`` or
+``None`` values clear the state key for that feature.
+"""
+from .columnar import encode_column
+
+
+def _is_scalar(values):
+    return values is None or isinstance(values, str) or not hasattr(values, "__len__")
+
+
+def bulk_state(ids, values, float_dtype="float32", _packed_ids=None):
+    """Return ``{"ids": ..., "values": ...}`` for one state key.
+
+    :param ids: Feature ids, any array-like.
+    :param values: Array-like with one value per id, or a single value
+        applied to all ids.
+    :param float_dtype: Packing type for floating point values.
+    """
+    packed_ids = _packed_ids if _packed_ids is not None else encode_column(ids, "float64")
+    if _is_scalar(values):
+        # Unwrap NumPy scalars so they serialise as plain JSON values.
+        value = values.item() if hasattr(values, "item") else values
+        return {"ids": packed_ids, "values": value}
+    return {"ids": packed_ids, "values": encode_column(values, float_dtype)}
+
+
+def bulk_feature_state(source_id, states, ids, source_layer="", feature_state=None, float_dtype="float32"):
+    """Add bulk state for one source to a ``feature_state`` dict.
+
+    :param source_id: Id of the map source.
+    :param states: Mapping of state key to values (array-like or scalar).
+    :param ids: Feature ids shared by all state keys.
+    :param source_layer: Source layer for vector sources; leave empty for
+        geojson sources.
+    :param feature_state: Existing ``feature_state`` dict to extend,
+        e.g. to update several sources at once.
+    :param float_dtype: Packing type for floating point values.
+    :return: The ``feature_state`` dict.
+    """
+    if feature_state is None:
+        feature_state = {}
+    layer_state = feature_state.setdefault(source_id, {}).setdefault(source_layer, {})
+    packed_ids = encode_column(ids, "float64")
+    for state_key, values in states.items():
+        layer_state[state_key] = bulk_state(ids, values, float_dtype=float_dtype, _packed_ids=packed_ids)
+    return feature_state
@@ -0,0 +1,306 @@
+"""Build small ``dash.Patch`` updates for ``DashMaplibre.sources``.
+
+Returning a whole FeatureCollection from a callback re-sends every feature
+and makes the map re-parse the source.  The helpers here compare the
+features a callback last sent with the ones it wants to show and emit a
+Patch touching only the changed features.  Dash applies such a Patch on
+the client with structural sharing, which the component uses to push only
+the touched features to MapLibre (``GeoJSONSource.updateData``)::
+
+    @app.callback(Output("map", "sources"), Input("interval", "n_intervals"))
+    def move_vehicles(_):
+        global vehicles
+        new = load_vehicle_features()
+        patch = patch_features("vehicles", vehicles, new, id_property="vehicle_id")
+        vehicles = new
+        return patch
+
+For the component to apply the change incrementally, features need a
+stable id: either a top-level ``id`` or the source's ``promoteId``.
+
+:class:`MapState` does the bookkeeping for whole ``sources`` and
+``layers`` values: callbacks build the full desired state and get back the
+smallest Patch from what was last sent to the same browser session.
+"""
+from collections import namedtuple
+
+import dash
+
+from . import _server
+
+FeatureDiff = namedtuple("FeatureDiff", ["added", "updated", "removed"])
+FeatureDiff.__doc__ = """Feature-level difference between two feature lists.
+
+``added`` holds new features, ``updated`` pairs of ``(old_index, feature)``
+and ``removed`` the indices of dropped features in the old list.
+"""
+
+
+def _feature_key(feature, id_property):
+    if id_property is not None:
+        return (feature.get("properties") or {}).get(id_property)
+    return feature.get("id")
+
+
+def _features(data):
+    if isinstance(data, dict):
+        return data.get("features") or []
+    return list(data or [])
+
+
+def diff_features(old, new, id_property=None):
+    """Compare two feature lists (or FeatureCollections).
+
+    Features are matched by ``id_property`` (or the feature ``id``).  If
+    any feature lacks an id, or ids are duplicated, features are matched
+    by position instead.
+
+    :return: A :class:`FeatureDiff`.
+    """
+    old = _features(old)
+    new = _features(new)
+    old_keys = [_feature_key(f, id_property) for f in old]
+    new_keys = [_feature_key(f, id_property) for f in new]
+    keyed = (
+        None not in old_keys
+        and None not in new_keys
+        and len(set(old_keys)) == len(old_keys)
+        and len(set(new_keys)) == len(new_keys)
+    )
+
+    if not keyed:
+        common = min(len(old), len(new))
+        updated = [(i, new[i]) for i in range(common) if old[i] != new[i]]
+        return FeatureDiff(list(new[common:]), updated, list(range(common, len(old))))
+
+    old_index = {key: i for i, key in enumerate(old_keys)}
+    new_set = set(new_keys)
+    added = []
+    updated = []
+    for key, feature in zip(new_keys, new):
+        i = old_index.get(key)
+        if i is None:
+            added.append(feature)
+        elif old[i] != feature:
+            updated.append((i, feature))
+    removed = [i for i, key in enumerate(old_keys) if key not in new_set]
+    return FeatureDiff(added, updated, removed)
+
+
+def patch_features(source_id, old, new, id_property=None, patch=None):
+    """Return a Patch updating the features of a geojson source in place.
+
+    The Patch targets ``sources[source_id]["data"]["features"]`` and is
+    meant to be returned for a ``DashMaplibre.sources`` output.  Updated
+    features are replaced at their index, removed features are deleted and
+    new features appended, so the resulting feature order can differ from
+    ``new``.
+
+    :param source_id: Id of the geojson source in ``sources``.
+    :param old: Features (or FeatureCollection) currently shown on the map.
+    :param new: Features (or FeatureCollection) that should be shown.
+    :param id_property: Property used to match features, defaults to the
+        feature ``id``.
+    :param patch: An existing ``dash.Patch`` for the sources prop to add the
+        operations to, e.g. to update several sources in one callback.
+    """
+    if patch is None:
+        patch = dash.Patch()
+    diff = diff_features(old, new, id_property=id_property)
+    _patch_feature_diff(patch[source_id]["data"]["features"], diff)
+    return patch
+
+
+def _patch_feature_diff(features, diff):
+    for i, feature in diff.updated:
+        features[i] = feature
+    # Delete back to front so earlier indices stay valid.
+    for i in sorted(diff.removed, reverse=True):
+        del features[i]
+    if diff.added:
+        features.extend(diff.added)
+
+
+def _apply_feature_diff(old, diff):
+    """The feature list the client holds after applying ``diff`` to ``old``."""
+    features = list(old)
+    for i, feature in diff.updated:
+        features[i] = feature
+    for i in sorted(diff.removed, reverse=True):
+        del features[i]
+    features.extend(diff.added)
+    return features
+
+
+def _patch_dict(node, old, new):
+    """Add operations turning dict ``old`` into ``new`` to Patch ``node``.
+
+    Nested dicts (``paint``, ``layout``, ...) are patched key by key; any
+    other changed value, including lists such as expressions, is replaced.
+    Returns whether anything changed.
+    """
+    changed = False
+    for key in old:
+        if key not in new:
+            del node[key]
+            changed = True
+    for key, value in new.items():
+        if key not in old:
+            node[key] = value
+            changed = True
+            continue
+        previous = old[key]
+        if previous is value or previous == value:
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            _patch_dict(node[key], previous, value)
+        else:
+            node[key] = value
+        changed = True
+    return changed
+
+
+def _feature_collection(source):
+    data = source.get("data") if isinstance(source, dict) else None
+    if isinstance(data, dict) and data.get("type") == "FeatureCollection":
+        return data
+    return None
+
+
+class MapState:
+    """Remember the ``sources`` and ``layers`` sent to each browser session
+    and turn full new values into minimal Patches::
+
+        state = MapState()
+
+        @app.callback(Output("map", "sources"), Input("data-version", "data"),
+                      State("session-id", "data"))
+        def update(_, session_id):
+            return state.patch_sources(session_id, build_all_sources())
+
+    The first call for a session returns the full value.  Later calls return
+    a Patch with per-feature operations for geojson FeatureCollections (see
+    :func:`patch_features`) and per-key operations for everything else, or
+    ``dash.no_update`` if nothing changed.
+
+    ``session_id`` identifies one rendered page, e.g. a uuid kept in a
+    ``dcc.Store(storage_type="memory")`` created in the layout function, so
+    a page reload starts over with a full value.  The values passed in are
+    kept as references and must not be mutated afterwards.  The state lives
+    in the server process, so apps running several worker processes need
+    sticky sessions.
+
+    :param max_sessions: Number of sessions to remember; the least recently
+        used ones are forgotten and get a full value on their next update.
+    """
+
+    def __init__(self, max_sessions=1024):
+        self._sessions = _server.LRUCache(max_sessions)
+
+    def _session(self, session_id):
+        sent = self._sessions.get(session_id)
+        if sent is None:
+            sent = {}
+            self._sessions.set(session_id, sent)
+        return sent
+
+    def forget(self, session_id):
+        """Drop what was sent to a session, so its next update is a full value."""
+        self._sessions.set(session_id, {})
+
+    def patch_sources(self, session_id, sources, id_properties=None):
+        """Return the update of the ``sources`` prop for a session.
+
+        :param session_id: Hashable id of the browser session.
+        :param sources: The full desired ``sources`` dict.
+        :param id_properties: Optional mapping of source id to the property
+            identifying its features.  Defaults to the source's string
+            ``promoteId``, else the feature ``id``.
+        """
+        session = self._session(session_id)
+        old = session.get("sources")
+        if old is None:
+            session["sources"] = dict(sources)
+            return sources
+
+        id_properties = id_properties or {}
+        patch = dash.Patch()
+        sent = {}
+        changed = False
+        for source_id in old:
+            if source_id not in sources:
+                del patch[source_id]
+                changed = True
+        for source_id, source in sources.items():
+            previous = old.get(source_id)
+            sent[source_id] = source
+            if previous is source or previous == source:
+                continue
+            changed = True
+            if (
+                not isinstance(previous, dict)
+                or not isinstance(source, dict)
+                or previous.get("type") != source.get("type")
+            ):
+                patch[source_id] = source
+                continue
+            old_data = _feature_collection(previous)
+            new_data = _feature_collection(source)
+            if old_data is None or new_data is None:
+                _patch_dict(patch[source_id], previous, source)
+                continue
+
+            promote_id = source.get("promoteId")
+            id_property = id_properties.get(
+                source_id, promote_id if isinstance(promote_id, str) else None
+            )
+            _patch_dict(
+                patch[source_id],
+                {k: v for k, v in previous.items() if k != "data"},
+                {k: v for k, v in source.items() if k != "data"},
+            )
+            _patch_dict(
+                patch[source_id]["data"],
+                {k: v for k, v in old_data.items() if k != "features"},
+                {k: v for k, v in new_data.items() if k != "features"},
+            )
+            diff = diff_features(old_data, new_data, id_property=id_property)
+            _patch_feature_diff(patch[source_id]["data"]["features"], diff)
+            # Patched features can end up in a different order than in ``source``.
+            features = _apply_feature_diff(old_data.get("features") or [], diff)
+            sent[source_id] = dict(source, data=dict(new_data, features=features))
+
+        session["sources"] = sent
+        return patch if changed else dash.no_update
+
+    def patch_layers(self, session_id, layers):
+        """Return the update of the ``layers`` prop for a session.
+
+        Layers are patched in place (down to single paint and layout keys)
+        as long as the ids keep their order; appended layers are added with
+        one operation.  Any other reordering sends the full list.
+
+        :param session_id: Hashable id of the browser session.
+        :param layers: The full desired ``layers`` list.
+        """
+        session = self._session(session_id)
+        old = session.get("layers")
+        layers = list(layers)
+        session["layers"] = layers
+        if old is None:
+            return layers
+
+        old_ids = [layer.get("id") for layer in old]
+        new_ids = [layer.get("id") for layer in layers]
+        if new_ids[:len(old_ids)] != old_ids:
+            return layers
+
+        patch = dash.Patch()
+        changed = False
+        for i, (previous, layer) in enumerate(zip(old, layers)):
+            if previous is not layer and previous != layer:
+                changed = _patch_dict(patch[i], previous, layer) or changed
+        if len(layers) > len(old):
+            patch.extend(layers[len(old):])
+            changed = True
+        return patch if changed else dash.no_update
@@ -0,0 +1,106 @@
+"""Source data shared by several maps on a page.
+
+Dashboards showing the same dataset on several synchronised maps would
+otherwise send, and parse, one copy of it per map.  Register the data once
+with the app instead and use the returned source in every map::
+
+    from dash_maplibre import register_shared_source
+
+    source = register_shared_source(app, "districts", districts_gdf, promoteId="code")
+    maps = [DashMaplibre(id=f"map-{i}", sources={"districts": source}, sync_group="districts", ...)
+            for i in range(4)]
+
+The ``"geojson-shared"`` source only carries a URL.  The component fetches
+it once per page, parses it once and hands the same data to every map using
+it.  The URL contains a hash of the data, so browsers cache it for good and
+registering new data under the same name changes the URL.
+"""
+import gzip
+import hashlib
+import json
+
+from . import _geo, _server
+
+_REGISTRY = "shared_sources"
+SHARED_MAX_AGE = 31536000
+
+
+class SharedData:
+    """Serialised GeoJSON of a shared source.
+
+    Parameters mirror :func:`register_shared_source`.
+    """
+
+    def __init__(self, data, source_options=None):
+        if isinstance(data, bytes):
+            body = data
+        elif isinstance(data, str):
+            # Pre-serialised text, e.g. from encode_points
+            body = data.encode("utf-8")
+        else:
+            features = _geo.to_feature_list(data)
+            body = json.dumps(
+                {"type": "FeatureCollection", "features": features}, separators=(",", ":")
+            ).encode("utf-8")
+        self.body = body
+        self.gzipped = gzip.compress(body)
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.source_options = dict(source_options or {})
+
+
+def _serve_shared(name):
+    import flask
+
+    shared = flask.current_app.extensions.get("dash_maplibre", {}).get(_REGISTRY, {}).get(name)
+    if shared is None:
+        flask.abort(404)
+    if "gzip" in flask.request.headers.get("Accept-Encoding", ""):
+        response = flask.Response(shared.gzipped, mimetype="application/geo+json")
+        response.headers["Content-Encoding"] = "gzip"
+        # Each encoding is a different representation and needs its own tag
+        response.set_etag(shared.etag + "-gz")
+    else:
+        response = flask.Response(shared.body, mimetype="application/geo+json")
+        response.set_etag(shared.etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    if flask.request.args.get("v") == shared.etag:
+        response.headers["Cache-Control"] = "public, max-age={}, immutable".format(SHARED_MAX_AGE)
+    else:
+        response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(flask.request)
+
+
+def register_shared_source(app, name, data, **source_options):
+    """Register data to be shared by every map using it and return its source.
+
+    :param app: The ``dash.Dash`` app whose Flask server serves the data.
+    :param name: Name of the shared source, used in its URL.  Registering
+        the same name again replaces the data.
+    :param data: A GeoJSON FeatureCollection / Feature / list of features,
+        anything with ``__geo_interface__`` such as a GeoDataFrame, or
+        already serialised GeoJSON text (``str`` or ``bytes``).
+    :param source_options: Extra geojson source options (``promoteId``,
+        ``cluster``, ...) included in the returned source.
+    :return: The ``sources`` entry, see :func:`shared_source`.
+    """
+    _server.get_registry(app, _REGISTRY)[name] = SharedData(data, source_options)
+    _server.add_route(app, "shared/<name>.geojson", "dash_maplibre_shared_source", _serve_shared)
+    return shared_source(app, name)
+
+
+def shared_source(app, name, **source_options):
+    """Return the ``sources`` entry for a shared source registered on ``app``.
+
+    Extra keyword arguments are merged over the options given at
+    registration.
+    """
+    shared = _server.get_registry(app, _REGISTRY).get(name)
+    if shared is None:
+        raise KeyError("No shared source named {!r} is registered on this app".format(name))
+    source = {
+        "type": "geojson-shared",
+        "url": "{}?v={}".format(_server.relative_url(app, "shared/{}.geojson".format(name)), shared.etag),
+    }
+    source.update(shared.source_options)
+    source.update(source_options)
+    return source
@@ -0,0 +1,186 @@
+"""Zoom-appropriate simplified variants of a geojson source.
+
+Full resolution boundary geometry carries far more vertices than the map can
+show at low zoom levels.  :func:`zoom_variants` simplifies the data once per
+zoom range (Douglas-Peucker in screen pixels, vectorised with NumPy) and
+rounds coordinates to the precision the range needs.  The component swaps
+between the variants as the map zoom crosses the breakpoints, like
+``colorbar_map`` selects its configs::
+
+    from dash_maplibre import zoom_variants
+
+    source = zoom_variants(districts_gdf, zooms=[0, 6, 10], max_zoom=14, promoteId="code")
+    DashMaplibre(sources={"districts": source}, ...)
+"""
+import math
+
+from . import _geo
+from ._optional import import_optional
+from .aggregation import _to_pixels
+
+
+def _np():
+    return import_optional("numpy", "Geometry simplification")
+
+
+def _simplify_mask(points, tolerance):
+    """Douglas-Peucker over an ``(n, 2)`` pixel array, returning the kept mask.
+
+    Distances of a whole span to its chord are computed in one NumPy call.
+    The first and last points are always kept, so closed rings stay closed.
+    """
+    np = _np()
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n < 3 or tolerance <= 0:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+    sq_tolerance = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start = points[first]
+        chord = points[last] - start
+        offsets = points[first + 1:last] - start
+        seg_sq = float(chord @ chord)
+        if seg_sq > 0:
+            t = np.clip(offsets @ chord / seg_sq, 0.0, 1.0)
+            offsets = offsets - t[:, None] * chord
+        dist_sq = np.einsum("ij,ij->i", offsets, offsets)
+        i = int(dist_sq.argmax())
+        if dist_sq[i] > sq_tolerance:
+            index = first + 1 + i
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return keep
+
+
+def _simplify_positions(positions, zoom, tolerance, decimals, min_points):
+    """Simplify one line or ring; ``None`` if fewer than ``min_points`` remain."""
+    np = _np()
+    coords = np.asarray(positions, dtype="float64")[:, :2]
+    if zoom is not None and len(coords) >= 3:
+        x, y = _to_pixels(coords[:, 0], coords[:, 1], zoom)
+        coords = coords[_simplify_mask(np.column_stack([x, y]), tolerance)]
+    if decimals is not None:
+        coords = np.round(coords, decimals)
+    if len(coords) < min_points:
+        return None
+    return coords.tolist()
+
+
+def _simplify_polygon(rings, zoom, tolerance, decimals):
+    simplified = []
+    for i, ring in enumerate(rings):
+        ring = _simplify_positions(ring, zoom, tolerance, decimals, 4)
+        if ring is None:
+            if i == 0:
+                # The outer ring collapsed, so does the polygon
+                return None
+            continue
+        simplified.append(ring)
+    return simplified
+
+
+def simplify_geometry(geometry, zoom, tolerance=1.0, decimals=None):
+    """Simplify a GeoJSON geometry for display at ``zoom``.
+
+    :param geometry: A GeoJSON geometry dict.
+    :param zoom: Zoom level the geometry is simplified for; ``None`` only
+        rounds coordinates.
+    :param tolerance: Maximum deviation in screen pixels.
+    :param decimals: Decimals to round coordinates to, ``None`` keeps them.
+    :return: The simplified geometry, or ``None`` if it collapsed below the
+        tolerance (lines shorter than two points, polygons smaller than a
+        ring).
+    """
+    if not geometry:
+        return None
+    kind = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+    if kind == "GeometryCollection":
+        parts = [simplify_geometry(g, zoom, tolerance, decimals) for g in geometry.get("geometries") or []]
+        parts = [p for p in parts if p is not None]
+        return {"type": kind, "geometries": parts} if parts else None
+    if kind == "Point":
+        simplified = [round(c, decimals) for c in coordinates] if decimals is not None else coordinates
+    elif kind == "MultiPoint":
+        simplified = _simplify_positions(coordinates, None, tolerance, decimals, 1)
+    elif kind == "LineString":
+        simplified = _simplify_positions(coordinates, zoom, tolerance, decimals, 2)
+    elif kind == "MultiLineString":
+        lines = [_simplify_positions(line, zoom, tolerance, decimals, 2) for line in coordinates]
+        simplified = [line for line in lines if line is not None]
+    elif kind == "Polygon":
+        simplified = _simplify_polygon(coordinates, zoom, tolerance, decimals)
+    elif kind == "MultiPolygon":
+        polygons = [_simplify_polygon(polygon, zoom, tolerance, decimals) for polygon in coordinates]
+        simplified = [polygon for polygon in polygons if polygon is not None]
+    else:
+        raise ValueError("Unsupported geometry type {!r}".format(kind))
+    if not simplified:
+        return None
+    return {"type": kind, "coordinates": simplified}
+
+
+def decimals_for_zoom(zoom):
+    """Coordinate decimals that keep rounding below a tenth of a pixel at ``zoom``."""
+    degrees_per_pixel = 360.0 / (512 * 2.0 ** zoom)
+    return max(0, math.ceil(-math.log10(degrees_per_pixel / 10)))
+
+
+def simplify_features(data, zoom, tolerance=1.0, decimals="auto"):
+    """Return ``data`` as a FeatureCollection simplified for ``zoom``.
+
+    Features whose geometry collapses are dropped.
+
+    :param data: A GeoJSON FeatureCollection / Feature / list of features,
+        or anything with ``__geo_interface__`` such as a GeoDataFrame.
+    :param zoom: Zoom level to simplify for; ``None`` keeps all vertices.
+    :param tolerance: Maximum deviation in screen pixels.
+    :param decimals: Decimals to round coordinates to.  ``"auto"`` picks
+        them from the zoom level, ``None`` keeps full precision.
+    """
+    if decimals == "auto":
+        decimals = decimals_for_zoom(zoom) if zoom is not None else None
+    features = []
+    for feature in _geo.to_feature_list(data):
+        geometry = simplify_geometry(feature.get("geometry"), zoom, tolerance, decimals)
+        if geometry is not None:
+            features.append(dict(feature, geometry=geometry))
+    return {"type": "FeatureCollection", "features": features}
+
+
+def zoom_variants(data, zooms, max_zoom=None, tolerance=1.0, decimals="auto", **source_options):
+    """Build a geojson source with one simplified variant per zoom range.
+
+    The variant for ``zooms[i]`` is shown from that zoom up to
+    ``zooms[i + 1]`` and is simplified for the upper end of its range, so it
+    never deviates by more than ``tolerance`` pixels.  The last variant is
+    simplified for ``max_zoom``, or keeps full resolution without it.
+    Below the first breakpoint the first variant is shown.
+
+    :param data: Anything :func:`simplify_features` accepts.
+    :param zooms: Zoom breakpoints, e.g. ``[0, 6, 10]``.
+    :param max_zoom: Highest zoom the source is shown at.
+    :param tolerance: Maximum deviation in screen pixels.
+    :param decimals: Passed on to :func:`simplify_features`.
+    :param source_options: Extra geojson source options (``promoteId``, ...).
+    :return: A source dict with the variants under ``zoom_data``.
+    """
+    zooms = sorted(zooms)
+    if not zooms:
+        raise ValueError("zoom_variants needs at least one zoom breakpoint")
+    features = _geo.to_feature_list(data)
+    upper = zooms[1:] + [max_zoom]
+    source = {"type": "geojson", "zoom_data": {}}
+    for zoom, simplify_for in zip(zooms, upper):
+        source["zoom_data"]["{:g}".format(zoom)] = simplify_features(
+            features, simplify_for, tolerance=tolerance, decimals=decimals
+        )
+    source.update(source_options)
+    return source
@@ -0,0 +1,160 @@
+"""Progressively loaded geojson sources.
+
+A large FeatureCollection only renders once the whole payload has arrived
+and been parsed.  A ``"geojson-stream"`` source instead points at a route of
+the Dash app serving newline-delimited GeoJSON features (NDJSON); the
+component adds the features to the map in batches as they arrive::
+
+    from dash_maplibre import register_stream, points_stream
+
+    source = register_stream(app, "events", lambda: points_stream(df["lon"], df["lat"], properties=df),
+                             promoteId="event_id")
+    DashMaplibre(sources={"events": source}, ...)
+
+Features with ids (a feature ``id`` or ``promoteId``) are added batch by
+batch; without ids the map is updated with all features so far at most once
+a second, which is slower for very large streams.
+
+``data`` is either GeoJSON (anything :func:`register_dataset
+<dash_maplibre.register_dataset>` accepts) or a function returning an
+iterable of features, called for every request, so generators reading from
+a database or file work too.
+"""
+import json
+
+from . import _geo, _server
+from .encoding import _np, _point_feature_texts
+
+_REGISTRY = "streams"
+DEFAULT_BATCH_SIZE = 10000
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def iter_ndjson(items, chunk_size=1000):
+    """Yield NDJSON text for ``items``, ``chunk_size`` features at a time.
+
+    Feature dicts are serialised one per line; ``str`` items are taken to be
+    NDJSON text already (as yielded by :func:`points_stream`) and passed on.
+    """
+    lines = []
+    for item in items:
+        if isinstance(item, str):
+            if lines:
+                yield "\n".join(lines) + "\n"
+                lines = []
+            yield item
+            continue
+        lines.append(json.dumps(item, separators=(",", ":")))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def points_stream(lng, lat, properties=None, ids=None, columns=None, chunk_size=10000, precision=6,
+                  property_precision=None):
+    """Yield point features as NDJSON text, encoded ``chunk_size`` rows at a time.
+
+    Parameters mirror :func:`dash_maplibre.encode_points`; every chunk is
+    encoded with NumPy before it is sent.
+    """
+    np = _np()
+    lng = np.asarray(lng, dtype="float64")
+    lat = np.asarray(lat, dtype="float64")
+    if properties is not None and not hasattr(properties, "columns"):
+        names = list(properties) if columns is None else columns
+        properties = {name: np.asarray(properties[name]) for name in names}
+    if ids is not None:
+        ids = np.asarray(ids)
+    for start in range(0, len(lng), chunk_size):
+        stop = start + chunk_size
+        if properties is None:
+            chunk = None
+        elif hasattr(properties, "columns"):
+            chunk = properties.iloc[start:stop]
+        else:
+            chunk = {name: values[start:stop] for name, values in properties.items()}
+        texts = _point_feature_texts(
+            lng[start:stop],
+            lat[start:stop],
+            chunk,
+            ids[start:stop] if ids is not None else None,
+            columns,
+            precision,
+            property_precision,
+        )
+        yield "\n".join(texts) + "\n"
+
+
+class FeatureStream:
+    """Features served as NDJSON.
+
+    Parameters mirror :func:`register_stream`.
+    """
+
+    def __init__(self, data, batch_size=DEFAULT_BATCH_SIZE, source_options=None):
+        if callable(data):
+            self._items = data
+        else:
+            features = _geo.to_feature_list(data)
+            self._items = lambda: features
+        self.batch_size = batch_size
+        self.source_options = dict(source_options or {})
+
+    def iter_text(self):
+        """NDJSON text chunks of all features."""
+        return iter_ndjson(self._items())
+
+
+def _serve_stream(name):
+    import flask
+
+    stream = flask.current_app.extensions.get("dash_maplibre", {}).get(_REGISTRY, {}).get(name)
+    if stream is None:
+        flask.abort(404)
+    body = (chunk.encode("utf-8") for chunk in stream.iter_text())
+    response = flask.Response(flask.stream_with_context(body), mimetype=NDJSON_MIMETYPE)
+    response.headers["Cache-Control"] = "no-cache"
+    # Keep reverse proxies such as nginx from buffering the whole stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def register_stream(app, name, data, batch_size=DEFAULT_BATCH_SIZE, **source_options):
+    """Register features to be streamed to the map and return their source.
+
+    :param app: The ``dash.Dash`` app whose Flask server serves the stream.
+    :param name: Name of the stream, used in its URL.  Registering the same
+        name again replaces the data.
+    :param data: GeoJSON, anything with ``__geo_interface__``, or a function
+        returning an iterable of feature dicts / NDJSON text (see
+        :func:`iter_ndjson`).
+    :param batch_size: Number of features the component adds to the map at a
+        time.
+    :param source_options: Extra geojson source options (``promoteId``,
+        ``cluster``, ...) included in the returned source.
+    :return: The ``sources`` entry, see :func:`stream_source`.
+    """
+    _server.get_registry(app, _REGISTRY)[name] = FeatureStream(data, batch_size, source_options)
+    _server.add_route(app, "streams/<name>.ndjson", "dash_maplibre_stream", _serve_stream)
+    return stream_source(app, name)
+
+
+def stream_source(app, name, **source_options):
+    """Return the ``sources`` entry for a stream registered on ``app``.
+
+    Extra keyword arguments are merged over the options given at
+    registration.
+    """
+    stream = _server.get_registry(app, _REGISTRY).get(name)
+    if stream is None:
+        raise KeyError("No stream named {!r} is registered on this app".format(name))
+    source = {
+        "type": "geojson-stream",
+        "url": _server.relative_url(app, "streams/{}.ndjson".format(name)),
+        "batch_size": stream.batch_size,
+    }
+    source.update(stream.source_options)
+    source.update(source_options)
+    return source
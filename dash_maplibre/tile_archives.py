@@ -0,0 +1,359 @@
+"""Serve pre-built PMTiles and MBTiles files from the Dash app.
+
+Tilesets built offline (with tippecanoe, planetiler, gdal, ...) can be
+served by the app itself instead of a separate tile server::
+
+    from dash_maplibre import register_tile_archive
+
+    source = register_tile_archive(app, "parcels", "data/parcels.pmtiles")
+    # sources={"parcels": source}, vector layers use the archive's layer names as "source-layer"
+
+Files are opened lazily in every worker process and read through memory
+maps (``mmap`` for PMTiles, SQLite's ``mmap_size`` for MBTiles), so tile
+bytes come straight from the OS page cache shared by all gunicorn workers,
+and a tile request is a directory lookup plus a byte slice.  Tiles are sent
+as stored, with ``Content-Encoding`` set for compressed vector tiles, an
+ETag and ``Cache-Control: public, max-age=...``.
+"""
+import bisect
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+
+from . import _server
+from ._optional import import_optional
+
+_REGISTRY = "tile_archives"
+DEFAULT_MAX_AGE = 86400
+DEFAULT_DIRECTORY_CACHE_SIZE = 256
+
+PMTILES_MAGIC = b"PMTiles"
+_PMTILES_HEADER = struct.Struct("<7sBQQQQQQQQQQQBBBBBBiiiiBii")
+# PMTiles compression codes and the matching Content-Encoding
+_COMPRESSION_ENCODINGS = {1: None, 2: "gzip", 3: "br", 4: "zstd"}
+# PMTiles tile types: (format, MIME type)
+_TILE_TYPES = {
+    1: ("pbf", "application/vnd.mapbox-vector-tile"),
+    2: ("png", "image/png"),
+    3: ("jpg", "image/jpeg"),
+    4: ("webp", "image/webp"),
+    5: ("avif", "image/avif"),
+}
+_FORMAT_MIMETYPES = {fmt: mimetype for fmt, mimetype in _TILE_TYPES.values()}
+_FORMAT_MIMETYPES["jpeg"] = "image/jpeg"
+_FORMAT_MIMETYPES["mvt"] = "application/vnd.mapbox-vector-tile"
+_VECTOR_FORMATS = ("pbf", "mvt")
+
+
+def zxy_to_tile_id(z, x, y):
+    """PMTiles tile id: tiles of lower zooms first, then Hilbert order."""
+    n = 1 << z
+    if not (0 <= x < n and 0 <= y < n):
+        raise ValueError("Tile {}/{}/{} is out of range".format(z, x, y))
+    tile_id = ((1 << (2 * z)) - 1) // 3
+    s = n >> 1
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        tile_id += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = n - 1 - x
+                y = n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return tile_id
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _decompress(data, compression):
+    if compression in (0, 1):
+        return bytes(data)
+    if compression == 2:
+        return gzip.decompress(data)
+    if compression == 3:
+        return import_optional("brotli", "Brotli compressed PMTiles").decompress(data)
+    if compression == 4:
+        return import_optional("zstandard", "Zstandard compressed PMTiles").ZstdDecompressor().decompress(data)
+    raise ValueError("Unknown PMTiles compression {}".format(compression))
+
+
+def _parse_directory(data):
+    """Decode a PMTiles directory into sorted ``(tile_ids, entries)``.
+
+    Entries are ``(offset, length, run_length)``; a run length of 0 marks a
+    leaf directory.
+    """
+    count, pos = _read_varint(data, 0)
+    tile_ids = []
+    last_id = 0
+    for _ in range(count):
+        delta, pos = _read_varint(data, pos)
+        last_id += delta
+        tile_ids.append(last_id)
+    run_lengths = []
+    for _ in range(count):
+        value, pos = _read_varint(data, pos)
+        run_lengths.append(value)
+    lengths = []
+    for _ in range(count):
+        value, pos = _read_varint(data, pos)
+        lengths.append(value)
+    entries = []
+    for i in range(count):
+        value, pos = _read_varint(data, pos)
+        if value == 0 and i > 0:
+            # Directly follows the previous entry
+            offset = entries[i - 1][0] + entries[i - 1][1]
+        else:
+            offset = value - 1
+        entries.append((offset, lengths[i], run_lengths[i]))
+    return tile_ids, entries
+
+
+class TileArchive:
+    """Base class of the tile file readers.
+
+    Subclasses set ``format``, ``minzoom``, ``maxzoom``, ``bounds`` and
+    ``metadata`` and implement :meth:`_read_tile`.
+    """
+
+    mimetype = "application/octet-stream"
+    encoding = None
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self.etag_base = hashlib.sha1("{}:{}:{}".format(self.path, stat.st_size, stat.st_mtime).encode()).hexdigest()
+        self.last_modified = stat.st_mtime
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_open(self):
+        # Memory maps and SQLite connections must not cross a fork, so every
+        # worker process opens the file on first use.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._open()
+                    self._pid = os.getpid()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _read_tile(self, z, x, y):
+        raise NotImplementedError
+
+    def get_tile(self, z, x, y):
+        """Return the stored bytes of tile ``z/x/y``, or ``None`` if absent."""
+        if z < 0 or not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+            return None
+        self._ensure_open()
+        return self._read_tile(z, x, y)
+
+    @property
+    def is_vector(self):
+        return self.format in _VECTOR_FORMATS
+
+    def tile_encoding(self, tile):
+        """Content-Encoding of a stored tile."""
+        return self.encoding
+
+
+class PMTilesArchive(TileArchive):
+    """A PMTiles (v3) file read through ``mmap``."""
+
+    def __init__(self, path, directory_cache_size=DEFAULT_DIRECTORY_CACHE_SIZE):
+        super().__init__(path)
+        self.directory_cache_size = directory_cache_size
+        with open(self.path, "rb") as f:
+            header = f.read(_PMTILES_HEADER.size)
+        if len(header) < _PMTILES_HEADER.size or header[:7] != PMTILES_MAGIC:
+            raise ValueError("{} is not a PMTiles file".format(path))
+        fields = _PMTILES_HEADER.unpack(header)
+        if fields[1] != 3:
+            raise ValueError("Only PMTiles version 3 is supported, {} is version {}".format(path, fields[1]))
+        (
+            self._root_offset, self._root_length, self._metadata_offset, self._metadata_length,
+            self._leaf_offset, _, self._data_offset,
+        ) = fields[2:9]
+        self._internal_compression = fields[14]
+        self.encoding = _COMPRESSION_ENCODINGS.get(fields[15])
+        self.format, self.mimetype = _TILE_TYPES.get(fields[16], ("", "application/octet-stream"))
+        self.minzoom, self.maxzoom = fields[17], fields[18]
+        self.bounds = [value / 1e7 for value in fields[19:23]]
+        self._map = None
+        self._root = None
+        self._leaves = None
+        self.metadata = None
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._root = self._directory(self._root_offset, self._root_length)
+        self._leaves = _server.LRUCache(self.directory_cache_size)
+        raw = self._map[self._metadata_offset:self._metadata_offset + self._metadata_length]
+        self.metadata = json.loads(_decompress(raw, self._internal_compression) or b"{}")
+
+    def _directory(self, offset, length):
+        return _parse_directory(_decompress(self._map[offset:offset + length], self._internal_compression))
+
+    def _read_tile(self, z, x, y):
+        tile_id = zxy_to_tile_id(z, x, y)
+        tile_ids, entries = self._root
+        # Root, leaf and at most two more leaf levels
+        for _ in range(4):
+            i = bisect.bisect_right(tile_ids, tile_id) - 1
+            if i < 0:
+                return None
+            offset, length, run_length = entries[i]
+            if run_length > 0:
+                if tile_id >= tile_ids[i] + run_length:
+                    return None
+                start = self._data_offset + offset
+                return self._map[start:start + length]
+            key = (offset, length)
+            leaf = self._leaves.get(key)
+            if leaf is None:
+                leaf = self._directory(self._leaf_offset + offset, length)
+                self._leaves.set(key, leaf)
+            tile_ids, entries = leaf
+        return None
+
+
+class MBTilesArchive(TileArchive):
+    """An MBTiles (SQLite) file read with SQLite's memory-mapped I/O."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._local = threading.local()
+        connection = self._connect()
+        try:
+            self.metadata = dict(connection.execute("SELECT name, value FROM metadata").fetchall())
+            zooms = connection.execute("SELECT MIN(zoom_level), MAX(zoom_level) FROM tiles").fetchone()
+        finally:
+            connection.close()
+        self.format = self.metadata.get("format", "pbf")
+        self.mimetype = _FORMAT_MIMETYPES.get(self.format, "application/octet-stream")
+        self.minzoom = int(self.metadata.get("minzoom", zooms[0] or 0))
+        self.maxzoom = int(self.metadata.get("maxzoom", zooms[1] or 0))
+        bounds = self.metadata.get("bounds")
+        self.bounds = [float(v) for v in bounds.split(",")] if bounds else None
+
+    def _connect(self):
+        uri = "file:{}?mode=ro&immutable=1".format(self.path)
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        connection.execute("PRAGMA mmap_size={}".format(os.path.getsize(self.path)))
+        return connection
+
+    def _open(self):
+        # Connections are opened per thread, see _read_tile
+        self._local = threading.local()
+
+    def _read_tile(self, z, x, y):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        # MBTiles rows count from the south (TMS)
+        row = connection.execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+            (z, x, (1 << z) - 1 - y),
+        ).fetchone()
+        return row[0] if row else None
+
+    def tile_encoding(self, tile):
+        # Vector tiles in MBTiles are usually, but not always, gzipped
+        return "gzip" if tile[:2] == b"\x1f\x8b" else None
+
+
+def open_tile_archive(path, **kwargs):
+    """Open a PMTiles or MBTiles file, chosen by its first bytes."""
+    with open(path, "rb") as f:
+        magic = f.read(16)
+    if magic.startswith(PMTILES_MAGIC):
+        return PMTilesArchive(path, **kwargs)
+    if magic.startswith(b"SQLite format 3"):
+        return MBTilesArchive(path)
+    raise ValueError("{} is neither a PMTiles nor an MBTiles file".format(path))
+
+
+def _serve_tile(name, z, x, y, ext):
+    import flask
+
+    entry = flask.current_app.extensions.get("dash_maplibre", {}).get(_REGISTRY, {}).get(name)
+    if entry is None:
+        flask.abort(404)
+    archive, max_age = entry
+    tile = archive.get_tile(z, x, y)
+    if not tile:
+        return flask.Response(status=204)
+    response = flask.Response(bytes(tile), mimetype=archive.mimetype)
+    encoding = archive.tile_encoding(tile)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.set_etag("{}-{}-{}-{}".format(archive.etag_base[:16], z, x, y))
+    response.last_modified = archive.last_modified
+    response.headers["Cache-Control"] = "public, max-age={}".format(max_age)
+    return response.make_conditional(flask.request)
+
+
+def register_tile_archive(app, name, path, max_age=DEFAULT_MAX_AGE, **source_options):
+    """Serve the tiles of a PMTiles or MBTiles file and return its source.
+
+    :param app: The ``dash.Dash`` app whose Flask server serves the tiles.
+    :param name: Name of the tileset, used in the tile URL.
+    :param path: Path of the ``.pmtiles`` or ``.mbtiles`` file.
+    :param max_age: ``Cache-Control`` max-age of tile responses in seconds.
+    :param source_options: Extra source options merged into the returned
+        source (``promoteId``, ``attribution``, ...).
+    :return: The ``sources`` entry, see :func:`tile_archive_source`.
+    """
+    archive = open_tile_archive(path)
+    _server.get_registry(app, _REGISTRY)[name] = (archive, max_age)
+    _server.add_route(
+        app,
+        "archives/<name>/<int:z>/<int:x>/<int:y>.<ext>",
+        "dash_maplibre_tile_archive",
+        _serve_tile,
+    )
+    return tile_archive_source(app, name, **source_options)
+
+
+def tile_archive_source(app, name, **source_options):
+    """Return the ``sources`` entry for a tile archive registered on ``app``.
+
+    Vector archives give a ``"vector"`` source, image archives a
+    ``"raster"`` source.
+    """
+    entry = _server.get_registry(app, _REGISTRY).get(name)
+    if entry is None:
+        raise KeyError("No tile archive named {!r} is registered on this app".format(name))
+    archive = entry[0]
+    source = {
+        "type": "vector" if archive.is_vector else "raster",
+        "tiles": [_server.relative_url(app, "archives/{}/{{z}}/{{x}}/{{y}}.{}".format(name, archive.format or "bin"))],
+        "minzoom": archive.minzoom,
+        "maxzoom": archive.maxzoom,
+    }
+    if not archive.is_vector:
+        source["tileSize"] = 256
+    if archive.bounds:
+        source["bounds"] = archive.bounds
+    source.update(source_options)
+    return source
@@ -0,0 +1,415 @@
+"""Serve large GeoJSON datasets as Mapbox Vector Tiles from the Dash server.
+
+Instead of inlining a whole FeatureCollection into ``DashMaplibre.sources``
+(which ships it through the layout JSON and makes MapLibre re-tile it in
+the browser), register the data once and point a ``vector`` source at the
+tile route::
+
+    from dash_maplibre import DashMaplibre, register_vector_tiles
+
+    parcels = register_vector_tiles(app, "parcels", gdf, id_property="parcel_id")
+    DashMaplibre(
+        sources={"parcels": parcels},
+        layers=[{"id": "parcels-fill", "type": "fill", "source": "parcels",
+                 "source-layer": "parcels", "paint": {"fill-color": "#088"}}],
+    )
+
+Tiles are cut on demand: candidate features come from a grid index, are
+simplified once per zoom level, clipped to the tile (plus a buffer) and
+encoded.  Encoded tiles and simplified geometries are kept in LRU caches.
+"""
+import hashlib
+import json
+
+from . import _geo, _mvt, _server
+
+DEFAULT_TILE_CACHE_SIZE = 1024
+# Simplified geometries, counted per feature and zoom level
+SIMPLIFIED_CACHE_SIZE = 65536
+TILE_MIMETYPE = "application/vnd.mapbox-vector-tile"
+TILE_MAX_AGE = 31536000
+_REGISTRY = "vector_tiles"
+
+
+def _clip_line(points, min_c, max_c):
+    """Clip a polyline to a square, returning the list of inside pieces."""
+    pieces = []
+    current = []
+    for i in range(len(points) - 1):
+        (x0, y0), (x1, y1) = points[i], points[i + 1]
+        # Liang-Barsky parametric clipping of one segment.
+        t0, t1 = 0.0, 1.0
+        dx, dy = x1 - x0, y1 - y0
+        inside = True
+        for p, q in ((-dx, x0 - min_c), (dx, max_c - x0), (-dy, y0 - min_c), (dy, max_c - y0)):
+            if p == 0:
+                if q < 0:
+                    inside = False
+                    break
+                continue
+            r = q / p
+            if p < 0:
+                t0 = max(t0, r)
+            else:
+                t1 = min(t1, r)
+            if t0 > t1:
+                inside = False
+                break
+        if not inside:
+            if current:
+                pieces.append(current)
+                current = []
+            continue
+        start = (x0 + t0 * dx, y0 + t0 * dy)
+        end = (x0 + t1 * dx, y0 + t1 * dy)
+        if not current:
+            current = [start]
+        current.append(end)
+        if t1 < 1.0:
+            pieces.append(current)
+            current = []
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _clip_ring(ring, min_c, max_c):
+    """Sutherland-Hodgman clipping of a closed ring to a square."""
+    edges = (
+        (lambda p: p[0] >= min_c, lambda a, b: _intersect_x(a, b, min_c)),
+        (lambda p: p[0] <= max_c, lambda a, b: _intersect_x(a, b, max_c)),
+        (lambda p: p[1] >= min_c, lambda a, b: _intersect_y(a, b, min_c)),
+        (lambda p: p[1] <= max_c, lambda a, b: _intersect_y(a, b, max_c)),
+    )
+    output = ring[:-1] if ring and ring[0] == ring[-1] else list(ring)
+    for is_inside, intersect in edges:
+        if not output:
+            break
+        current = output
+        output = []
+        prev = current[-1]
+        for point in current:
+            if is_inside(point):
+                if not is_inside(prev):
+                    output.append(intersect(prev, point))
+                output.append(point)
+            elif is_inside(prev):
+                output.append(intersect(prev, point))
+            prev = point
+    return output
+
+
+def _intersect_x(a, b, x):
+    t = (x - a[0]) / (b[0] - a[0])
+    return x, a[1] + t * (b[1] - a[1])
+
+
+def _intersect_y(a, b, y):
+    t = (y - a[1]) / (b[1] - a[1])
+    return a[0] + t * (b[0] - a[0]), y
+
+
+def _quantize(points):
+    """Round to integer tile coordinates and drop consecutive duplicates."""
+    out = []
+    for x, y in points:
+        p = (int(round(x)), int(round(y)))
+        if not out or out[-1] != p:
+            out.append(p)
+    return out
+
+
+def _project_geometry(geometry):
+    """Project a GeoJSON geometry to ``(mvt_type, parts)`` in world coordinates.
+
+    Points become a flat list of positions, lines a list of lines and
+    polygons a list of polygons (each a list of rings).  Unsupported or
+    empty geometries return None.
+    """
+    if not geometry:
+        return None
+    geom_type = geometry.get("type")
+    coords = geometry.get("coordinates")
+
+    def line(positions):
+        return [_geo.lnglat_to_world(p[0], p[1]) for p in positions]
+
+    if geom_type == "Point":
+        return _mvt.POINT, [_geo.lnglat_to_world(coords[0], coords[1])]
+    if geom_type == "MultiPoint":
+        return _mvt.POINT, line(coords)
+    if geom_type == "LineString":
+        return _mvt.LINESTRING, [line(coords)]
+    if geom_type == "MultiLineString":
+        return _mvt.LINESTRING, [line(part) for part in coords]
+    if geom_type == "Polygon":
+        return _mvt.POLYGON, [[line(ring) for ring in coords]]
+    if geom_type == "MultiPolygon":
+        return _mvt.POLYGON, [[line(ring) for ring in polygon] for polygon in coords]
+    return None
+
+
+def _world_bbox(parts, geom_type):
+    if geom_type == _mvt.POINT:
+        points = parts
+    elif geom_type == _mvt.LINESTRING:
+        points = [p for part in parts for p in part]
+    else:
+        points = [p for polygon in parts for ring in polygon for p in ring]
+    if not points:
+        return None
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class VectorTileSet:
+    """An in-memory dataset that can be cut into vector tiles.
+
+    Parameters mirror :func:`register_vector_tiles`.
+    """
+
+    def __init__(
+        self,
+        data,
+        layer_name,
+        id_property=None,
+        properties=None,
+        min_zoom=0,
+        max_zoom=14,
+        extent=4096,
+        buffer=64,
+        tolerance=3,
+        cache_size=DEFAULT_TILE_CACHE_SIZE,
+    ):
+        self.layer_name = layer_name
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.extent = extent
+        self.buffer = buffer
+        self.tolerance = tolerance
+        self.cache = _server.LRUCache(cache_size)
+
+        features = _geo.to_feature_list(data)
+        # Content hash of the data and tiling options, part of the tile URL so
+        # re-registered data is never served from browser caches
+        options = [layer_name, id_property, properties, min_zoom, max_zoom, extent, buffer, tolerance]
+        self.version = hashlib.sha1(
+            json.dumps([options, features], separators=(",", ":"), default=str).encode("utf-8")
+        ).hexdigest()[:16]
+
+        self.geometries = []
+        self.properties = []
+        self.ids = []
+        for i, feature in enumerate(features):
+            projected = _project_geometry(feature.get("geometry"))
+            if projected is None:
+                continue
+            props = feature.get("properties") or {}
+            if properties is not None:
+                props = {k: props[k] for k in properties if k in props}
+            self.geometries.append(projected)
+            self.properties.append(props)
+            self.ids.append(self._feature_id(feature, i, id_property))
+        self.index = _geo.GridIndex(_world_bbox(parts, kind) for kind, parts in self.geometries)
+        self._simplified = _server.LRUCache(SIMPLIFIED_CACHE_SIZE)
+
+    @staticmethod
+    def _feature_id(feature, position, id_property):
+        candidate = feature.get("id")
+        if id_property is not None:
+            candidate = (feature.get("properties") or {}).get(id_property)
+        if isinstance(candidate, int) and not isinstance(candidate, bool) and candidate >= 0:
+            return candidate
+        # MVT ids must be unsigned integers; fall back to the row position.
+        return position
+
+    def _geometry_at_zoom(self, i, z):
+        """Geometry ``i`` simplified for zoom ``z``, memoised in a bounded cache."""
+        kind, parts = self.geometries[i]
+        if kind == _mvt.POINT or not self.tolerance:
+            return kind, parts
+        key = (i, z)
+        cached = self._simplified.get(key)
+        if cached is None:
+            tolerance = self.tolerance / (self.extent * 2 ** z)
+            if kind == _mvt.LINESTRING:
+                simplified = [_geo.simplify_dp(line, tolerance) for line in parts]
+            else:
+                simplified = [[_geo.simplify_dp(ring, tolerance) for ring in polygon] for polygon in parts]
+            cached = (kind, simplified)
+            self._simplified.set(key, cached)
+        return cached
+
+    def get_tile(self, z, x, y):
+        """Return the encoded tile ``z/x/y`` as bytes (empty if no features)."""
+        key = (z, x, y)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        tile = self._build_tile(z, x, y)
+        self.cache.set(key, tile)
+        return tile
+
+    def _build_tile(self, z, x, y):
+        if z < self.min_zoom or z > self.max_zoom:
+            return b""
+        n = 2 ** z
+        pad = self.buffer / self.extent
+        query = ((x - pad) / n, (y - pad) / n, (x + 1 + pad) / n, (y + 1 + pad) / n)
+        min_c, max_c = -self.buffer, self.extent + self.buffer
+
+        def to_tile(points):
+            return [((px * n - x) * self.extent, (py * n - y) * self.extent) for px, py in points]
+
+        layer = _mvt.LayerEncoder(self.layer_name, self.extent)
+        for i in self.index.query(query):
+            kind, parts = self._geometry_at_zoom(i, z)
+            if kind == _mvt.POINT:
+                encoded = [
+                    p
+                    for p in _quantize(to_tile(parts))
+                    if min_c <= p[0] <= max_c and min_c <= p[1] <= max_c
+                ]
+                if not encoded:
+                    continue
+            elif kind == _mvt.LINESTRING:
+                encoded = []
+                for line in parts:
+                    for piece in _clip_line(to_tile(line), min_c, max_c):
+                        piece = _quantize(piece)
+                        if len(piece) >= 2:
+                            encoded.append(piece)
+                if not encoded:
+                    continue
+            else:
+                encoded = []
+                for polygon in parts:
+                    rings = []
+                    for j, ring in enumerate(polygon):
+                        clipped = _quantize(_clip_ring(to_tile(ring), min_c, max_c))
+                        if len(clipped) < 3:
+                            if j == 0:
+                                break
+                            continue
+                        area = _mvt.ring_area(clipped)
+                        if area == 0:
+                            if j == 0:
+                                break
+                            continue
+                        # Exterior rings need a positive area, holes a negative one.
+                        if (area > 0) != (j == 0):
+                            clipped.reverse()
+                        rings.append(clipped)
+                    encoded.extend(rings)
+                if not encoded:
+                    continue
+            layer.add_feature(kind, encoded, self.properties[i], self.ids[i])
+        return _mvt.encode_tile([layer])
+
+    @property
+    def bounds(self):
+        """Data extent as ``[west, south, east, north]`` in degrees."""
+        min_x, min_y, max_x, max_y = self.index.extent
+        west, north = _geo.world_to_lnglat(min_x, min_y)
+        east, south = _geo.world_to_lnglat(max_x, max_y)
+        return [west, south, east, north]
+
+
+def _serve_tile(name, z, x, y):
+    import flask
+
+    tilesets = flask.current_app.extensions.get("dash_maplibre", {}).get(_REGISTRY, {})
+    tileset = tilesets.get(name)
+    if tileset is None:
+        flask.abort(404)
+    tile = tileset.get_tile(z, x, y)
+    if not tile:
+        return flask.Response(status=204)
+    response = flask.Response(tile, mimetype=TILE_MIMETYPE)
+    if flask.request.args.get("v") == tileset.version:
+        response.headers["Cache-Control"] = "public, max-age={}, immutable".format(TILE_MAX_AGE)
+    else:
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def register_vector_tiles(
+    app,
+    name,
+    data,
+    layer_name=None,
+    id_property=None,
+    properties=None,
+    min_zoom=0,
+    max_zoom=14,
+    extent=4096,
+    buffer=64,
+    tolerance=3,
+    cache_size=DEFAULT_TILE_CACHE_SIZE,
+):
+    """Register a dataset to be served as vector tiles and return its source.
+
+    :param app: The ``dash.Dash`` app whose Flask server should serve the tiles.
+    :param name: Name of the tileset, used in the tile URL.  Registering the
+        same name again replaces the data (and drops cached tiles); the URL
+        carries a hash of the data, so browsers fetch the new tiles.
+    :param data: A GeoJSON FeatureCollection / Feature / list of features, or
+        anything with ``__geo_interface__`` such as a GeoDataFrame.
+    :param layer_name: Name of the layer inside the tiles, i.e. the
+        ``source-layer`` of map layers.  Defaults to ``name``.
+    :param id_property: Property holding an unsigned integer feature id.  If
+        omitted, the feature ``id`` (or its position) is used.  Use
+        ``promoteId`` on the source for non-integer ids.
+    :param properties: Optional list of property names to keep.
+    :param min_zoom: Lowest zoom level tiles are produced for.
+    :param max_zoom: Highest zoom level; MapLibre overzooms beyond it.
+    :param extent: Tile extent in tile units.
+    :param buffer: Buffer around each tile in tile units, avoids seams.
+    :param tolerance: Simplification tolerance in tile units (0 disables).
+    :param cache_size: Number of encoded tiles to keep in memory.
+    :return: A ``{"type": "vector", ...}`` dict usable in ``DashMaplibre.sources``.
+    """
+    tileset = VectorTileSet(
+        data,
+        layer_name or name,
+        id_property=id_property,
+        properties=properties,
+        min_zoom=min_zoom,
+        max_zoom=max_zoom,
+        extent=extent,
+        buffer=buffer,
+        tolerance=tolerance,
+        cache_size=cache_size,
+    )
+    _server.get_registry(app, _REGISTRY)[name] = tileset
+    _server.add_route(
+        app,
+        "tiles/<name>/<int:z>/<int:x>/<int:y>.pbf",
+        "dash_maplibre_vector_tiles",
+        _serve_tile,
+    )
+    return vector_tile_source(app, name)
+
+
+def vector_tile_source(app, name, **source_options):
+    """Return the ``sources`` entry for a tileset registered on ``app``.
+
+    Extra keyword arguments (e.g. ``promoteId``, ``attribution``) are
+    merged into the source definition.
+    """
+    tileset = _server.get_registry(app, _REGISTRY).get(name)
+    if tileset is None:
+        raise KeyError("No vector tileset named {!r} is registered on this app".format(name))
+    source = {
+        "type": "vector",
+        "tiles": [
+            "{}?v={}".format(_server.relative_url(app, "tiles/{}/{{z}}/{{x}}/{{y}}.pbf".format(name)), tileset.version)
+        ],
+        "minzoom": tileset.min_zoom,
+        "maxzoom": tileset.max_zoom,
+    }
+    if tileset.geometries:
+        source["bounds"] = [round(v, 6) for v in tileset.bounds]
+    source.update(source_options)
+    return source
@@ -0,0 +1,185 @@
+"""Return only the features of a dataset that are inside the map viewport.
+
+The component reports ``bounds`` and ``current_zoom`` once the camera
+settles, so callbacks can ship just what is on screen::
+
+    from dash_maplibre import register_dataset, visible_features
+
+    register_dataset(app, "buildings", buildings_gdf, min_zoom=12)
+
+    @app.callback(Output("map", "sources"), Input("map", "bounds"), Input("map", "current_zoom"))
+    def update(bounds, zoom):
+        data = visible_features(app, "buildings", bounds, zoom, max_features=20000)
+        return {"buildings": {"type": "geojson", "data": data}}
+
+Features are looked up in a grid index over their bounding boxes, so a
+query costs in proportion to the features near the viewport.
+
+Box and lasso selections (``selectedData``) are resolved the same way, for
+layers whose data is not loaded in the browser::
+
+    @app.callback(Output("table", "data"), Input("map", "selectedData"))
+    def show(selection):
+        return [f["properties"] for f in select_features(app, "buildings", selection)["features"]]
+
+With shapely 2 installed, selections are answered by an STRtree built on
+first use; otherwise candidates from the grid index are tested in pure
+Python.
+"""
+from . import _geo, _server
+
+_REGISTRY = "datasets"
+
+
+def _normalize_bounds(bounds):
+    """Split ``[[west, south], [east, north]]`` into boxes within -180..180.
+
+    MapLibre reports longitudes beyond +-180 when the view crosses the
+    antimeridian.
+    """
+    (west, south), (east, north) = bounds
+    width = east - west
+    if width >= 360:
+        return [(-180.0, south, 180.0, north)]
+    west = (west + 180.0) % 360.0 - 180.0
+    east = west + width
+    if east <= 180.0:
+        return [(west, south, east, north)]
+    return [(west, south, 180.0, north), (-180.0, south, east - 360.0, north)]
+
+
+def _pad_bounds(bounds, pad):
+    (west, south), (east, north) = bounds
+    dx = (east - west) * pad
+    dy = (north - south) * pad
+    return [[west - dx, max(-90.0, south - dy)], [east + dx, min(90.0, north + dy)]]
+
+
+class FeatureDataset:
+    """Features with a spatial index for viewport queries.
+
+    Parameters mirror :func:`register_dataset`.
+    """
+
+    def __init__(self, data, min_zoom=0, properties=None):
+        self.min_zoom = min_zoom
+        self.features = []
+        for feature in _geo.to_feature_list(data):
+            if properties is not None:
+                props = feature.get("properties") or {}
+                feature = dict(feature, properties={k: props[k] for k in properties if k in props})
+            self.features.append(feature)
+        self.index = _geo.GridIndex(_geo.geometry_bbox(f.get("geometry") or {}) for f in self.features)
+        self._tree = None
+
+    def query(self, bounds, zoom=None, max_features=None, pad=0.0):
+        """Return the features intersecting ``bounds`` as a FeatureCollection.
+
+        :param bounds: ``[[west, south], [east, north]]`` as reported by the
+            component's ``bounds`` prop.  ``None`` returns no features.
+        :param zoom: Current zoom; below ``min_zoom`` no features are returned.
+        :param max_features: Optional cap on the number of features.
+        :param pad: Extend the bounds by this fraction on every side, so small
+            pans do not need a new query.
+        """
+        if bounds is None or (zoom is not None and zoom < self.min_zoom):
+            return {"type": "FeatureCollection", "features": []}
+        if pad:
+            bounds = _pad_bounds(bounds, pad)
+        found = set()
+        for box in _normalize_bounds(bounds):
+            found.update(self.index.query(box))
+        indices = sorted(found)
+        if max_features is not None:
+            indices = indices[:max_features]
+        return {"type": "FeatureCollection", "features": [self.features[i] for i in indices]}
+
+    def _strtree(self):
+        """A shapely STRtree over the features, or ``None`` without shapely 2."""
+        if self._tree is None:
+            try:
+                import shapely
+                from shapely.geometry import shape
+            except ImportError:
+                shapely = None
+            if shapely is None or not hasattr(shapely, "STRtree"):
+                self._tree = False
+            else:
+                self._tree = shapely.STRtree([shape(f["geometry"]) if f.get("geometry") else None
+                                              for f in self.features])
+        return self._tree or None
+
+    def select(self, geometry, max_features=None):
+        """Return the features intersecting a selection polygon as a FeatureCollection.
+
+        :param geometry: A GeoJSON Polygon or MultiPolygon, or the
+            ``selectedData`` value of the component.  ``None`` returns no
+            features.
+        :param max_features: Optional cap on the number of features.
+        """
+        if geometry and "geometry" in geometry:
+            geometry = geometry["geometry"]
+        if not geometry:
+            return {"type": "FeatureCollection", "features": []}
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            raise ValueError("Selections must be Polygons or MultiPolygons, not {!r}".format(geometry.get("type")))
+        tree = self._strtree()
+        if tree is not None:
+            from shapely.geometry import shape
+
+            indices = sorted(set(tree.query(shape(geometry), predicate="intersects").tolist()))
+        else:
+            found = set()
+            for rings in polygons:
+                for i in self.index.query(_geo.geometry_bbox({"type": "Polygon", "coordinates": rings})):
+                    if i not in found and _geo.intersects_polygon(self.features[i].get("geometry") or {}, rings):
+                        found.add(i)
+            indices = sorted(found)
+        if max_features is not None:
+            indices = indices[:max_features]
+        return {"type": "FeatureCollection", "features": [self.features[i] for i in indices]}
+
+
+def register_dataset(app, name, data, min_zoom=0, properties=None):
+    """Register a dataset for :func:`visible_features` queries.
+
+    The dataset also answers :func:`select_features`.
+
+    :param app: The ``dash.Dash`` app the dataset belongs to.
+    :param name: Name of the dataset.  Registering the same name again
+        replaces the data.
+    :param data: A GeoJSON FeatureCollection / Feature / list of features, or
+        anything with ``__geo_interface__`` such as a GeoDataFrame.
+    :param min_zoom: Below this zoom queries return no features.
+    :param properties: Optional list of property names to keep.
+    :return: The :class:`FeatureDataset`.
+    """
+    dataset = FeatureDataset(data, min_zoom=min_zoom, properties=properties)
+    _server.get_registry(app, _REGISTRY)[name] = dataset
+    return dataset
+
+
+def visible_features(app, name, bounds, zoom=None, max_features=None, pad=0.0):
+    """Return the features of a registered dataset inside ``bounds``.
+
+    See :meth:`FeatureDataset.query` for the parameters.
+    """
+    dataset = _server.get_registry(app, _REGISTRY).get(name)
+    if dataset is None:
+        raise KeyError("No dataset named {!r} is registered on this app".format(name))
+    return dataset.query(bounds, zoom=zoom, max_features=max_features, pad=pad)
+
+
+def select_features(app, name, geometry, max_features=None):
+    """Return the features of a registered dataset intersecting a selection.
+
+    See :meth:`FeatureDataset.select` for the parameters.
+    """
+    dataset = _server.get_registry(app, _REGISTRY).get(name)
+    if dataset is None:
+        raise KeyError("No dataset named {!r} is registered on this app".format(name))
+    return dataset.select(geometry, max_features=max_features)
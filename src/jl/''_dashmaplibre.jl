@@ -9,6 +9,8 @@ A DashMaplibre component.
 DashMaplibre is a React component for displaying interactive maps using MapLibre GL JS.
 It supports custom basemaps, layers, sources, and interactive features like hover popups and click events.
 It is designed to be used within a Dash application, allowing for dynamic updates and interactivity.
+The implementation is loaded as an async chunk when the first map renders,
+so pages without a map do not load MapLibre.
 
 Dependencies:
 - maplibre-gl: For rendering maps and handling layers/sources.
@@ -16,10 +18,35 @@ Dependencies:
 - Mantine for styling and layout.
 Keyword arguments:
 - `id` (String; optional): The unique ID of this component.
+- `animation` (optional): A time series played by the component itself, as built by
+`dash_maplibre.frame_animation`:
+`{source, source_layer, state_key, ids, values, frames, loop}`, where
+`values` holds `frames` x `ids.length` numbers, frame by frame (a
+packed array or a plain list). The current frame is written into the
+`state_key` feature state of the features, so paint expressions can
+use `["feature-state", state_key]`; NaN clears it.. animation has the following type: lists containing elements 'source', 'source_layer', 'state_key', 'ids', 'values', 'frames', 'loop'.
+Those elements have the following types:
+  - `source` (String; required)
+  - `source_layer` (String; optional)
+  - `state_key` (String; optional)
+  - `ids` (Array | Dict; required)
+  - `values` (Array | Dict; required)
+  - `frames` (Real; required)
+  - `loop` (Bool; optional)
 - `basemap` (String | Dict; optional): The basemap style, either as a URL string to a MapLibre style JSON,
-or as a style JSON object.
+or as a style JSON object. Server-relative URLs (e.g. from
+`dash_maplibre.basemap_url`) are resolved against the page origin.
+Changing it diffs the styles and keeps the app sources and layers.
 - `bearing` (Real; optional): The bearing (rotation) of the map in degrees.
+- `bounds` (Array; optional): Output: the visible bounds as [[west, south], [east, north]], set once
+the camera settles after a move.
 - `center` (Array; optional): The map center as a [longitude, latitude] array.
+- `clickData` (Dict; optional): Output: the last map click as
+`{layer, features: [{id, properties}], layers, lngLat: [lng, lat]}`,
+where `layer` is the topmost `send_click` layer under the pointer (null
+if no such layer was hit) and `features` its clicked features.
+`layers` maps every `send_click` layer that was hit to its features,
+`{layerId: [{id, properties}]}`. Clicked clusters also carry `cluster`.
 - `colorbar_map` (optional): Configuration for the colorbar legend for the map.
 Can be a single colorbar config object, or a dictionary where keys are zoom levels
 (as numbers or strings) and values are colorbar config objects. The colorbar for the
@@ -27,6 +54,13 @@ highest zoom key less than or equal to the current zoom will be shown.. colorbar
 Those elements have the following types:
 
 - `colorbar_risk` (Dict; optional): Configuration for the colorbar legend for risk visualization.
+- `current_center` (Array; optional): Output: the center as [lng, lat], set once the camera settles after a move.
+- `current_frame` (Real; optional): Frame of `animation` to show. While `playing`, frames advance in the
+browser without updating this prop; it is set to the frame reached
+when playback stops.
+- `current_zoom` (Real; optional): Output: the zoom level, set once the camera settles after a move.
+- `debug` (Bool; optional): Log component activity to the browser console and report timings
+through `perf_stats`. Off by default, which keeps the console silent.
 - `feature_state` (Dict; optional): Feature state to apply to map sources.
 Structure:
 {
@@ -38,16 +72,78 @@ Structure:
     }
   }
 }
+Instead of `{[featureId]: any}`, a state key can hold the bulk form
+`{"ids": [...], "values": [...] or any}` (see `dash_maplibre.feature_state`).
+A null value clears the key for that feature. Only differences to the
+previously applied state are pushed to the map.
+- `fps` (Real; optional): Playback speed of `animation` in frames per second.
 - `layers` (Array; optional): The array of MapLibre layer definitions to display on the map.
+Besides the MapLibre layer keys, a layer may set `display_name` (show it in
+the legend), `hover_html` (popup template like `"{name}: {risk:.2f}"`;
+formats are d3-format specifiers with optional math as in the colorbar,
+e.g. `"{ratio:100*_val.1f}%"`),
+`hover_index` (look up hovered points in a client-side KD-tree of the
+geojson source instead of querying rendered features; ignores `filter`)
+and `send_click` (report clicks through `clickData`). Clicked features
+can be trimmed with `click_properties` (list of property names to send;
+`[]` sends ids only) and `click_max_features`.
+On clustered sources, `cluster_hover_html` is the popup template of
+clusters (default `"{point_count_abbreviated} points"`), clicking a
+cluster zooms in until it expands unless `expand_clusters` is false,
+and `clickData` features carry `cluster: {id, point_count}` plus the
+properties of up to `cluster_leaves` of its points as `leaves`.
+Layers with `send_selection` report the features of their geojson
+source caught by a box or lasso selection (see `selection_mode`).
 - `max_bounds` (Array; optional): The maximum bounds of the map as [[west, south], [east, north]].
+- `perf_stats` (Dict; optional): Output, only with `debug`: timings collected since the previous report,
+sent at most once per second, as
+`{timestamp, interval_ms, timings: {name: {count, total_ms, mean_ms,
+max_ms, last_ms}}, frames: {count, fps, mean_frame_ms}}`. Timed names
+are `style` (until the map is idle), `sources`, `source_data`,
+`layers`, `feature_state`, `hover` and `animation`. Every timing is
+also recorded as a `dash-maplibre:<name>` performance measure.
 - `pitch` (Real; optional): The pitch (tilt) of the map in degrees.
+- `playing` (Bool; optional): Whether `animation` is playing. Set back to false when an animation
+without `loop` reaches its last frame.
+- `selectedData` (Dict; optional): Output: the last box or lasso selection as
+`{mode, geometry, ids: {layerId: [...]}}`, where `geometry` is the
+selection as a GeoJSON Polygon and `ids` holds, for every
+`send_selection` layer whose source data is in the browser, the ids
+of its features intersecting the selection. Features of other
+sources can be looked up on the server with
+`dash_maplibre.select_features`.
+- `selection_mode` (a value equal to: "box", "lasso"; optional): Dragging on the map draws a `"box"` or `"lasso"` selection instead of
+panning; null (the default) turns selection off. A finished selection
+is reported through `selectedData`.
 - `sources` (Dict; optional): The sources definition for MapLibre, as an object mapping source IDs to source definitions.
+Besides the MapLibre source types, `"geojson-columnar"` sources with packed
+binary coordinates and columnar properties are accepted (see
+`dash_maplibre.columnar_source`) and `"geojson-serialized"` sources carrying
+FeatureCollection text in `json` (see `dash_maplibre.serialized_source`);
+both are decoded into geojson sources.
+Geojson sources can carry `zoom_data`, an object mapping zoom breakpoints
+to data (see `dash_maplibre.zoom_variants`); the data of the highest
+breakpoint at or below the map zoom is shown and swapped as the zoom
+crosses breakpoints.
+`"geojson-shared"` sources only carry a `url` (see
+`dash_maplibre.register_shared_source`); its data is fetched and parsed
+once per page and shared by every map using it.
+`"geojson-stream"` sources carry the `url` of newline-delimited GeoJSON
+features (see `dash_maplibre.register_stream`); the features are added
+to the map in batches of `batch_size` as they arrive.
+Point sources can set `cluster: true` (with `clusterRadius`,
+`clusterMaxZoom`, `clusterProperties`) to cluster points on the client.
 - `style` (Dict; optional): Additional CSS styles to apply to the map container.
+- `sync_group` (String; optional): Name of a camera group: maps on the page with the same `sync_group`
+follow each other's moves directly in the browser, without Dash
+callbacks.
 - `version` (String; optional): Optional version string to display in the lower right corner of the legend.
+- `viewport_debounce` (Real; optional): Milliseconds the camera has to rest after a move before `bounds`,
+`current_zoom` and `current_center` are reported.
 - `zoom` (Real; optional): The zoom level of the map.
 """
 function ''_dashmaplibre(; kwargs...)
-        available_props = Symbol[:id, :basemap, :bearing, :center, :colorbar_map, :colorbar_risk, :feature_state, :layers, :max_bounds, :pitch, :sources, :style, :version, :zoom]
+        available_props = Symbol[:id, :animation, :basemap, :bearing, :bounds, :center, :clickData, :colorbar_map, :colorbar_risk, :current_center, :current_frame, :current_zoom, :debug, :feature_state, :fps, :layers, :max_bounds, :perf_stats, :pitch, :playing, :selectedData, :selection_mode, :sources, :style, :sync_group, :version, :viewport_debounce, :zoom]
         wild_props = Symbol[]
         return Component("''_dashmaplibre", "DashMaplibre", "dash_maplibre", available_props, wild_props; kwargs...)
 end
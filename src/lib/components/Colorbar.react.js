@@ -1,7 +1,7 @@
 import React, { useRef, useEffect, useState } from "react";
 import PropTypes from "prop-types";
 import * as d3 from "d3";
-import { evaluate } from "mathjs";
+import { formatValue } from "../utils/format";
 
 
 const DEFAULT_BAR_HEIGHT = 24;
@@ -13,39 +13,10 @@ const RANDOM_STRING_LENGTH = 9;
 const LABEL_FONT_SIZE = 12;
 const TITLE_FONT_SIZE = 14;
 const MIN_LABEL_SPACING = 100;
+// Shared default, so the draw effect does not see new labels on every render
+const NO_LABELS = {};
 
 
-function formatValueWithMath(val, format) {
-    if (!format) {return val.toString();}
-
-    // Check for math expression, e.g., "1/_val.2f"
-    // We'll split at the last dot followed by a format specifier
-    const match = format.match(/^(.*_val)(\.[0-9a-zA-Z%]+)$/);
-    if (match) {
-        const mathExpr = match[1].replace(/_val/g, `(${val})`);
-        const d3Format = match[2];
-        let mathResult = val;
-        try {
-            mathResult = evaluate(mathExpr);
-        } catch (e) {
-            // fallback to original value if math fails
-            mathResult = val;
-        }
-        try {
-            return d3.format(d3Format)(mathResult);
-        } catch (e) {
-            return mathResult.toString();
-        }
-    } else {
-        // No math, just d3 format
-        try {
-            return d3.format(format)(val);
-        } catch (e) {
-            return val.toString();
-        }
-    }
-}
-
 // Helper: get equally spaced positions for n labels (0 to 1)
 function getAutoLabelPositions(numLabels) {
     if (numLabels === 1) {return [0.5];}
@@ -64,6 +35,8 @@ function getAutoLabelPositions(numLabels) {
  * and uses a ResizeObserver to handle responsive resizing.
  * It also supports formatting of labels using d3-format
  * or native JavaScript formatting.
+ * It is memoised: the SVG is only redrawn when a prop
+ * or the container width changes.
  * 
  * Dependencies:
  * - d3: For creating the SVG elements and handling the color gradient.
@@ -72,7 +45,7 @@ function getAutoLabelPositions(numLabels) {
 const Colorbar = ({
     stops,
     title,
-    labels = {},
+    labels = NO_LABELS,
     barHeight = DEFAULT_BAR_HEIGHT,
     titleHeight = DEFAULT_TITLE_HEIGHT,
     labelHeight = DEFAULT_LABEL_HEIGHT,
@@ -89,7 +62,8 @@ const Colorbar = ({
         }
         const ro = new window.ResizeObserver(entries => {
             for (const entry of entries) {
-                setWidth(entry.contentRect.width);
+                // Whole pixels, so sub-pixel layout jitter does not redraw
+                setWidth(Math.round(entry.contentRect.width));
             }
         });
         ro.observe(containerRef.current);
@@ -185,7 +159,7 @@ const Colorbar = ({
                 .attr("font-size", LABEL_FONT_SIZE)
                 .attr("fill", "var(--mantine-color-text)")
                 .attr("dominant-baseline", "middle")
-                .text(formatValueWithMath(v, format));
+                .text(formatValue(v, format));
         });
 
         // Title
@@ -198,7 +172,7 @@ const Colorbar = ({
             .attr("dominant-baseline", "middle")
             .text(title);
 
-    }, [stops, labels, title, barHeight, width]);
+    }, [stops, labels, title, barHeight, titleHeight, labelHeight, format, width]);
 
     return (
         <div ref={containerRef} style={{ width: "100%" }}>
@@ -245,4 +219,4 @@ Colorbar.propTypes = {
     format: PropTypes.string
 };
 
-export default Colorbar;
\ No newline at end of file
+export default React.memo(Colorbar);
\ No newline at end of file
@@ -1,13 +1,8 @@
-/* eslint-disable consistent-return */
-import React, { useRef, useEffect, useState, useLayoutEffect } from "react";
+import React, { Suspense, lazy } from "react";
 import PropTypes from "prop-types";
-import maplibregl from "maplibre-gl";
-import './DashMaplibre.css';
-import 'maplibre-gl/dist/maplibre-gl.css';
-import Colorbar from './Colorbar.react.js';
 
-const DEFAULT_LAYERS = [];
-const DEFAULT_SOURCES = {};
+// The implementation and MapLibre live in the async-DashMaplibre.js chunk
+const RealDashMaplibre = lazy(() => import(/* webpackChunkName: "DashMaplibre" */ '../fragments/DashMaplibre.react'));
 
 const EMPTY_BASEMAP = {
   version: 8,
@@ -16,762 +11,53 @@ const EMPTY_BASEMAP = {
   layers: []
 };
 
-function interpolateTemplate(template, props) {
-    return template.replace(/\{(\w+)(?::([.\d\w]+))?\}/g, (match, key, format) => {
-        const value = props[key];
-        if (value === null) {return '';}
-        if (format && typeof value === 'number') {
-            const fixedMatch = format.match(/^\.([0-9]+)f$/);
-            if (fixedMatch) {
-                const decimals = parseInt(fixedMatch[1], 10);
-                return value.toFixed(decimals);
-            }
-            const expMatch = format.match(/^\.([0-9]+)e$/);
-            if (expMatch) {
-                const decimals = parseInt(expMatch[1], 10);
-                return value.toExponential(decimals);
-            }
-        }
-        return String(value);
-    });
-}
-
-// Helper to get the correct colorbar config for the current zoom
-function getColorbarForZoom(colorbar_map, zoom) {
-    if (!colorbar_map) {return null;}
-    if (typeof colorbar_map !== "object" || Array.isArray(colorbar_map)) {return colorbar_map;}
-
-    const keys = Object.keys(colorbar_map);
-    // Check if all keys are numeric (or can be parsed as numbers)
-    const allNumeric = keys.length > 0 && keys.every(k => !isNaN(Number(k)));
-
-    if (!allNumeric) {
-        // Legacy style: treat as a single colorbar config
-        return colorbar_map;
-    }
-
-    // colorbar_map is a dict: keys are zoom levels, values are colorbar configs
-    const zoomKeys = keys
-        .map(Number)
-        .sort((a, b) => a - b);
-    let chosen = null;
-    for (let i = 0; i < zoomKeys.length; i++) {
-        if (zoom >= zoomKeys[i]) {
-            chosen = colorbar_map[zoomKeys[i]];
-        } else {
-            break;
-        }
-    }
-    return chosen;
-}
+const DEFAULT_LAYERS = [];
+const DEFAULT_SOURCES = {};
+const DEFAULT_STYLE = {};
 
 /**
     * DashMaplibre is a React component for displaying interactive maps using MapLibre GL JS.
     * It supports custom basemaps, layers, sources, and interactive features like hover popups and click events.
     * It is designed to be used within a Dash application, allowing for dynamic updates and interactivity.
+    * The implementation is loaded as an async chunk when the first map renders,
+    * so pages without a map do not load MapLibre.
     * 
     * Dependencies:
     * - maplibre-gl: For rendering maps and handling layers/sources.
     * - Colorbar: A custom component for displaying colorbars alongside the map.
     * - Mantine for styling and layout.
  */
-const DashMaplibre = ({
-    id,
-    basemap = EMPTY_BASEMAP,
-    center = [0, 0],
-    zoom = 2,
-    max_bounds = null,
-    bearing = 0,
-    pitch = 0,
-    sources = {},
-    layers = DEFAULT_LAYERS,
-    style = DEFAULT_SOURCES,
-    colorbar_map = null,
-    colorbar_risk = null,
-    setProps,
-    version = "",
-    feature_state = null,
-    ...otherProps
-}) => {
-    const mapContainer = useRef(null);
-    const mapRef = useRef(null);
-    const prevLayersRef = useRef([]);
-    const [visibleLayers, setVisibleLayers] = useState(() => layers.filter(l => l.display_name).map(l => l.id));
-    const [styleLoaded, setStyleLoaded] = useState(false);
-    const savedViewRef = useRef({ center, zoom });
-    const legendLayers = layers.filter(l => l.display_name);
-    const [currentZoom, setCurrentZoom] = useState(zoom);
-
-
-    // 1. Initialize map only once
-    useEffect(() => {
-        console.log("Initializing MapLibre map");
-        if (!mapRef.current) {
-            mapRef.current = new maplibregl.Map({
-                container: mapContainer.current,
-                center,
-                zoom,
-                bearing,
-                pitch,
-                maxBounds: max_bounds,
-                ...otherProps
-            });
-            // Add compass control (reset north button)
-            mapRef.current.addControl(
-                new maplibregl.NavigationControl({
-                    showCompass: true,
-                    showZoom: false,
-                    visualizePitch: true
-                }),
-                "bottom-left"
-            );
-            window._map = mapRef.current;
-        }
-        return () => {
-            if (mapRef.current) {
-                mapRef.current.remove();
-                mapRef.current = null;
-            }
-        };
-    }, []);
-
-    // 2. Handle basemap (style) changes
-    useLayoutEffect(() => {
-        if (!mapRef.current) {return;}
-
-        console.log("Updating basemap/style");
-        const map = mapRef.current;
-        setStyleLoaded(false);
-        prevLayersRef.current = [];
-
-        function onIdle() {
-            console.log("Basemap/style loaded");
-            setStyleLoaded(true);
-        }
-        map.once('idle', onIdle);
-        map.setStyle(basemap);
-    }, [basemap]);
-
-    // 3. Add/update sources after style is loaded
-    useEffect(() => {
-        if (!mapRef.current || !styleLoaded) {return;}
-
-        console.log("Updating sources");
-        const map = mapRef.current;
-        Object.entries(sources).forEach(([id, src]) => {
-            // Safety: skip empty or invalid geojson sources
-            if (
-                src &&
-                src.type === "geojson" &&
-                (
-                    !src.data ||
-                    typeof src.data !== "object" ||
-                    Object.keys(src.data).length === 0 ||
-                    !src.data.type
-                )
-            ) {
-                // Skip invalid/empty geojson
-                return;
-            }
-
-            // Add source if missing, or update data if geojson source already exists
-            if (!map.getSource(id)) {
-                try { map.addSource(id, src); } catch (err) {
-                console.error(err);
-            }
-            } else if (src.type === "geojson") {
-                console.log("Updating geojson source data for:", id);
-                map.getSource(id).setData(src.data);
-            }
-        });
-    }, [sources, styleLoaded]);
-
-    // 4. Add/remove/update app layers after style and sources are ready
-    useEffect(() => {
-        if (!mapRef.current || !styleLoaded) {return;}
-
-        console.log("Updating layers");
-        const map = mapRef.current;
-
-        // Remove app layers whose source is missing or which are no longer in the layers prop
-        prevLayersRef.current.forEach(layer => {
-            const sourceExists = Boolean(map.getSource(layer.source));
-            const stillInLayers = layers.some(l => l.id === layer.id);
-            if ((!sourceExists || !stillInLayers) && map.getLayer(layer.id)) {
-                map.removeLayer(layer.id);
-            }
-        });
-
-        // Add app layers whose source exists and which are not already on the map
-        layers.forEach((layer, idx) => {
-            if (Object.keys(layer).length === 0) {
-                // Empty layer definition, skip
-                return;
-            }
-            const sourceExists = Boolean(map.getSource(layer.source));
-            if (!sourceExists) {
-                console.warn("[DashMaplibre] Not adding app layer (missing source):", layer.id, "source:", layer.source);
-                return;
-            }
-            if (!map.getLayer(layer.id)) {
-                // Find the next layer in the list that is already on the map to insert before
-                let beforeId = null;
-                for (let i = idx + 1; i < layers.length; i++) {
-                    if (map.getLayer(layers[i].id)) {
-                        beforeId = layers[i].id;
-                        break;
-                    }
-                }
-                try { map.addLayer(layer, beforeId); } catch (err) { console.warn("addLayer failed", layer.id, err); }
-            }
-            // Patch properties for all existing layers
-            patchLayerProperties(map, layer);
-        });
-
-        // Update prevLayersRef to only track app layers
-        prevLayersRef.current = layers.slice();
-
-        // Dispatch a DOM event to signal that layers have been updated
-        const event = new CustomEvent('layers-updated', {
-            detail: { message: 'Layers have been updated' },
-        });
-        window.dispatchEvent(event);
-    }, [layers, sources, styleLoaded]);
-
-    // 4b. Apply feature-state once style and sources are ready
-    useEffect(() => {
-        if (!mapRef.current || !styleLoaded || !feature_state) { return; }
-
-        console.log("Applying feature_state");
-        const map = mapRef.current;
-
-        try {
-            Object.entries(feature_state).forEach(([sourceId, layersForSource]) => {
-                if (!map.getSource(sourceId)) {
-                    console.warn("[DashMaplibre] feature_state: source missing:", sourceId);
-                    return;
-                }
-
-                // layersForSource: { [sourceLayerId]: { [stateKey]: { [featureId]: value } } }
-                Object.entries(layersForSource || {}).forEach(([sourceLayerId, stateMap]) => {
-                    // stateMap: { [stateKey]: { [featureId]: value } }
-                    Object.entries(stateMap || {}).forEach(([stateKey, featuresMap]) => {
-                        // featuresMap: { [featureId]: value }
-                        Object.entries(featuresMap || {}).forEach(([featureId, value]) => {
-                            // Convention: null/undefined => clear this key for this feature
-                            if (value === null || typeof value === "undefined") {
-                                try {
-                                    map.removeFeatureState(
-                                        {
-                                            source: sourceId,
-                                            sourceLayer: sourceLayerId,
-                                            id: featureId
-                                        },
-                                        stateKey
-                                    );
-                                } catch (err) {
-                                    console.warn(
-                                        "removeFeatureState failed",
-                                        sourceId,
-                                        sourceLayerId,
-                                        featureId,
-                                        stateKey,
-                                        err
-                                    );
-                                }
-                                return;
-                            }
-
-                            try {
-                                map.setFeatureState(
-                                    {
-                                        source: sourceId,
-                                        sourceLayer: sourceLayerId,
-                                        id: featureId
-                                    },
-                                    { [stateKey]: value }
-                                );
-                            } catch (err) {
-                                console.warn(
-                                    "setFeatureState failed",
-                                    sourceId,
-                                    sourceLayerId,
-                                    featureId,
-                                    stateKey,
-                                    err
-                                );
-                            }
-                        });
-                    });
-                });
-            });
-        } catch (err) {
-            console.error("Error applying feature_state", err);
-        }
-    }, [feature_state, sources, layers, styleLoaded]);
-
-
-    // 5. Hover popups for layers with hover_html
-    useEffect(() => {
-        if (!mapRef.current) {return;}
-        
-        console.log("Setting up hover popups");
-        const map = mapRef.current;
-        let popup = null;
-
-        // Collect all layer ids with hover_html
-        const hoverLayers = layers.filter(l => l.hover_html).map(l => l.id);
-
-        function onMouseMove(e) {
-            const fuzz = 8;
-            const bbox = [
-                [e.point.x - fuzz, e.point.y - fuzz],
-                [e.point.x + fuzz, e.point.y + fuzz]
-            ];
-            // Query existing hoverable layers at once
-            const existing = hoverLayers.filter((id) => Boolean(map.getLayer(id)));
-            const features = map.queryRenderedFeatures(bbox, { layers: existing });
-
-            if (features.length > 0) {
-                // Find the feature closest to the mouse pointer
-                let minDist = Infinity;
-                let closestFeature = null;
-                let closestLayer = null;
-                for (const feature of features) {
-                    const coords = feature.geometry.coordinates;
-                    // Project feature coordinates to screen point
-                    const screen = map.project(Array.isArray(coords[0]) ? coords[0] : coords);
-                    const dx = e.point.x - screen.x;
-                    const dy = e.point.y - screen.y;
-                    const dist = Math.sqrt(dx * dx + dy * dy);
-                    if (dist < minDist) {
-                        minDist = dist;
-                        closestFeature = feature;
-                    }
-                }
-                // Find the corresponding layer definition
-                closestLayer = layers.find(l => l.id === closestFeature.layer.id);
-
-                // Only update popup if feature changed or moved
-                if (!popup) {
-                    popup = new maplibregl.Popup({ closeButton: false, closeOnClick: false, className: "dash-maplibre-popup" });
-                }
-                let html;
-                if (typeof closestLayer.hover_html === "function") {
-                    html = closestLayer.hover_html(closestFeature);
-                } else if (typeof interpolateTemplate === "function" && closestFeature.properties) {
-                    html = interpolateTemplate(closestLayer.hover_html, closestFeature.properties);
-                } else {
-                    html = closestLayer.hover_html;
-                }
-                popup
-                    .setLngLat(closestFeature.geometry.coordinates)
-                    .setHTML(html)
-                    .addTo(map);
-                map.getCanvas().style.cursor = 'pointer';
-            } else {
-                // Remove popup if no feature is close
-                if (popup) {
-                    popup.remove();
-                    popup = null;
-                }
-                map.getCanvas().style.cursor = '';
-            }
-        }
-
-        // Remove popup when mouse leaves the map
-        function onMapMouseLeave() {
-            if (popup) {
-                popup.remove();
-                popup = null;
-            }
-            map.getCanvas().style.cursor = '';
-        }
-
-        map.on('mousemove', onMouseMove);
-        map.getCanvas().addEventListener('mouseleave', onMapMouseLeave);
-
-        // Cleanup
-        return () => {
-            map.off('mousemove', onMouseMove);
-            map.getCanvas().removeEventListener('mouseleave', onMapMouseLeave);
-            if (popup) {
-                popup.remove();
-                popup = null;
-            }
-        };
-    }, [layers, sources, styleLoaded]);
-
-    // 6. Camera updates
-    useEffect(() => {
-        if (!mapRef.current) {return;}
-
-        console.log("Updating camera view");
-        const map = mapRef.current;
-        if (center && typeof zoom === "number") {
-            savedViewRef.current = { center, zoom };
-        }
-        if (typeof zoom === "number" && map.getZoom() !== zoom) {
-            map.setZoom(zoom);
-        }
-        if (center) {
-            const curr = map.getCenter();
-            if (curr.lng !== center[0] || curr.lat !== center[1]) {
-                map.setCenter(center);
-            }
-        }
-        if (typeof bearing === "number" && map.getBearing() !== bearing) {
-            map.setBearing(bearing);
-        }
-        if (typeof pitch === "number" && map.getPitch() !== pitch) {
-            map.setPitch(pitch);
-        }
-    }, [center, zoom, bearing, pitch]);
-
-    // 7. Layer visibility toggling
-    useEffect(() => {
-        if (!mapRef.current) {return;}
-
-        console.log("Updating layer visibility");
-        layers.forEach(layer => {
-            if (!layer.display_name) {return;}
-            if (mapRef.current.getLayer(layer.id)) {
-                mapRef.current.setLayoutProperty(
-                    layer.id,
-                    "visibility",
-                    visibleLayers.includes(layer.id) ? "visible" : "none"
-                );
-            }
-        });
-    }, [visibleLayers, layers, styleLoaded]);
-
-    // 8. Sync visibleLayers state with layers prop
-    useEffect(() => {
-        console.log("Syncing visibleLayers state with layers prop");
-        const validIds = layers.filter(l => l.display_name).map(l => l.id);
-        setVisibleLayers(vs => {
-            if (
-                vs.length === validIds.length &&
-                vs.every((id, i) => id === validIds[i])
-            ) {
-                return vs;
-            }
-            return validIds;
-        });
-    }, [layers]);
-
-    // 9. Double-click to restore view
-    useEffect(() => {
-        if (!mapRef.current) {return;}
-
-        console.log("Setting up double-click to restore view");
-        const map = mapRef.current;
-        map.doubleClickZoom.disable();
-        function handleDblClick(_e) {
-            if (savedViewRef.current) {
-                map.flyTo({
-                    center: savedViewRef.current.center,
-                    zoom: savedViewRef.current.zoom,
-                    bearing: 0,
-                    pitch: 0,
-                });
-            }
-        }
-        map.on('dblclick', handleDblClick);
-        return () => { 
-            map.off('dblclick', handleDblClick); 
-        };
-    }, []);
-
-    // 10. Handle layer clicks
-    useEffect(() => {
-        if (!mapRef.current) {return;}
-
-        console.log("Setting up layer click handlers");
-        const map = mapRef.current;
-        const handlers = {};
-        const clickableLayerIds = layers.filter(layer => layer.send_click).map(layer => layer.id);
-
-        layers.forEach(layer => {
-            if (!layer.send_click) {return;}
-            const layerId = layer.id;
-
-            function onLayerClick(e) {
-                if (setProps && e.features && e.features.length > 0) {
-                    setProps({
-                        clickData: {
-                            layer: layerId,
-                            features: e.features.map(f => ({
-                                properties: f.properties
-                            }))
-                        }
-                    });
-                }
-            }
-
-            handlers[layerId] = onLayerClick;
-            if (map.getLayer(layerId)) {
-                map.on('click', layerId, onLayerClick);
-            }
-        });
-
-        // Global fallback click handler (only if no layer was hit)
-        function onMapClick(e) {
-            const existing = clickableLayerIds.filter((id) => Boolean(map.getLayer(id)));
-            const features = map.queryRenderedFeatures(e.point, {
-                layers: existing
-            });
-
-            if (setProps && (!features || features.length === 0)) {
-                setProps({
-                    clickData: {
-                        layer: null,
-                        features: []
-                    }
-                });
-            }
-        }
-        map.on('click', onMapClick);
-
-        // Cleanup
-        return () => {
-            layers.forEach(layer => {
-                if (!layer.send_click) {return;}
-                const layerId = layer.id;
-                const handler = handlers[layerId];
-                if (handler && mapRef.current && mapRef.current.style && map.getLayer(layerId)) {
-                    map.off('click', layerId, handler);
-                }
-            });
-        };
-    }, [layers, sources, styleLoaded]);
-
-    // 11. Render legend
-    function renderLegend(legendLayers, visibleLayers, setVisibleLayers, version) {
-        return (
-            <div style={{
-                position: "absolute",
-                top: 0,
-                left: 0,
-                background: "var(--mantine-color-body)",
-                padding: 6,
-                zIndex: 10,
-                boxShadow: "0 2px 8px rgba(0,0,0,0.13)",
-                minWidth: 120
-            }}>
-                {legendLayers.map(layer => {
-                    let color =
-                        layer.paint?.["circle-color"] ||
-                        layer.paint?.["fill-color"] ||
-                        layer.paint?.["line-color"] ||
-                        "#ccc";
-                    if (Array.isArray(color)) { color = "#ccc"; }
-                    let swatch = null;
-                    if (layer.type === "circle") {
-                        swatch = (
-                            <span style={{
-                                display: "inline-block",
-                                width: 12,
-                                height: 12,
-                                borderRadius: 6,
-                                marginRight: 13,
-                                marginLeft: 3,
-                                background: color
-                            }} />
-                        );
-                    } else if (layer.type === "fill") {
-                        swatch = (
-                            <span style={{
-                                display: "inline-block",
-                                width: 20,
-                                height: 12,
-                                marginRight: 10,
-                                background: color
-                            }} />
-                        );
-                    } else if (layer.type === "line") {
-                        swatch = (
-                            <svg width={20} height={16} style={{marginRight: 10, verticalAlign: "middle"}}>
-                                <line x1={2} y1={8} x2={18} y2={8} stroke={color} strokeWidth={4}/>
-                            </svg>
-                        );
-                    } else {
-                        swatch = (
-                            <span style={{
-                                display: "inline-block",
-                                width: 20,
-                                height: 12,
-                                marginRight: 10,
-                                background: "#ccc",
-                                border: "1px solid #999"
-                            }} />
-                        );
-                    }
-                    return (
-                        <div
-                            key={layer.id}
-                            style={{
-                                display: "flex",
-                                alignItems: "center",
-                                cursor: "pointer",
-                                fontWeight: "normal",
-                                opacity: visibleLayers.includes(layer.id) ? 1 : 0.5,
-                                userSelect: "none"
-                            }}
-                            onClick={() => {
-                                setVisibleLayers(vs =>
-                                    vs.includes(layer.id)
-                                        ? vs.filter(id => id !== layer.id)
-                                        : [...vs, layer.id]
-                                );
-                            }}
-                            title={layer.id}
-                        >
-                            {swatch}
-                            <span>{layer.display_name}</span>
-                        </div>
-                    );
-                })}
-                {version && (
-                    <div
-                        style={{
-                            textAlign: "right",
-                            color: "var(--mantine-color-text)",
-                            fontSize: "0.6em",
-                            userSelect: "none"
-                        }}
-                    >
-                        {version}
-                    </div>
-                )}
-            </div>
-        );
-    }
-
-    // 12. Patch layer properties
-    function patchLayerProperties(map, layer) {
-        const mapLayer = map.getLayer(layer.id);
-        if (!mapLayer) {return;}
-
-        // PATCH PAINT PROPERTIES
-        const paint = layer.paint || {};
-        // Set or update paint properties
-        Object.entries(paint).forEach(([k, v]) => {
-            try {
-                if (map.getPaintProperty(layer.id, k) !== v) {
-                    map.setPaintProperty(layer.id, k, v);
-                }
-            } catch (err) {
-                console.error(err);
-            }
-        });
-
-        // PATCH LAYOUT PROPERTIES
-        const layout = layer.layout || {};
-        Object.entries(layout).forEach(([k, v]) => {
-            try {
-                if (map.getLayoutProperty(layer.id, k) !== v) {
-                    map.setLayoutProperty(layer.id, k, v);
-                }
-            } catch (err) {
-                console.error(err);
-            }
-        });
-
-        // PATCH FILTER
-        if ('filter' in layer) {
-            try {
-                if (JSON.stringify(map.getFilter(layer.id)) !== JSON.stringify(layer.filter)) {
-                    map.setFilter(layer.id, layer.filter);
-                }
-            } catch (err) {
-                console.error(err);
-            }
-        }
-
-        // PATCH MINZOOM/MAXZOOM
-        if ('minzoom' in layer) {
-            try {
-                if (mapLayer.minzoom !== layer.minzoom) {
-                    map.setLayerZoomRange(layer.id, layer.minzoom, mapLayer.maxzoom);
-                }
-            } catch (err) {
-                console.error(err);
-            }
-        }
-        if ('maxzoom' in layer) {
-            try {
-                if (mapLayer.maxzoom !== layer.maxzoom) {
-                    map.setLayerZoomRange(layer.id, mapLayer.minzoom, layer.maxzoom);
-                }
-            } catch (err) {
-                console.error(err);
-            }
-        }
-    }
-
-    // 13. Listen for zoom changes on the map
-    useEffect(() => {
-        if (!mapRef.current) {return;}
-        
-        console.log("Setting up zoom listener");
-        const map = mapRef.current;
-        function onZoom() {
-            setCurrentZoom(map.getZoom());
-        }
-        map.on('zoom', onZoom);
-        // Set initial zoom
-        setCurrentZoom(map.getZoom());
-        return () => {
-            map.off('zoom', onZoom);
-        };
-    }, [styleLoaded]);
-
-    return (
-        <div
-            style={{
-                width: "100%",
-                height: "100%",
-                display: "flex",
-                flexDirection: "column",
-                ...style
-            }}
-            id={id}
-        >
-            <div style={{ flex: 1, minHeight: 0, minWidth: 0, position: "relative", display: "flex", flexDirection: "column" }}>
-                <div
-                    style={{
-                        display: "flex",
-                        flexDirection: "row",
-                        gap: 24,
-                        width: "100%",
-                        maxWidth: "100%",
-                        alignItems: "stretch"
-                    }}
-                >
-                    {getColorbarForZoom(colorbar_map, currentZoom) && (
-                        <div style={{ flex: "1 1 0", minWidth: 0, padding: "0 8px"}}>
-                            <Colorbar {...getColorbarForZoom(colorbar_map, currentZoom)} />
-                        </div>
-                    )}
-                    {colorbar_risk && (
-                        <div style={{ flex: "1 1 0", minWidth: 0, padding: "0 8px" }}>
-                            <Colorbar {...colorbar_risk} />
-                        </div>
-                    )}
-                </div>
-                <div
-                    ref={mapContainer}
-                    style={{ width: "100%", height: "100%", flex: 1, minHeight: 0, minWidth: 0, position: "relative" }}
-                >
-                    {legendLayers.length > 0 && renderLegend(legendLayers, visibleLayers, setVisibleLayers, version)}
-                </div>
-            </div>
-        </div>
-    );
+const DashMaplibre = props => (
+    <Suspense fallback={null}>
+        <RealDashMaplibre {...props} />
+    </Suspense>
+);
+
+export const defaultProps = {
+    basemap: EMPTY_BASEMAP,
+    center: [0, 0],
+    zoom: 2,
+    max_bounds: null,
+    bearing: 0,
+    pitch: 0,
+    sources: DEFAULT_SOURCES,
+    layers: DEFAULT_LAYERS,
+    style: DEFAULT_STYLE,
+    colorbar_map: null,
+    colorbar_risk: null,
+    version: "",
+    feature_state: null,
+    viewport_debounce: 200,
+    sync_group: null,
+    animation: null,
+    current_frame: 0,
+    playing: false,
+    fps: 30,
+    selection_mode: null,
+    debug: false,
 };
 
-DashMaplibre.propTypes = {
+export const propTypes = {
 
     /**
      * The unique ID of this component.
@@ -780,7 +66,9 @@ DashMaplibre.propTypes = {
 
     /**
      * The basemap style, either as a URL string to a MapLibre style JSON,
-     * or as a style JSON object.
+     * or as a style JSON object. Server-relative URLs (e.g. from
+     * `dash_maplibre.basemap_url`) are resolved against the page origin.
+     * Changing it diffs the styles and keeps the app sources and layers.
      */
     basemap: PropTypes.oneOfType([PropTypes.string, PropTypes.object]),
 
@@ -811,11 +99,44 @@ DashMaplibre.propTypes = {
 
     /**
      * The sources definition for MapLibre, as an object mapping source IDs to source definitions.
+     * Besides the MapLibre source types, `"geojson-columnar"` sources with packed
+     * binary coordinates and columnar properties are accepted (see
+     * `dash_maplibre.columnar_source`) and `"geojson-serialized"` sources carrying
+     * FeatureCollection text in `json` (see `dash_maplibre.serialized_source`);
+     * both are decoded into geojson sources.
+     * Geojson sources can carry `zoom_data`, an object mapping zoom breakpoints
+     * to data (see `dash_maplibre.zoom_variants`); the data of the highest
+     * breakpoint at or below the map zoom is shown and swapped as the zoom
+     * crosses breakpoints.
+     * `"geojson-shared"` sources only carry a `url` (see
+     * `dash_maplibre.register_shared_source`); its data is fetched and parsed
+     * once per page and shared by every map using it.
+     * `"geojson-stream"` sources carry the `url` of newline-delimited GeoJSON
+     * features (see `dash_maplibre.register_stream`); the features are added
+     * to the map in batches of `batch_size` as they arrive.
+     * Point sources can set `cluster: true` (with `clusterRadius`,
+     * `clusterMaxZoom`, `clusterProperties`) to cluster points on the client.
      */
     sources: PropTypes.object,
 
     /**
      * The array of MapLibre layer definitions to display on the map.
+     * Besides the MapLibre layer keys, a layer may set `display_name` (show it in
+     * the legend), `hover_html` (popup template like `"{name}: {risk:.2f}"`;
+     * formats are d3-format specifiers with optional math as in the colorbar,
+     * e.g. `"{ratio:100*_val.1f}%"`),
+     * `hover_index` (look up hovered points in a client-side KD-tree of the
+     * geojson source instead of querying rendered features; ignores `filter`)
+     * and `send_click` (report clicks through `clickData`). Clicked features
+     * can be trimmed with `click_properties` (list of property names to send;
+     * `[]` sends ids only) and `click_max_features`.
+     * On clustered sources, `cluster_hover_html` is the popup template of
+     * clusters (default `"{point_count_abbreviated} points"`), clicking a
+     * cluster zooms in until it expands unless `expand_clusters` is false,
+     * and `clickData` features carry `cluster: {id, point_count}` plus the
+     * properties of up to `cluster_leaves` of its points as `leaves`.
+     * Layers with `send_selection` report the features of their geojson
+     * source caught by a box or lasso selection (see `selection_mode`).
      */
     layers: PropTypes.array,
 
@@ -865,9 +186,126 @@ DashMaplibre.propTypes = {
      *     }
      *   }
      * }
+     * Instead of `{[featureId]: any}`, a state key can hold the bulk form
+     * `{"ids": [...], "values": [...] or any}` (see `dash_maplibre.feature_state`).
+     * A null value clears the key for that feature. Only differences to the
+     * previously applied state are pushed to the map.
      */
     feature_state: PropTypes.object,
+
+    /**
+     * Milliseconds the camera has to rest after a move before `bounds`,
+     * `current_zoom` and `current_center` are reported.
+     */
+    viewport_debounce: PropTypes.number,
+
+    /**
+     * Name of a camera group: maps on the page with the same `sync_group`
+     * follow each other's moves directly in the browser, without Dash
+     * callbacks.
+     */
+    sync_group: PropTypes.string,
+
+    /**
+     * A time series played by the component itself, as built by
+     * `dash_maplibre.frame_animation`:
+     * `{source, source_layer, state_key, ids, values, frames, loop}`, where
+     * `values` holds `frames` x `ids.length` numbers, frame by frame (a
+     * packed array or a plain list). The current frame is written into the
+     * `state_key` feature state of the features, so paint expressions can
+     * use `["feature-state", state_key]`; NaN clears it.
+     */
+    animation: PropTypes.shape({
+        source: PropTypes.string.isRequired,
+        source_layer: PropTypes.string,
+        state_key: PropTypes.string,
+        ids: PropTypes.oneOfType([PropTypes.array, PropTypes.object]).isRequired,
+        values: PropTypes.oneOfType([PropTypes.array, PropTypes.object]).isRequired,
+        frames: PropTypes.number.isRequired,
+        loop: PropTypes.bool,
+    }),
+
+    /**
+     * Frame of `animation` to show. While `playing`, frames advance in the
+     * browser without updating this prop; it is set to the frame reached
+     * when playback stops.
+     */
+    current_frame: PropTypes.number,
+
+    /**
+     * Whether `animation` is playing. Set back to false when an animation
+     * without `loop` reaches its last frame.
+     */
+    playing: PropTypes.bool,
+
+    /**
+     * Playback speed of `animation` in frames per second.
+     */
+    fps: PropTypes.number,
+
+    /**
+     * Dragging on the map draws a `"box"` or `"lasso"` selection instead of
+     * panning; null (the default) turns selection off. A finished selection
+     * is reported through `selectedData`.
+     */
+    selection_mode: PropTypes.oneOf(["box", "lasso"]),
+
+    /**
+     * Output: the visible bounds as [[west, south], [east, north]], set once
+     * the camera settles after a move.
+     */
+    bounds: PropTypes.array,
+
+    /**
+     * Output: the zoom level, set once the camera settles after a move.
+     */
+    current_zoom: PropTypes.number,
+
+    /**
+     * Output: the center as [lng, lat], set once the camera settles after a move.
+     */
+    current_center: PropTypes.array,
+
+    /**
+     * Log component activity to the browser console and report timings
+     * through `perf_stats`. Off by default, which keeps the console silent.
+     */
+    debug: PropTypes.bool,
+
+    /**
+     * Output, only with `debug`: timings collected since the previous report,
+     * sent at most once per second, as
+     * `{timestamp, interval_ms, timings: {name: {count, total_ms, mean_ms,
+     * max_ms, last_ms}}, frames: {count, fps, mean_frame_ms}}`. Timed names
+     * are `style` (until the map is idle), `sources`, `source_data`,
+     * `layers`, `feature_state`, `hover` and `animation`. Every timing is
+     * also recorded as a `dash-maplibre:<name>` performance measure.
+     */
+    perf_stats: PropTypes.object,
+
+    /**
+     * Output: the last map click as
+     * `{layer, features: [{id, properties}], layers, lngLat: [lng, lat]}`,
+     * where `layer` is the topmost `send_click` layer under the pointer (null
+     * if no such layer was hit) and `features` its clicked features.
+     * `layers` maps every `send_click` layer that was hit to its features,
+     * `{layerId: [{id, properties}]}`. Clicked clusters also carry `cluster`.
+     */
+    clickData: PropTypes.object,
+
+    /**
+     * Output: the last box or lasso selection as
+     * `{mode, geometry, ids: {layerId: [...]}}`, where `geometry` is the
+     * selection as a GeoJSON Polygon and `ids` holds, for every
+     * `send_selection` layer whose source data is in the browser, the ids
+     * of its features intersecting the selection. Features of other
+     * sources can be looked up on the server with
+     * `dash_maplibre.select_features`.
+     */
+    selectedData: PropTypes.object,
 };
 
-export default DashMaplibre;
+DashMaplibre.defaultProps = defaultProps;
+DashMaplibre.propTypes = propTypes;
 
+export default DashMaplibre;
@@ -0,0 +1,1460 @@
+/* eslint-disable consistent-return */
+import React, { useRef, useEffect, useState, useLayoutEffect } from "react";
+import maplibregl from "maplibre-gl";
+import '../components/DashMaplibre.css';
+import 'maplibre-gl/dist/maplibre-gl.css';
+import Colorbar from '../components/Colorbar.react.js';
+import { propTypes, defaultProps } from '../components/DashMaplibre.react';
+import { expandSource, loadSharedSources, zoomDataKey } from '../utils/sources';
+import { joinCameraGroup } from '../utils/cameraSync';
+import { DEFAULT_STREAM_BATCH, streamFeatures } from '../utils/stream';
+import { zoomBreakpoints, zoomKey } from '../utils/zoomLevels';
+import { compileTemplate } from '../utils/template';
+import { getPointIndex, lngLatToWorld } from '../utils/pointIndex';
+import { applyFeatureState } from '../utils/featureState';
+import { applyFrame, clampFrame, clearAnimation, decodeAnimation } from '../utils/animation';
+import { selectFeatureIds } from '../utils/selection';
+import { Instrumentation } from '../utils/instrumentation';
+
+// Hover search radius in pixels, and MapLibre's tile size for pixel <-> world scaling
+const HOVER_FUZZ = 8;
+const HOVER_TILE_SIZE = 512;
+
+// perf_stats is reported at most once per interval; gaps between rendered
+// frames longer than FRAME_GAP_MS are idle time, not frame time
+const PERF_STATS_INTERVAL = 1000;
+const FRAME_GAP_MS = 250;
+
+// Lasso points closer than this many pixels to the previous one are dropped;
+// smaller selections count as clicks
+const LASSO_MIN_STEP = 3;
+const MIN_SELECTION_SIZE = 3;
+const SVG_NS = "http://www.w3.org/2000/svg";
+
+// Streamed features without ids are shown with setData, which resends all
+// features so far; it runs at most once per interval
+const STREAM_SET_DATA_INTERVAL = 1000;
+
+// Reported viewport values are rounded to these precisions
+const COORD_PRECISION = 1e6;
+const ZOOM_PRECISION = 100;
+
+function roundTo(value, precision) {
+    return Math.round(value * precision) / precision;
+}
+
+// MapLibre fetches tiles and data from web workers, which do not resolve
+// URLs relative to the page, so server-relative URLs (as returned by the
+// Python tile helpers) are made absolute before a source is added.
+function absoluteUrl(url) {
+    if (typeof url === "string" && url.startsWith("/") && !url.startsWith("//")) {
+        return window.location.origin + url;
+    }
+    return url;
+}
+
+function resolveSourceUrls(src) {
+    const resolved = { ...src };
+    if (Array.isArray(src.tiles)) {
+        resolved.tiles = src.tiles.map(absoluteUrl);
+    }
+    if (typeof src.url === "string") {
+        resolved.url = absoluteUrl(src.url);
+    }
+    if (typeof src.data === "string") {
+        resolved.data = absoluteUrl(src.data);
+    }
+    return resolved;
+}
+
+// Same for the sprite, glyphs and source URLs of a basemap style
+function resolveStyleUrls(style) {
+    if (typeof style === "string") {
+        return absoluteUrl(style);
+    }
+    if (!style || typeof style !== "object") {
+        return style;
+    }
+    const resolved = { ...style };
+    if (typeof style.sprite === "string") {
+        resolved.sprite = absoluteUrl(style.sprite);
+    } else if (Array.isArray(style.sprite)) {
+        resolved.sprite = style.sprite.map(s => ({ ...s, url: absoluteUrl(s.url) }));
+    }
+    if (typeof style.glyphs === "string") {
+        resolved.glyphs = absoluteUrl(style.glyphs);
+    }
+    if (style.sources) {
+        resolved.sources = {};
+        Object.entries(style.sources).forEach(([id, src]) => {
+            resolved.sources[id] = resolveSourceUrls(src);
+        });
+    }
+    return resolved;
+}
+
+// Popup of a cluster feature on layers without cluster_hover_html
+const DEFAULT_CLUSTER_HTML = "{point_count_abbreviated} points";
+
+// Features of clustered geojson sources that stand for several points
+function isCluster(feature) {
+    return Boolean(feature && feature.properties && feature.properties.cluster);
+}
+
+// Keep only the whitelisted keys when a layer sets click_properties
+function pickProperties(properties, whitelist) {
+    if (!Array.isArray(whitelist) || !properties) {
+        return properties;
+    }
+    const picked = {};
+    whitelist.forEach(key => {
+        if (key in properties) { picked[key] = properties[key]; }
+    });
+    return picked;
+}
+
+// A feature spanning several tiles is returned once per tile by queryRenderedFeatures
+function uniqueFeatures(features) {
+    const seen = new Set();
+    return features.filter(feature => {
+        if (typeof feature.id === "undefined") {return true;}
+        if (seen.has(feature.id)) {return false;}
+        seen.add(feature.id);
+        return true;
+    });
+}
+
+/*
+ * clickData entry for a clicked feature of a send_click layer. Clusters
+ * also report their id and leaf count, plus the properties of up to
+ * layer.cluster_leaves of their points.
+ */
+function describeClickedFeature(source, feature, layer) {
+    const described = { properties: pickProperties(feature.properties, layer.click_properties) };
+    if (typeof feature.id !== "undefined") {
+        described.id = feature.id;
+    }
+    if (!isCluster(feature)) {
+        return Promise.resolve(described);
+    }
+    const clusterId = feature.properties.cluster_id;
+    described.cluster = { id: clusterId, point_count: feature.properties.point_count };
+    const maxLeaves = layer.cluster_leaves;
+    if (!maxLeaves || !source || typeof source.getClusterLeaves !== "function") {
+        return Promise.resolve(described);
+    }
+    return source.getClusterLeaves(clusterId, maxLeaves, 0)
+        .then(leaves => {
+            described.cluster.leaves = leaves.map(leaf => pickProperties(leaf.properties, layer.click_properties));
+            return described;
+        })
+        .catch(err => {
+            console.error("[DashMaplibre] Could not get cluster leaves", err);
+            return described;
+        });
+}
+
+// Above this share of changed features a full setData is cheaper than a diff
+const MAX_DIFF_RATIO = 0.5;
+
+function getFeatureId(feature, promoteId) {
+    if (typeof promoteId === "string") {
+        return feature.properties ? feature.properties[promoteId] : null;
+    }
+    return feature.id;
+}
+
+// Build the property part of a MapLibre GeoJSONFeatureDiff
+function diffProperties(prevProps, nextProps, update) {
+    const prev = prevProps || {};
+    const next = nextProps || {};
+    const changed = Object.keys(next)
+        .filter(key => prev[key] !== next[key])
+        .map(key => ({ key, value: next[key] }));
+    const removed = Object.keys(prev).filter(key => !(key in next));
+    if (changed.length > 0) { update.addOrUpdateProperties = changed; }
+    if (removed.length > 0) { update.removeProperties = removed; }
+}
+
+/*
+ * Compute a MapLibre GeoJSONSourceDiff between two FeatureCollections.
+ * Dash applies Patch() updates with structural sharing, so unchanged
+ * features keep their identity and an identity check is enough to find
+ * the touched ones. Returns null when a diff cannot be used (not
+ * FeatureCollections, missing or duplicate ids, or too many changes),
+ * in which case the caller falls back to setData.
+ */
+function diffGeoJSONData(prevData, nextData, promoteId) {
+    if (
+        !prevData || !nextData ||
+        prevData.type !== "FeatureCollection" || nextData.type !== "FeatureCollection" ||
+        !Array.isArray(prevData.features) || !Array.isArray(nextData.features)
+    ) {
+        return null;
+    }
+    const prevById = new Map();
+    for (const feature of prevData.features) {
+        const fid = getFeatureId(feature, promoteId);
+        if (fid === null || typeof fid === "undefined" || prevById.has(fid)) { return null; }
+        prevById.set(fid, feature);
+    }
+
+    const maxChanges = Math.max(1, nextData.features.length * MAX_DIFF_RATIO);
+    const seen = new Set();
+    const add = [];
+    const update = [];
+    for (const feature of nextData.features) {
+        const fid = getFeatureId(feature, promoteId);
+        if (fid === null || typeof fid === "undefined" || seen.has(fid)) { return null; }
+        seen.add(fid);
+        const prev = prevById.get(fid);
+        if (!prev) {
+            add.push(feature);
+        } else if (prev !== feature) {
+            const featureUpdate = { id: fid };
+            if (prev.geometry !== feature.geometry) {
+                featureUpdate.newGeometry = feature.geometry;
+            }
+            if (prev.properties !== feature.properties) {
+                diffProperties(prev.properties, feature.properties, featureUpdate);
+            }
+            if (Object.keys(featureUpdate).length > 1) {
+                update.push(featureUpdate);
+            }
+        }
+        if (add.length + update.length > maxChanges) { return null; }
+    }
+    const remove = [];
+    prevById.forEach((_feature, fid) => {
+        if (!seen.has(fid)) { remove.push(fid); }
+    });
+    if (add.length + update.length + remove.length > maxChanges) { return null; }
+    return { add, update, remove };
+}
+
+// Key of the colorbar_map breakpoint shown at zoom; null for a single
+// colorbar config (legacy style) or below the first breakpoint
+function getColorbarKey(colorbar_map, zoom) {
+    const breakpoints = zoomBreakpoints(colorbar_map);
+    return breakpoints ? zoomKey(breakpoints, zoom) : null;
+}
+
+// The colorbar config for a breakpoint key from getColorbarKey
+function getColorbar(colorbar_map, key) {
+    if (!colorbar_map) {return null;}
+    if (!zoomBreakpoints(colorbar_map)) {
+        // Legacy style: treat as a single colorbar config
+        return colorbar_map;
+    }
+    return key === null ? null : colorbar_map[key] || null;
+}
+
+// The map implementation, loaded on demand by components/DashMaplibre.react.js;
+// defaults come from its defaultProps.
+const DashMaplibre = ({
+    id,
+    basemap,
+    center,
+    zoom,
+    max_bounds,
+    bearing,
+    pitch,
+    sources,
+    layers,
+    style,
+    colorbar_map,
+    colorbar_risk,
+    setProps,
+    version,
+    feature_state,
+    viewport_debounce,
+    sync_group,
+    animation,
+    current_frame,
+    playing,
+    fps,
+    selection_mode,
+    debug,
+    // Output-only props, kept out of the MapLibre options in otherProps
+    // eslint-disable-next-line no-unused-vars
+    bounds, current_zoom, current_center, clickData, perf_stats, selectedData,
+    ...otherProps
+}) => {
+    const mapContainer = useRef(null);
+    const mapRef = useRef(null);
+    const prevLayersRef = useRef([]);
+    // Source definitions last pushed to the map, keyed by source id
+    const prevSourcesRef = useRef({});
+    // Feature state last pushed to the map (see utils/featureState)
+    const appliedFeatureStateRef = useRef(new Map());
+    // Running loads of "geojson-stream" sources, keyed by source id: {raw, controller}
+    const streamsRef = useRef({});
+    // Animation values last written to feature state (see utils/animation),
+    // and the frame shown, which runs ahead of current_frame while playing
+    const animationAppliedRef = useRef(null);
+    const frameRef = useRef(current_frame);
+    const [visibleLayers, setVisibleLayers] = useState(() => layers.filter(l => l.display_name).map(l => l.id));
+    const [styleLoaded, setStyleLoaded] = useState(false);
+    const savedViewRef = useRef({ center, zoom });
+    const legendLayers = layers.filter(l => l.display_name);
+    // Only the colorbar_map breakpoint is kept in state, so zooming within
+    // a breakpoint does not re-render the component
+    const [colorbarKey, setColorbarKey] = useState(() => getColorbarKey(colorbar_map, zoom));
+    // Bumped when shared source data arrives, to add those sources and their layers
+    const [sharedSourcesLoaded, setSharedSourcesLoaded] = useState(0);
+
+    // Logging and timings are only active with the debug prop
+    const debugRef = useRef(debug);
+    debugRef.current = debug;
+    const instrumentationRef = useRef(null);
+
+    function log(...args) {
+        if (debugRef.current) {
+            console.log("[DashMaplibre]", ...args);
+        }
+    }
+
+    function measure(name, fn) {
+        return instrumentationRef.current ? instrumentationRef.current.time(name, fn) : fn();
+    }
+
+    // 1. Initialize map only once
+    useEffect(() => {
+        log("Initializing MapLibre map");
+        if (!mapRef.current) {
+            mapRef.current = new maplibregl.Map({
+                container: mapContainer.current,
+                center,
+                zoom,
+                bearing,
+                pitch,
+                maxBounds: max_bounds,
+                ...otherProps
+            });
+            // Add compass control (reset north button)
+            mapRef.current.addControl(
+                new maplibregl.NavigationControl({
+                    showCompass: true,
+                    showZoom: false,
+                    visualizePitch: true
+                }),
+                "bottom-left"
+            );
+            window._map = mapRef.current;
+        }
+        return () => {
+            if (mapRef.current) {
+                mapRef.current.remove();
+                mapRef.current = null;
+            }
+        };
+    }, []);
+
+    // 1b. Collect timings and frame stats while debug is set
+    useEffect(() => {
+        if (!debug || !mapRef.current || !setProps) {return;}
+
+        const map = mapRef.current;
+        const instrumentation = new Instrumentation(
+            stats => setProps({ perf_stats: stats }),
+            PERF_STATS_INTERVAL
+        );
+        instrumentationRef.current = instrumentation;
+        let lastFrame = null;
+        function onRender() {
+            const time = window.performance.now();
+            if (lastFrame !== null && time - lastFrame < FRAME_GAP_MS) {
+                instrumentation.recordFrame(time - lastFrame);
+            }
+            lastFrame = time;
+        }
+        map.on('render', onRender);
+        return () => {
+            map.off('render', onRender);
+            instrumentation.stop();
+            instrumentationRef.current = null;
+        };
+    }, [debug]);
+
+    // 2. Handle basemap (style) changes
+    // The new basemap is diffed against the current style, with the app's
+    // sources and layers carried over unchanged, so switching basemaps keeps
+    // app data resident in the workers and on the GPU and only costs the
+    // basemap's own sources and layers.
+    useLayoutEffect(() => {
+        if (!mapRef.current) {return;}
+
+        log("Updating basemap/style");
+        const map = mapRef.current;
+
+        function carryOverAppStyle(previousStyle, fetchedStyle) {
+            // Styles fetched from a URL (e.g. served by register_basemap) may
+            // use server-relative resource URLs too
+            const nextStyle = resolveStyleUrls(fetchedStyle);
+            if (!previousStyle) {return nextStyle;}
+            const appLayerIds = new Set(prevLayersRef.current.map(l => l.id));
+            const sources = { ...nextStyle.sources };
+            Object.keys(prevSourcesRef.current).forEach(sourceId => {
+                if (previousStyle.sources && previousStyle.sources[sourceId]) {
+                    // Reuse the serialized definition so the diff sees no change
+                    sources[sourceId] = previousStyle.sources[sourceId];
+                }
+            });
+            const appLayers = (previousStyle.layers || []).filter(l => appLayerIds.has(l.id));
+            return {
+                ...nextStyle,
+                sources,
+                layers: (nextStyle.layers || []).filter(l => !appLayerIds.has(l.id)).concat(appLayers)
+            };
+        }
+
+        // Only fired when the style is built from scratch (first basemap, or a
+        // diff MapLibre could not apply): app state has to be re-established.
+        function onStyleLoad() {
+            setStyleLoaded(false);
+            prevLayersRef.current = [];
+            prevSourcesRef.current = {};
+            appliedFeatureStateRef.current.clear();
+            animationAppliedRef.current = null;
+            map.once('idle', () => {
+                log("Basemap/style loaded");
+                setStyleLoaded(true);
+            });
+        }
+        map.once('style.load', onStyleLoad);
+        const styleStart = window.performance.now();
+        map.once('idle', () => {
+            if (instrumentationRef.current) {
+                instrumentationRef.current.record("style", styleStart);
+            }
+        });
+        map.setStyle(resolveStyleUrls(basemap), { diff: true, transformStyle: carryOverAppStyle });
+        return () => {
+            map.off('style.load', onStyleLoad);
+        };
+    }, [basemap]);
+
+    // 3. Add/update sources after style is loaded
+    useEffect(() => {
+        if (!mapRef.current || !styleLoaded) {return;}
+
+        log("Updating sources");
+        measure("sources", () => updateSources(mapRef.current));
+
+        const loading = loadSharedSources(sources);
+        if (!loading) {return;}
+        let cancelled = false;
+        loading.then(() => {
+            if (!cancelled) {setSharedSourcesLoaded(n => n + 1);}
+        });
+        return () => {
+            cancelled = true;
+        };
+    }, [sources, styleLoaded, sharedSourcesLoaded]);
+
+    function updateSources(map) {
+        const mapZoom = map.getZoom();
+        Object.entries(sources).forEach(([id, rawSrc]) => {
+            let src;
+            try { src = expandSource(rawSrc, mapZoom); } catch (err) {
+                console.error("[DashMaplibre] Could not decode source:", id, err);
+                return;
+            }
+            // Shared sources whose data has not arrived yet
+            if (!src) {return;}
+            // Safety: skip empty or invalid geojson sources
+            if (
+                src &&
+                src.type === "geojson" &&
+                (
+                    !src.data ||
+                    typeof src.data !== "object" ||
+                    Object.keys(src.data).length === 0 ||
+                    !src.data.type
+                )
+            ) {
+                // Skip invalid/empty geojson
+                return;
+            }
+
+            // Add source if missing, or update data if geojson source already exists
+            const existing = map.getSource(id);
+            const prev = prevSourcesRef.current[id];
+            if (!existing) {
+                try { map.addSource(id, resolveSourceUrls(src)); } catch (err) {
+                console.error(err);
+            }
+                // A fresh source has no feature state yet
+                appliedFeatureStateRef.current.delete(id);
+                if (animation && animation.source === id) {
+                    animationAppliedRef.current = null;
+                }
+            } else if (src.type === "geojson" && prev !== src && (!prev || prev.data !== src.data)) {
+                // Only touched features are sent to the worker when possible
+                const diff = prev && typeof existing.updateData === "function"
+                    ? diffGeoJSONData(prev.data, src.data, src.promoteId)
+                    : null;
+                if (diff) {
+                    if (diff.add.length || diff.update.length || diff.remove.length) {
+                        log("Updating geojson source features for:", id);
+                        measure("source_data", () => existing.updateData(diff));
+                    }
+                } else {
+                    log("Updating geojson source data for:", id);
+                    measure("source_data", () => existing.setData(src.data));
+                }
+            }
+            prevSourcesRef.current[id] = src;
+            if (rawSrc.type === "geojson-stream") {
+                startStream(map, id, rawSrc, src);
+            }
+        });
+        Object.keys(streamsRef.current).forEach(id => {
+            if (!(id in sources)) {
+                streamsRef.current[id].controller.abort();
+                delete streamsRef.current[id];
+            }
+        });
+    }
+
+    // Append the features of a "geojson-stream" source in batches as they arrive
+    function startStream(map, id, rawSrc, src) {
+        const running = streamsRef.current[id];
+        if (running && running.raw === rawSrc) {return;}
+        if (running) {running.controller.abort();}
+        const controller = new window.AbortController();
+        streamsRef.current[id] = { raw: rawSrc, controller };
+
+        log("Streaming source:", id);
+        let lastSetData = -Infinity;
+        let setDataTimer = null;
+        function setData() {
+            setDataTimer = null;
+            lastSetData = window.performance.now();
+            const source = map.getSource(id);
+            if (source) {measure("source_data", () => source.setData(src.data));}
+        }
+        controller.signal.addEventListener("abort", () => window.clearTimeout(setDataTimer));
+
+        function onBatch(batch) {
+            const features = src.data.features;
+            batch.forEach(feature => features.push(feature));
+            // A new data object, so caches keyed by it (hover index) are rebuilt
+            src.data = { type: "FeatureCollection", features };
+            const source = map.getSource(id);
+            if (!source || setDataTimer !== null) {return;}
+            // Only the new features go to the worker when they have ids
+            const canAdd = typeof source.updateData === "function" &&
+                (src.promoteId || batch.every(feature => feature.id !== undefined));
+            if (canAdd) {
+                measure("source_data", () => source.updateData({ add: batch }));
+                return;
+            }
+            // Otherwise coalesce batches, so the features are not resent per batch
+            const wait = lastSetData + STREAM_SET_DATA_INTERVAL - window.performance.now();
+            if (wait <= 0) {
+                setData();
+            } else {
+                setDataTimer = window.setTimeout(setData, wait);
+            }
+        }
+        streamFeatures(absoluteUrl(rawSrc.url), rawSrc.batch_size || DEFAULT_STREAM_BATCH, onBatch, controller.signal)
+            .then(() => {
+                // Show the last batches right away
+                if (setDataTimer !== null) {
+                    window.clearTimeout(setDataTimer);
+                    setData();
+                }
+            })
+            .catch(err => {
+                if (err.name !== "AbortError") {
+                    console.error("[DashMaplibre] Could not stream source:", id, err);
+                }
+            });
+    }
+
+    // 3c. Stop streaming sources when the component unmounts
+    useEffect(() => () => {
+        Object.values(streamsRef.current).forEach(stream => stream.controller.abort());
+    }, []);
+
+    // 3b. Swap zoom_data variants of sources as the zoom crosses their breakpoints
+    useEffect(() => {
+        if (!mapRef.current || !styleLoaded) {return;}
+        const zoomSources = Object.values(sources).filter(src => src && src.zoom_data);
+        if (zoomSources.length === 0) {return;}
+
+        const map = mapRef.current;
+        const variantKeys = () => zoomSources.map(src => zoomDataKey(src, map.getZoom())).join("|");
+        let current = variantKeys();
+        function onZoom() {
+            const next = variantKeys();
+            if (next !== current) {
+                current = next;
+                log("Switching zoom variants of sources");
+                measure("sources", () => updateSources(map));
+            }
+        }
+        map.on('zoom', onZoom);
+        return () => {
+            map.off('zoom', onZoom);
+        };
+    }, [sources, styleLoaded]);
+
+    // 4. Add/remove/update app layers after style and sources are ready
+    // Layers keep their identity across Dash updates unless they were
+    // changed, so only new or changed layer definitions are patched. A
+    // sources-only update just adds or removes layers whose source appeared
+    // or disappeared.
+    useEffect(() => {
+        if (!mapRef.current || !styleLoaded) {return;}
+
+        log("Updating layers");
+        measure("layers", () => reconcileLayers(mapRef.current));
+    }, [layers, sources, styleLoaded, sharedSourcesLoaded]);
+
+    function reconcileLayers(map) {
+        const prevLayers = prevLayersRef.current;
+        const layersChanged = prevLayers !== layers;
+        const prevById = new Map(prevLayers.map(l => [l.id, l]));
+        const layerIds = new Set(layers.map(l => l.id));
+
+        // Remove app layers whose source is missing or which are no longer in the layers prop
+        prevLayers.forEach(layer => {
+            if ((!layerIds.has(layer.id) || !map.getSource(layer.source)) && map.getLayer(layer.id)) {
+                map.removeLayer(layer.id);
+            }
+        });
+
+        // Walk backwards so the next layer on the map is known when inserting
+        let beforeId = null;
+        for (let idx = layers.length - 1; idx >= 0; idx--) {
+            const layer = layers[idx];
+            if (Object.keys(layer).length === 0) {
+                // Empty layer definition, skip
+                continue;
+            }
+            const prev = prevById.get(layer.id);
+            if (
+                prev && prev !== layer && map.getLayer(layer.id) &&
+                (prev.type !== layer.type || prev.source !== layer.source || prev["source-layer"] !== layer["source-layer"])
+            ) {
+                // Type and source cannot be patched in place
+                map.removeLayer(layer.id);
+            }
+            if (!map.getLayer(layer.id)) {
+                if (!map.getSource(layer.source)) {
+                    log("Not adding app layer (missing source):", layer.id, "source:", layer.source);
+                    continue;
+                }
+                try { map.addLayer(layer, beforeId || undefined); } catch (err) { console.warn("addLayer failed", layer.id, err); }
+            } else if (layersChanged && prev !== layer) {
+                patchLayerProperties(map, layer, prev);
+            }
+            if (map.getLayer(layer.id)) {
+                beforeId = layer.id;
+            }
+        }
+
+        // Update prevLayersRef to only track app layers
+        prevLayersRef.current = layers;
+
+        // Dispatch a DOM event to signal that layers have been updated
+        const event = new CustomEvent('layers-updated', {
+            detail: { message: 'Layers have been updated' },
+        });
+        window.dispatchEvent(event);
+    }
+
+    // 4b. Apply feature-state once style and sources are ready, pushing only changes.
+    // Shared sources are added once fetched, so their state is applied then.
+    useEffect(() => {
+        if (!mapRef.current || !styleLoaded) { return; }
+
+        try {
+            const calls = measure(
+                "feature_state",
+                () => applyFeatureState(mapRef.current, feature_state, appliedFeatureStateRef.current)
+            );
+            if (calls > 0) {
+                log("Applied feature_state changes:", calls);
+            }
+        } catch (err) {
+            console.error("Error applying feature_state", err);
+        }
+    }, [feature_state, sources, styleLoaded, sharedSourcesLoaded]);
+
+
+    // 5. Hover popups for layers with hover_html
+    useEffect(() => {
+        if (!mapRef.current) {return;}
+        
+        log("Setting up hover popups");
+        const map = mapRef.current;
+        let popup = null;
+        // Layer and feature the popup currently shows, to skip re-rendering it
+        let popupKey = null;
+        let frame = null;
+        let lastEvent = null;
+
+        // Collect all layers with hover_html, split by lookup strategy
+        const hoverLayers = layers.filter(l => l.hover_html);
+        const layerById = new Map(hoverLayers.map(l => [l.id, l]));
+        // The KD-tree holds the raw points, so clustered sources are queried
+        const isIndexed = l => l.hover_index && !(sources[l.source] && sources[l.source].cluster);
+        const queriedIds = hoverLayers.filter(l => !isIndexed(l)).map(l => l.id);
+        const indexedLayers = hoverLayers.filter(isIndexed);
+
+        function isShown(layer) {
+            if (!map.getLayer(layer.id)) {return false;}
+            if (map.getLayoutProperty(layer.id, "visibility") === "none") {return false;}
+            const mapZoom = map.getZoom();
+            return !(
+                (typeof layer.minzoom === "number" && mapZoom < layer.minzoom) ||
+                (typeof layer.maxzoom === "number" && mapZoom >= layer.maxzoom)
+            );
+        }
+
+        // Nearest point of indexed layers, looked up in a KD-tree of the source data
+        function findIndexedFeature(point) {
+            let best = null;
+            const scale = HOVER_TILE_SIZE * Math.pow(2, map.getZoom());
+            indexedLayers.forEach(layer => {
+                if (!isShown(layer)) {return;}
+                const src = expandSource(sources[layer.source], map.getZoom());
+                const data = src && src.data;
+                const index = getPointIndex(data);
+                if (!index) {return;}
+                const lngLat = map.unproject(point);
+                const [x, y] = lngLatToWorld(lngLat.lng, lngLat.lat);
+                const featureIndex = index.nearest(x, y, HOVER_FUZZ / scale);
+                if (featureIndex < 0) {return;}
+                const feature = data.features[featureIndex];
+                const screen = map.project(feature.geometry.coordinates);
+                const dist = Math.hypot(point.x - screen.x, point.y - screen.y);
+                if (!best || dist < best.dist) {
+                    best = {
+                        feature,
+                        layer,
+                        dist,
+                        key: `${layer.id}:${feature.id ?? featureIndex}`
+                    };
+                }
+            });
+            return best;
+        }
+
+        // Nearest rendered feature of the remaining layers
+        function findQueriedFeature(point) {
+            const existing = queriedIds.filter((id) => Boolean(map.getLayer(id)));
+            if (existing.length === 0) {return null;}
+            const bbox = [
+                [point.x - HOVER_FUZZ, point.y - HOVER_FUZZ],
+                [point.x + HOVER_FUZZ, point.y + HOVER_FUZZ]
+            ];
+            const features = map.queryRenderedFeatures(bbox, { layers: existing });
+            let best = null;
+            for (const feature of features) {
+                const coords = feature.geometry.coordinates;
+                // Project feature coordinates to screen point
+                const screen = map.project(Array.isArray(coords[0]) ? coords[0] : coords);
+                const dist = Math.hypot(point.x - screen.x, point.y - screen.y);
+                if (!best || dist < best.dist) {
+                    best = { feature, layer: layerById.get(feature.layer.id), dist };
+                }
+            }
+            if (best) {
+                let fid = typeof best.feature.id === "undefined"
+                    ? JSON.stringify(best.feature.properties)
+                    : best.feature.id;
+                if (isCluster(best.feature)) {
+                    fid = `cluster:${best.feature.properties.cluster_id}`;
+                }
+                best.key = `${best.layer.id}:${fid}`;
+            }
+            return best;
+        }
+
+        function renderHtml(layer, feature) {
+            const template = isCluster(feature)
+                ? (layer.cluster_hover_html || DEFAULT_CLUSTER_HTML)
+                : layer.hover_html;
+            if (typeof template === "function") {
+                return template(feature);
+            }
+            if (feature.properties) {
+                return compileTemplate(template)(feature.properties);
+            }
+            return template;
+        }
+
+        function removePopup() {
+            if (popup) {
+                popup.remove();
+                popup = null;
+            }
+            popupKey = null;
+        }
+
+        function updateHover() {
+            frame = null;
+            const e = lastEvent;
+            const indexed = findIndexedFeature(e.point);
+            const queried = findQueriedFeature(e.point);
+            const closest = indexed && (!queried || indexed.dist <= queried.dist) ? indexed : queried;
+
+            if (!closest) {
+                // Remove popup if no feature is close
+                removePopup();
+                map.getCanvas().style.cursor = '';
+                return;
+            }
+
+            const { feature, layer } = closest;
+            const isPoint = feature.geometry.type === "Point";
+            if (closest.key !== popupKey) {
+                if (!popup) {
+                    popup = new maplibregl.Popup({ closeButton: false, closeOnClick: false, className: "dash-maplibre-popup" });
+                }
+                popup
+                    .setLngLat(isPoint ? feature.geometry.coordinates : e.lngLat)
+                    .setHTML(renderHtml(layer, feature))
+                    .addTo(map);
+                popupKey = closest.key;
+            } else if (!isPoint) {
+                // Same feature: follow the pointer without re-rendering the html
+                popup.setLngLat(e.lngLat);
+            }
+            map.getCanvas().style.cursor = 'pointer';
+        }
+
+        // Hover lookups run at most once per animation frame
+        function onMouseMove(e) {
+            lastEvent = e;
+            if (frame === null) {
+                frame = window.requestAnimationFrame(() => measure("hover", updateHover));
+            }
+        }
+
+        // Remove popup when mouse leaves the map
+        function onMapMouseLeave() {
+            if (frame !== null) {
+                window.cancelAnimationFrame(frame);
+                frame = null;
+            }
+            removePopup();
+            map.getCanvas().style.cursor = '';
+        }
+
+        if (hoverLayers.length > 0) {
+            map.on('mousemove', onMouseMove);
+            map.getCanvas().addEventListener('mouseleave', onMapMouseLeave);
+        }
+
+        // Cleanup
+        return () => {
+            map.off('mousemove', onMouseMove);
+            map.getCanvas().removeEventListener('mouseleave', onMapMouseLeave);
+            if (frame !== null) {
+                window.cancelAnimationFrame(frame);
+            }
+            removePopup();
+        };
+    }, [layers, sources, styleLoaded]);
+
+    // 6. Camera updates
+    useEffect(() => {
+        if (!mapRef.current) {return;}
+
+        log("Updating camera view");
+        const map = mapRef.current;
+        if (center && typeof zoom === "number") {
+            savedViewRef.current = { center, zoom };
+        }
+        if (typeof zoom === "number" && map.getZoom() !== zoom) {
+            map.setZoom(zoom);
+        }
+        if (center) {
+            const curr = map.getCenter();
+            if (curr.lng !== center[0] || curr.lat !== center[1]) {
+                map.setCenter(center);
+            }
+        }
+        if (typeof bearing === "number" && map.getBearing() !== bearing) {
+            map.setBearing(bearing);
+        }
+        if (typeof pitch === "number" && map.getPitch() !== pitch) {
+            map.setPitch(pitch);
+        }
+    }, [center, zoom, bearing, pitch]);
+
+    // 7. Layer visibility toggling
+    useEffect(() => {
+        if (!mapRef.current) {return;}
+
+        log("Updating layer visibility");
+        layers.forEach(layer => {
+            if (!layer.display_name) {return;}
+            if (mapRef.current.getLayer(layer.id)) {
+                mapRef.current.setLayoutProperty(
+                    layer.id,
+                    "visibility",
+                    visibleLayers.includes(layer.id) ? "visible" : "none"
+                );
+            }
+        });
+    }, [visibleLayers, layers, styleLoaded]);
+
+    // 8. Sync visibleLayers state with layers prop
+    useEffect(() => {
+        log("Syncing visibleLayers state with layers prop");
+        const validIds = layers.filter(l => l.display_name).map(l => l.id);
+        setVisibleLayers(vs => {
+            if (
+                vs.length === validIds.length &&
+                vs.every((id, i) => id === validIds[i])
+            ) {
+                return vs;
+            }
+            return validIds;
+        });
+    }, [layers]);
+
+    // 9. Double-click to restore view
+    useEffect(() => {
+        if (!mapRef.current) {return;}
+
+        log("Setting up double-click to restore view");
+        const map = mapRef.current;
+        map.doubleClickZoom.disable();
+        function handleDblClick(_e) {
+            if (savedViewRef.current) {
+                map.flyTo({
+                    center: savedViewRef.current.center,
+                    zoom: savedViewRef.current.zoom,
+                    bearing: 0,
+                    pitch: 0,
+                });
+            }
+        }
+        map.on('dblclick', handleDblClick);
+        return () => { 
+            map.off('dblclick', handleDblClick); 
+        };
+    }, []);
+
+    // 10. Handle layer clicks
+    // A single rendered-feature query per click covers all send_click
+    // layers; the topmost layer that was hit is reported as `layer`, the
+    // features of every hit layer under `layers`.
+    useEffect(() => {
+        if (!mapRef.current) {return;}
+
+        log("Setting up layer click handlers");
+        const map = mapRef.current;
+        const clickLayers = new Map(layers.filter(layer => layer.send_click).map(layer => [layer.id, layer]));
+        if (clickLayers.size === 0) {return;}
+
+        function describeLayerHits(layer, hits) {
+            let features = uniqueFeatures(hits.filter(f => f.layer.id === layer.id));
+            if (typeof layer.click_max_features === "number") {
+                features = features.slice(0, layer.click_max_features);
+            }
+            const source = map.getSource(layer.source);
+            return Promise.all(features.map(f => describeClickedFeature(source, f, layer)));
+        }
+
+        function onClick(e) {
+            if (!setProps) {return;}
+            const lngLat = [roundTo(e.lngLat.lng, COORD_PRECISION), roundTo(e.lngLat.lat, COORD_PRECISION)];
+            const existing = Array.from(clickLayers.keys()).filter((id) => Boolean(map.getLayer(id)));
+            const hits = existing.length > 0 ? map.queryRenderedFeatures(e.point, { layers: existing }) : [];
+            if (hits.length === 0) {
+                setProps({ clickData: { layer: null, features: [], layers: {}, lngLat } });
+                return;
+            }
+
+            // Rendered features are ordered top to bottom
+            const hitLayerIds = Array.from(new Set(hits.map(f => f.layer.id)));
+            const topLayer = clickLayers.get(hitLayerIds[0]);
+            const source = map.getSource(topLayer.source);
+            const cluster = hits.find(f => f.layer.id === topLayer.id && isCluster(f));
+            if (cluster && topLayer.expand_clusters !== false && source && typeof source.getClusterExpansionZoom === "function") {
+                // Zoom in far enough for the cluster to break apart
+                source.getClusterExpansionZoom(cluster.properties.cluster_id)
+                    .then(expansionZoom => {
+                        map.easeTo({ center: cluster.geometry.coordinates, zoom: expansionZoom });
+                    })
+                    .catch(err => console.error("[DashMaplibre] Could not expand cluster", err));
+            }
+            Promise.all(
+                hitLayerIds.map(id => describeLayerHits(clickLayers.get(id), hits))
+            ).then(described => {
+                const byLayer = {};
+                hitLayerIds.forEach((id, i) => { byLayer[id] = described[i]; });
+                setProps({
+                    clickData: {
+                        layer: topLayer.id,
+                        features: byLayer[topLayer.id],
+                        layers: byLayer,
+                        lngLat
+                    }
+                });
+            });
+        }
+        map.on('click', onClick);
+
+        // Cleanup
+        return () => {
+            map.off('click', onClick);
+        };
+    }, [layers]);
+
+    // 11. Render legend
+    function renderLegend(legendLayers, visibleLayers, setVisibleLayers, version) {
+        return (
+            <div style={{
+                position: "absolute",
+                top: 0,
+                left: 0,
+                background: "var(--mantine-color-body)",
+                padding: 6,
+                zIndex: 10,
+                boxShadow: "0 2px 8px rgba(0,0,0,0.13)",
+                minWidth: 120
+            }}>
+                {legendLayers.map(layer => {
+                    let color =
+                        layer.paint?.["circle-color"] ||
+                        layer.paint?.["fill-color"] ||
+                        layer.paint?.["line-color"] ||
+                        "#ccc";
+                    if (Array.isArray(color)) { color = "#ccc"; }
+                    let swatch = null;
+                    if (layer.type === "circle") {
+                        swatch = (
+                            <span style={{
+                                display: "inline-block",
+                                width: 12,
+                                height: 12,
+                                borderRadius: 6,
+                                marginRight: 13,
+                                marginLeft: 3,
+                                background: color
+                            }} />
+                        );
+                    } else if (layer.type === "fill") {
+                        swatch = (
+                            <span style={{
+                                display: "inline-block",
+                                width: 20,
+                                height: 12,
+                                marginRight: 10,
+                                background: color
+                            }} />
+                        );
+                    } else if (layer.type === "line") {
+                        swatch = (
+                            <svg width={20} height={16} style={{marginRight: 10, verticalAlign: "middle"}}>
+                                <line x1={2} y1={8} x2={18} y2={8} stroke={color} strokeWidth={4}/>
+                            </svg>
+                        );
+                    } else {
+                        swatch = (
+                            <span style={{
+                                display: "inline-block",
+                                width: 20,
+                                height: 12,
+                                marginRight: 10,
+                                background: "#ccc",
+                                border: "1px solid #999"
+                            }} />
+                        );
+                    }
+                    return (
+                        <div
+                            key={layer.id}
+                            style={{
+                                display: "flex",
+                                alignItems: "center",
+                                cursor: "pointer",
+                                fontWeight: "normal",
+                                opacity: visibleLayers.includes(layer.id) ? 1 : 0.5,
+                                userSelect: "none"
+                            }}
+                            onClick={() => {
+                                setVisibleLayers(vs =>
+                                    vs.includes(layer.id)
+                                        ? vs.filter(id => id !== layer.id)
+                                        : [...vs, layer.id]
+                                );
+                            }}
+                            title={layer.id}
+                        >
+                            {swatch}
+                            <span>{layer.display_name}</span>
+                        </div>
+                    );
+                })}
+                {version && (
+                    <div
+                        style={{
+                            textAlign: "right",
+                            color: "var(--mantine-color-text)",
+                            fontSize: "0.6em",
+                            userSelect: "none"
+                        }}
+                    >
+                        {version}
+                    </div>
+                )}
+            </div>
+        );
+    }
+
+    // 12. Patch layer properties
+    // Keys are compared with the previous definition of the layer (by
+    // identity, as Dash keeps unchanged values); without one every key is
+    // set and MapLibre skips the unchanged ones itself.
+    function patchLayerProperties(map, layer, prevLayer = {}) {
+        const mapLayer = map.getLayer(layer.id);
+        if (!mapLayer) {return;}
+
+        // PATCH PAINT AND LAYOUT PROPERTIES
+        [["paint", map.setPaintProperty], ["layout", map.setLayoutProperty]].forEach(([group, setProperty]) => {
+            const next = layer[group] || {};
+            const prev = prevLayer[group] || {};
+            if (next === prev) {return;}
+            Object.entries(next).forEach(([k, v]) => {
+                if (prev[k] === v) {return;}
+                try {
+                    setProperty.call(map, layer.id, k, v);
+                } catch (err) {
+                    console.error(err);
+                }
+            });
+            // Keys dropped from the definition go back to their defaults
+            Object.keys(prev).forEach(k => {
+                if (k in next) {return;}
+                try {
+                    setProperty.call(map, layer.id, k, undefined);
+                } catch (err) {
+                    console.error(err);
+                }
+            });
+        });
+
+        // PATCH FILTER
+        if (layer.filter !== prevLayer.filter && ('filter' in layer || 'filter' in prevLayer)) {
+            try {
+                map.setFilter(layer.id, layer.filter);
+            } catch (err) {
+                console.error(err);
+            }
+        }
+
+        // PATCH MINZOOM/MAXZOOM
+        const minzoom = 'minzoom' in layer ? layer.minzoom : mapLayer.minzoom;
+        const maxzoom = 'maxzoom' in layer ? layer.maxzoom : mapLayer.maxzoom;
+        if (mapLayer.minzoom !== minzoom || mapLayer.maxzoom !== maxzoom) {
+            try {
+                map.setLayerZoomRange(layer.id, minzoom, maxzoom);
+            } catch (err) {
+                console.error(err);
+            }
+        }
+    }
+
+    // 13. Listen for zoom changes on the map
+    useEffect(() => {
+        if (!mapRef.current) {return;}
+        
+        log("Setting up zoom listener");
+        const map = mapRef.current;
+        function onZoom() {
+            // React skips the re-render while the key stays the same
+            setColorbarKey(getColorbarKey(colorbar_map, map.getZoom()));
+        }
+        map.on('zoom', onZoom);
+        // Set initial breakpoint
+        onZoom();
+        return () => {
+            map.off('zoom', onZoom);
+        };
+    }, [styleLoaded, colorbar_map]);
+
+    // 14. Report the viewport back to Dash once the camera settles
+    useEffect(() => {
+        if (!mapRef.current || !setProps) {return;}
+
+        log("Setting up viewport reporting");
+        const map = mapRef.current;
+        let timer = null;
+        let lastReported = null;
+
+        function reportViewport() {
+            timer = null;
+            const mapBounds = map.getBounds();
+            const mapCenter = map.getCenter();
+            const viewport = {
+                bounds: [
+                    [roundTo(mapBounds.getWest(), COORD_PRECISION), roundTo(mapBounds.getSouth(), COORD_PRECISION)],
+                    [roundTo(mapBounds.getEast(), COORD_PRECISION), roundTo(mapBounds.getNorth(), COORD_PRECISION)]
+                ],
+                current_zoom: roundTo(map.getZoom(), ZOOM_PRECISION),
+                current_center: [roundTo(mapCenter.lng, COORD_PRECISION), roundTo(mapCenter.lat, COORD_PRECISION)]
+            };
+            // moveend also fires for camera changes that end where they started
+            const key = JSON.stringify(viewport);
+            if (key !== lastReported) {
+                lastReported = key;
+                setProps(viewport);
+            }
+        }
+
+        function onMoveEnd() {
+            if (timer !== null) {window.clearTimeout(timer);}
+            timer = window.setTimeout(reportViewport, viewport_debounce);
+        }
+        map.on('moveend', onMoveEnd);
+        // Report the initial viewport too
+        onMoveEnd();
+        return () => {
+            map.off('moveend', onMoveEnd);
+            if (timer !== null) {window.clearTimeout(timer);}
+        };
+    }, [viewport_debounce]);
+
+    // 15. Link the camera with the other maps of the same sync_group
+    useEffect(() => {
+        if (!mapRef.current || !sync_group) {return;}
+
+        log("Joining camera group:", sync_group);
+        return joinCameraGroup(sync_group, mapRef.current);
+    }, [sync_group]);
+
+    // 16. Follow current_frame set from Dash
+    useEffect(() => {
+        frameRef.current = current_frame;
+    }, [current_frame]);
+
+    // 16b. Show or play the animation, writing frames into feature state locally
+    useEffect(() => {
+        if (!mapRef.current || !styleLoaded) {return;}
+
+        const map = mapRef.current;
+        if (!animation) {
+            // The animation was removed: so are its feature states
+            if (animationAppliedRef.current) {
+                clearAnimation(map, animationAppliedRef.current.decoded);
+                animationAppliedRef.current = null;
+            }
+            return;
+        }
+        let decoded;
+        try {
+            decoded = decodeAnimation(animation);
+        } catch (err) {
+            console.error("[DashMaplibre] Could not decode animation:", err);
+            return;
+        }
+        if (!decoded.frames) {return;}
+
+        function show(frame) {
+            const result = applyFrame(map, decoded, frame, animationAppliedRef.current);
+            animationAppliedRef.current = result.applied;
+            frameRef.current = frame;
+        }
+
+        if (!playing) {
+            const frame = clampFrame(decoded, frameRef.current);
+            show(frame);
+            // Report where playback stopped
+            if (frame !== current_frame && setProps) {
+                setProps({ current_frame: frame });
+            }
+            return;
+        }
+
+        log("Playing animation at", fps, "fps");
+        const interval = 1000 / Math.max(fps, 1e-3);
+        let startFrame = clampFrame(decoded, frameRef.current);
+        // Playing a finished animation starts it over
+        if (!decoded.loop && startFrame === decoded.frames - 1) {startFrame = 0;}
+        let start = null;
+        let shown = null;
+        let request = null;
+
+        function tick(now) {
+            if (start === null) {start = now;}
+            const step = startFrame + Math.floor((now - start) / interval);
+            if (!decoded.loop && step >= decoded.frames) {
+                show(decoded.frames - 1);
+                request = null;
+                if (setProps) {
+                    setProps({ playing: false, current_frame: decoded.frames - 1 });
+                }
+                return;
+            }
+            const frame = step % decoded.frames;
+            if (frame !== shown) {
+                measure("animation", () => show(frame));
+                shown = frame;
+            }
+            request = window.requestAnimationFrame(tick);
+        }
+        request = window.requestAnimationFrame(tick);
+        return () => {
+            if (request !== null) {window.cancelAnimationFrame(request);}
+        };
+    }, [animation, current_frame, playing, fps, styleLoaded, sources, sharedSourcesLoaded]);
+
+    // 17. Box and lasso selection
+    useEffect(() => {
+        if (!mapRef.current || !selection_mode) {return;}
+
+        log("Selection mode:", selection_mode);
+        const map = mapRef.current;
+        const container = map.getCanvasContainer();
+        const panWasEnabled = map.dragPan.isEnabled();
+        const boxZoomWasEnabled = map.boxZoom.isEnabled();
+        map.dragPan.disable();
+        map.boxZoom.disable();
+
+        const svg = document.createElementNS(SVG_NS, "svg");
+        svg.setAttribute("class", "dash-maplibre-selection");
+        const outline = document.createElementNS(SVG_NS, "polygon");
+        svg.appendChild(outline);
+        let points = null;
+
+        function corners() {
+            if (selection_mode === "lasso") {return points;}
+            const [a, b] = [points[0], points[points.length - 1]];
+            return [a, [b[0], a[1]], b, [a[0], b[1]]];
+        }
+
+        function onMouseDown(e) {
+            if (e.originalEvent.button !== 0) {return;}
+            points = [[e.point.x, e.point.y]];
+            outline.setAttribute("points", "");
+            container.appendChild(svg);
+        }
+
+        function onMouseMove(e) {
+            if (!points) {return;}
+            const last = points[points.length - 1];
+            const point = [e.point.x, e.point.y];
+            if (selection_mode === "box") {
+                points = [points[0], point];
+            } else if (Math.hypot(point[0] - last[0], point[1] - last[1]) >= LASSO_MIN_STEP) {
+                points.push(point);
+            }
+            outline.setAttribute("points", corners().map(p => p.join(",")).join(" "));
+        }
+
+        function onMouseUp() {
+            if (!points) {return;}
+            const screen = corners();
+            points = null;
+            if (svg.parentNode) {svg.parentNode.removeChild(svg);}
+            const xs = screen.map(p => p[0]);
+            const ys = screen.map(p => p[1]);
+            if (
+                screen.length < 3 ||
+                Math.max(...xs) - Math.min(...xs) < MIN_SELECTION_SIZE ||
+                Math.max(...ys) - Math.min(...ys) < MIN_SELECTION_SIZE
+            ) {
+                return;
+            }
+            const ring = screen.map(p => {
+                const lngLat = map.unproject(p);
+                return [roundTo(lngLat.lng, COORD_PRECISION), roundTo(lngLat.lat, COORD_PRECISION)];
+            });
+            ring.push(ring[0]);
+
+            const ids = {};
+            const bySource = new Map();
+            layers.filter(layer => layer.send_selection && map.getLayer(layer.id)).forEach(layer => {
+                if (map.getLayoutProperty(layer.id, "visibility") === "none") {return;}
+                // Layers sharing a source share the lookup
+                if (!bySource.has(layer.source)) {
+                    bySource.set(layer.source, measure("selection", () =>
+                        selectFeatureIds(prevSourcesRef.current[layer.source], ring)
+                    ));
+                }
+                const found = bySource.get(layer.source);
+                if (found) {ids[layer.id] = found;}
+            });
+            if (setProps) {
+                setProps({
+                    selectedData: { mode: selection_mode, geometry: { type: "Polygon", coordinates: [ring] }, ids }
+                });
+            }
+        }
+
+        map.on('mousedown', onMouseDown);
+        map.on('mousemove', onMouseMove);
+        // Also ends selections released outside the map
+        window.addEventListener('mouseup', onMouseUp);
+        return () => {
+            map.off('mousedown', onMouseDown);
+            map.off('mousemove', onMouseMove);
+            window.removeEventListener('mouseup', onMouseUp);
+            if (svg.parentNode) {svg.parentNode.removeChild(svg);}
+            if (panWasEnabled) {map.dragPan.enable();}
+            if (boxZoomWasEnabled) {map.boxZoom.enable();}
+        };
+    }, [selection_mode, layers]);
+
+    const zoomColorbar = getColorbar(colorbar_map, colorbarKey);
+
+    return (
+        <div
+            style={{
+                width: "100%",
+                height: "100%",
+                display: "flex",
+                flexDirection: "column",
+                ...style
+            }}
+            id={id}
+        >
+            <div style={{ flex: 1, minHeight: 0, minWidth: 0, position: "relative", display: "flex", flexDirection: "column" }}>
+                <div
+                    style={{
+                        display: "flex",
+                        flexDirection: "row",
+                        gap: 24,
+                        width: "100%",
+                        maxWidth: "100%",
+                        alignItems: "stretch"
+                    }}
+                >
+                    {zoomColorbar && (
+                        <div style={{ flex: "1 1 0", minWidth: 0, padding: "0 8px"}}>
+                            <Colorbar {...zoomColorbar} />
+                        </div>
+                    )}
+                    {colorbar_risk && (
+                        <div style={{ flex: "1 1 0", minWidth: 0, padding: "0 8px" }}>
+                            <Colorbar {...colorbar_risk} />
+                        </div>
+                    )}
+                </div>
+                <div
+                    ref={mapContainer}
+                    style={{ width: "100%", height: "100%", flex: 1, minHeight: 0, minWidth: 0, position: "relative" }}
+                >
+                    {legendLayers.length > 0 && renderLegend(legendLayers, visibleLayers, setVisibleLayers, version)}
+                </div>
+            </div>
+        </div>
+    );
+};
+
+
+DashMaplibre.propTypes = propTypes;
+DashMaplibre.defaultProps = defaultProps;
+
+export default DashMaplibre;
+
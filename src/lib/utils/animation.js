@@ -0,0 +1,99 @@
+/*
+ * Client-side playback of the `animation` prop.
+ *
+ * The prop holds a features x timesteps value matrix, packed frame by frame
+ * (see dash_maplibre.frame_animation):
+ *   {source, source_layer, state_key, ids, values, frames, loop}
+ * The component writes one frame at a time into feature state. Only values
+ * that differ from the frame applied before are pushed; NaN clears the key.
+ */
+import { decodeArray, decodeColumn } from './columnar';
+
+// Decoding is done once per animation object
+const decodedCache = new WeakMap();
+
+export function decodeAnimation(animation) {
+    let decoded = decodedCache.get(animation);
+    if (decoded) {return decoded;}
+    const ids = decodeColumn(animation.ids);
+    const values = decodeArray(animation.values);
+    const frames = animation.frames;
+    if (values.length !== frames * ids.length) {
+        throw new Error(
+            `animation values hold ${values.length} numbers, expected ${frames} frames x ${ids.length} features`
+        );
+    }
+    decoded = {
+        ids,
+        values,
+        frames,
+        loop: animation.loop !== false,
+        source: animation.source,
+        sourceLayer: animation.source_layer || "",
+        stateKey: animation.state_key || "value",
+    };
+    decodedCache.set(animation, decoded);
+    return decoded;
+}
+
+// Frame index within [0, frames), wrapped or clamped
+export function clampFrame(decoded, frame) {
+    const index = Math.floor(Number(frame) || 0);
+    if (decoded.loop) {
+        return ((index % decoded.frames) + decoded.frames) % decoded.frames;
+    }
+    return Math.min(Math.max(index, 0), decoded.frames - 1);
+}
+
+// Remove the state key of `decoded` from all its features
+export function clearAnimation(map, decoded) {
+    if (!map.getSource(decoded.source)) {return;}
+    decoded.ids.forEach(id => {
+        try {
+            map.removeFeatureState({ source: decoded.source, sourceLayer: decoded.sourceLayer, id }, decoded.stateKey);
+        } catch (err) {
+            console.warn("animation: feature state removal failed", id, err);
+        }
+    });
+}
+
+function sameTarget(a, b) {
+    return a.source === b.source && a.sourceLayer === b.sourceLayer && a.stateKey === b.stateKey;
+}
+
+/*
+ * Write frame `frame` of `decoded` into the map's feature state.
+ * `applied` is {decoded, values} owned by the caller, describing what was
+ * written before; reset it to null when the source is (re-)added.
+ * Returns the new `applied` and the number of feature state calls made.
+ */
+export function applyFrame(map, decoded, frame, applied) {
+    if (applied && applied.decoded !== decoded && !sameTarget(applied.decoded, decoded)) {
+        clearAnimation(map, applied.decoded);
+        applied = null;
+    }
+    if (!map.getSource(decoded.source)) {return { applied, calls: 0 };}
+    const n = decoded.ids.length;
+    const previous = applied && applied.decoded === decoded ? applied.values : null;
+    const current = previous || new Float64Array(n).fill(NaN);
+    const offset = frame * n;
+    let calls = 0;
+    for (let i = 0; i < n; i++) {
+        const value = decoded.values[offset + i];
+        const isNaN = Number.isNaN(value);
+        if (previous && (value === current[i] || (isNaN && Number.isNaN(current[i])))) {continue;}
+        const target = { source: decoded.source, sourceLayer: decoded.sourceLayer, id: decoded.ids[i] };
+        try {
+            if (isNaN) {
+                map.removeFeatureState(target, decoded.stateKey);
+            } else {
+                map.setFeatureState(target, { [decoded.stateKey]: value });
+            }
+            calls++;
+        } catch (err) {
+            console.warn("animation: feature state update failed", target, err);
+        }
+        current[i] = value;
+    }
+    return { applied: { decoded, values: current }, calls };
+}
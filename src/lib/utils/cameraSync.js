@@ -0,0 +1,54 @@
+/*
+ * Camera linking between maps on the same page (the `sync_group` prop).
+ *
+ * Every move of a map in a group is copied to the other maps of the group
+ * with jumpTo, directly in the browser. The moves caused by that copying are
+ * not copied again.
+ */
+
+const groups = new Map();
+let syncing = false;
+
+function cameraOf(map) {
+    return {
+        center: map.getCenter(),
+        zoom: map.getZoom(),
+        bearing: map.getBearing(),
+        pitch: map.getPitch(),
+    };
+}
+
+// Add map to group; returns the function that removes it again
+export function joinCameraGroup(group, map) {
+    let members = groups.get(group);
+    if (!members) {
+        members = new Set();
+        groups.set(group, members);
+    }
+    // A map joining a group starts at the group's camera
+    const leader = members.values().next().value;
+    if (leader) {
+        map.jumpTo(cameraOf(leader));
+    }
+    members.add(map);
+
+    function onMove() {
+        if (syncing) {return;}
+        syncing = true;
+        try {
+            const camera = cameraOf(map);
+            members.forEach(other => {
+                if (other !== map) {other.jumpTo(camera);}
+            });
+        } finally {
+            syncing = false;
+        }
+    }
+    map.on('move', onMove);
+
+    return () => {
+        map.off('move', onMove);
+        members.delete(map);
+        if (members.size === 0) {groups.delete(group);}
+    };
+}
@@ -0,0 +1,156 @@
+/*
+ * Decoder for "geojson-columnar" sources.
+ *
+ * Layout (all arrays little-endian, base64 encoded as {dtype, data}):
+ *   geometry_type: Point | LineString | Polygon | MultiPoint |
+ *                  MultiLineString | MultiPolygon
+ *   coordinates:   interleaved x/y vertex array
+ *   offsets:       list of offset arrays, innermost level first, as produced
+ *                  by shapely.to_ragged_array (GeoArrow layout); empty for Point
+ *   ids:           optional feature ids (array or plain list)
+ *   properties:    {name: array | plain list |
+ *                   {dtype: "dictionary", values: [...], codes: array}}
+ * Every other key (promoteId, cluster, ...) is passed on to the geojson source.
+ */
+
+const TYPED_ARRAYS = {
+    float32: Float32Array,
+    float64: Float64Array,
+    int8: Int8Array,
+    int16: Int16Array,
+    int32: Int32Array,
+    uint8: Uint8Array,
+    uint16: Uint16Array,
+    uint32: Uint32Array,
+    bool: Uint8Array,
+};
+
+const COLUMNAR_KEYS = ["type", "geometry_type", "coordinates", "offsets", "ids", "properties", "length"];
+
+// Decoding is done once per source object; Dash keeps the object identity
+// as long as the prop is not changed.
+const decodedCache = new WeakMap();
+
+function decodeBase64(data) {
+    const binary = window.atob(data);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes.buffer;
+}
+
+export function decodeArray(column) {
+    if (Array.isArray(column)) {
+        return column;
+    }
+    const ArrayType = TYPED_ARRAYS[column.dtype];
+    if (!ArrayType) {
+        throw new Error(`Unsupported columnar dtype: ${column.dtype}`);
+    }
+    return new ArrayType(decodeBase64(column.data));
+}
+
+function columnAccessor(column) {
+    if (Array.isArray(column)) {
+        return i => column[i];
+    }
+    if (column.dtype === "dictionary") {
+        const codes = decodeArray(column.codes);
+        return i => column.values[codes[i]];
+    }
+    const values = decodeArray(column);
+    if (column.dtype === "bool") {
+        return i => values[i] === 1;
+    }
+    if (column.dtype === "float32" || column.dtype === "float64") {
+        return i => (Number.isNaN(values[i]) ? null : values[i]);
+    }
+    return i => values[i];
+}
+
+// Decode a plain list, packed or dictionary column into a plain array
+export function decodeColumn(column) {
+    if (Array.isArray(column)) {
+        return column;
+    }
+    if (column.dtype === "dictionary") {
+        return Array.from(decodeArray(column.codes), code => column.values[code]);
+    }
+    const values = decodeArray(column);
+    if (column.dtype === "bool") {
+        return Array.from(values, value => value === 1);
+    }
+    if (column.dtype === "float32" || column.dtype === "float64") {
+        return Array.from(values, value => (Number.isNaN(value) ? null : value));
+    }
+    return Array.from(values);
+}
+
+function geometryBuilder(coords, offsets) {
+    function part(level, j) {
+        if (level < 0) {
+            return [coords[2 * j], coords[2 * j + 1]];
+        }
+        const levelOffsets = offsets[level];
+        const out = [];
+        for (let k = levelOffsets[j]; k < levelOffsets[j + 1]; k++) {
+            out.push(part(level - 1, k));
+        }
+        return out;
+    }
+    return i => part(offsets.length - 1, i);
+}
+
+export function decodeColumnar(src) {
+    const coords = decodeArray(src.coordinates);
+    const offsets = (src.offsets || []).map(decodeArray);
+    const geometryType = src.geometry_type || "Point";
+    const length = typeof src.length === "number"
+        ? src.length
+        : (offsets.length ? offsets[offsets.length - 1].length - 1 : coords.length / 2);
+    const buildCoordinates = geometryBuilder(coords, offsets);
+    const ids = src.ids ? columnAccessor(src.ids) : null;
+    const columns = Object.entries(src.properties || {}).map(
+        ([name, column]) => [name, columnAccessor(column)]
+    );
+
+    const features = new Array(length);
+    for (let i = 0; i < length; i++) {
+        const properties = {};
+        for (const [name, get] of columns) {
+            properties[name] = get(i);
+        }
+        const feature = {
+            type: "Feature",
+            geometry: { type: geometryType, coordinates: buildCoordinates(i) },
+            properties,
+        };
+        if (ids) {
+            feature.id = ids(i);
+        }
+        features[i] = feature;
+    }
+    return { type: "FeatureCollection", features };
+}
+
+/*
+ * Return a plain geojson source definition for a "geojson-columnar" source
+ * and any other source unchanged.
+ */
+export function expandColumnarSource(src) {
+    if (!src || src.type !== "geojson-columnar") {
+        return src;
+    }
+    let expanded = decodedCache.get(src);
+    if (!expanded) {
+        expanded = { type: "geojson", data: decodeColumnar(src) };
+        Object.keys(src).forEach(key => {
+            if (!COLUMNAR_KEYS.includes(key)) {
+                expanded[key] = src[key];
+            }
+        });
+        decodedCache.set(src, expanded);
+    }
+    return expanded;
+}
@@ -0,0 +1,140 @@
+/*
+ * Delta-only application of the feature_state prop.
+ *
+ * The last applied state is remembered per source and per
+ * (sourceLayer, stateKey) group together with the prop object it came
+ * from. Dash applies Patch() updates with structural sharing, so groups
+ * whose object is unchanged are skipped without being walked, and only
+ * changed values reach setFeatureState/removeFeatureState.
+ *
+ * A group is either {featureId: value} or the bulk form
+ * {ids: [...], values: [...] | value}, where ids/values may also be packed
+ * arrays as produced by dash_maplibre.feature_state.
+ */
+import { decodeColumn } from './columnar';
+
+const SEP = "\u0001";
+
+function isBulk(featuresMap) {
+    return Boolean(featuresMap) && typeof featuresMap.ids === "object" && featuresMap.ids !== null &&
+        "values" in featuresMap;
+}
+
+// Map of String(featureId) -> [featureId, value] for one group
+function readGroup(featuresMap) {
+    const out = new Map();
+    if (isBulk(featuresMap)) {
+        const ids = decodeColumn(featuresMap.ids);
+        const values = featuresMap.values;
+        const perFeature = values !== null && typeof values === "object" ? decodeColumn(values) : null;
+        for (let i = 0; i < ids.length; i++) {
+            out.set(String(ids[i]), [ids[i], perFeature ? perFeature[i] : values]);
+        }
+    } else {
+        Object.entries(featuresMap || {}).forEach(([featureId, value]) => {
+            out.set(featureId, [featureId, value]);
+        });
+    }
+    return out;
+}
+
+function isCleared(value) {
+    return value === null || typeof value === "undefined";
+}
+
+/*
+ * Bring the map's feature state in line with featureState.
+ * `applied` is a Map owned by the caller that persists between calls;
+ * drop a source's entry from it whenever the source is (re-)added.
+ * Returns the number of setFeatureState/removeFeatureState calls made.
+ */
+export function applyFeatureState(map, featureState, applied) {
+    const desired = featureState || {};
+    const sourceIds = new Set([...applied.keys(), ...Object.keys(desired)]);
+    let calls = 0;
+
+    sourceIds.forEach(sourceId => {
+        const layersForSource = desired[sourceId];
+        const previous = applied.get(sourceId);
+        if (previous && previous.tree === layersForSource) {return;}
+        if (!map.getSource(sourceId)) {
+            if (layersForSource) {
+                console.warn("[DashMaplibre] feature_state: source missing:", sourceId);
+            }
+            applied.delete(sourceId);
+            return;
+        }
+
+        const prevGroups = previous ? previous.groups : new Map();
+        const nextGroups = new Map();
+        // Pending setFeatureState calls, batched per feature
+        const pending = new Map();
+        const removals = [];
+
+        // layersForSource: { [sourceLayerId]: { [stateKey]: featuresMap } }
+        Object.entries(layersForSource || {}).forEach(([sourceLayerId, stateMap]) => {
+            Object.entries(stateMap || {}).forEach(([stateKey, featuresMap]) => {
+                const groupKey = sourceLayerId + SEP + stateKey;
+                const prevGroup = prevGroups.get(groupKey);
+                if (prevGroup && prevGroup.featuresMap === featuresMap) {
+                    nextGroups.set(groupKey, prevGroup);
+                    return;
+                }
+                const prevValues = prevGroup ? prevGroup.values : new Map();
+                const values = new Map();
+                readGroup(featuresMap).forEach(([featureId, value], key) => {
+                    if (isCleared(value)) {return;}
+                    values.set(key, [featureId, value]);
+                    const prevEntry = prevValues.get(key);
+                    if (prevEntry && prevEntry[1] === value) {return;}
+                    const featureKey = sourceLayerId + SEP + key;
+                    let entry = pending.get(featureKey);
+                    if (!entry) {
+                        entry = { target: { source: sourceId, sourceLayer: sourceLayerId, id: featureId }, state: {} };
+                        pending.set(featureKey, entry);
+                    }
+                    entry.state[stateKey] = value;
+                });
+                // Keys set before but cleared or dropped now
+                prevValues.forEach(([featureId], key) => {
+                    if (!values.has(key)) {
+                        removals.push([{ source: sourceId, sourceLayer: sourceLayerId, id: featureId }, stateKey]);
+                    }
+                });
+                nextGroups.set(groupKey, { featuresMap, values });
+            });
+        });
+        // Groups that disappeared altogether
+        prevGroups.forEach((group, groupKey) => {
+            if (nextGroups.has(groupKey)) {return;}
+            const [sourceLayerId, stateKey] = groupKey.split(SEP);
+            group.values.forEach(([featureId]) => {
+                removals.push([{ source: sourceId, sourceLayer: sourceLayerId, id: featureId }, stateKey]);
+            });
+        });
+
+        removals.forEach(([target, stateKey]) => {
+            try {
+                map.removeFeatureState(target, stateKey);
+                calls++;
+            } catch (err) {
+                console.warn("removeFeatureState failed", target, stateKey, err);
+            }
+        });
+        pending.forEach(({ target, state }) => {
+            try {
+                map.setFeatureState(target, state);
+                calls++;
+            } catch (err) {
+                console.warn("setFeatureState failed", target, state, err);
+            }
+        });
+
+        if (layersForSource) {
+            applied.set(sourceId, { tree: layersForSource, groups: nextGroups });
+        } else {
+            applied.delete(sourceId);
+        }
+    });
+    return calls;
+}
@@ -0,0 +1,204 @@
+/*
+ * Number formatting shared by hover templates and the colorbar.
+ *
+ * A format is a d3-format specifier (".2f", ",.0f", "+.1%", ...), optionally
+ * preceded by a math expression of the value ending in `_val`, e.g.
+ * "1/_val.2f", "100*_val.1f" or "log10(_val).2f". Formats are compiled once
+ * into a function and cached by format string.
+ *
+ * Expressions support numbers, `_val`, + - * / % ^, parentheses, the
+ * constants pi and e and the functions in MATH_FUNCTIONS. They are parsed
+ * into closures, so no expression is parsed again while formatting.
+ */
+import { format as d3Format } from "d3";
+
+// The expression may end in a closing parenthesis, e.g. "log10(_val).2f"
+const MATH_FORMAT_RE = /^(.*_val[^.]*)(\.[0-9a-zA-Z%]+)$/;
+const TOKEN_RE = /\s*(?:((?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)|([A-Za-z_]\w*)|(\S))/gy;
+
+const MATH_FUNCTIONS = {
+    abs: Math.abs,
+    sqrt: Math.sqrt,
+    cbrt: Math.cbrt,
+    exp: Math.exp,
+    log: (x, base) => (base === undefined ? Math.log(x) : Math.log(x) / Math.log(base)),
+    log10: Math.log10,
+    log2: Math.log2,
+    sin: Math.sin,
+    cos: Math.cos,
+    tan: Math.tan,
+    floor: Math.floor,
+    ceil: Math.ceil,
+    round: Math.round,
+    min: Math.min,
+    max: Math.max,
+    pow: Math.pow,
+};
+
+const MATH_CONSTANTS = { pi: Math.PI, e: Math.E };
+
+const formatters = new Map();
+
+function tokenize(source) {
+    const tokens = [];
+    TOKEN_RE.lastIndex = 0;
+    let match;
+    while (TOKEN_RE.lastIndex < source.length && (match = TOKEN_RE.exec(source)) !== null) {
+        if (match[1] !== undefined) {
+            tokens.push({ type: "number", value: parseFloat(match[1]) });
+        } else if (match[2] !== undefined) {
+            tokens.push({ type: "name", value: match[2] });
+        } else if (match[3] !== undefined) {
+            tokens.push({ type: "op", value: match[3] });
+        }
+    }
+    return tokens;
+}
+
+// Compile an arithmetic expression of `_val` into a function of the value.
+// Throws on syntax errors and unknown names.
+export function compileExpression(source) {
+    const tokens = tokenize(source);
+    let pos = 0;
+
+    const peek = () => tokens[pos];
+    const isOp = value => peek() && peek().type === "op" && peek().value === value;
+    function expect(value) {
+        if (!isOp(value)) {throw new SyntaxError(`Expected "${value}" in ${source}`);}
+        pos += 1;
+    }
+
+    function parseExpression() {
+        let node = parseTerm();
+        while (isOp("+") || isOp("-")) {
+            const op = tokens[pos++].value;
+            const left = node;
+            const right = parseTerm();
+            node = op === "+" ? v => left(v) + right(v) : v => left(v) - right(v);
+        }
+        return node;
+    }
+
+    function parseTerm() {
+        let node = parseUnary();
+        while (isOp("*") || isOp("/") || isOp("%")) {
+            const op = tokens[pos++].value;
+            const left = node;
+            const right = parseUnary();
+            if (op === "*") {node = v => left(v) * right(v);}
+            else if (op === "/") {node = v => left(v) / right(v);}
+            else {node = v => left(v) % right(v);}
+        }
+        return node;
+    }
+
+    function parseUnary() {
+        if (isOp("-")) {
+            pos += 1;
+            const operand = parseUnary();
+            return v => -operand(v);
+        }
+        if (isOp("+")) {
+            pos += 1;
+            return parseUnary();
+        }
+        return parsePower();
+    }
+
+    function parsePower() {
+        const base = parsePrimary();
+        if (isOp("^")) {
+            pos += 1;
+            // Right associative, and binds tighter than a unary minus on its left
+            const exponent = parseUnary();
+            return v => Math.pow(base(v), exponent(v));
+        }
+        return base;
+    }
+
+    function parsePrimary() {
+        const token = tokens[pos++];
+        if (!token) {throw new SyntaxError(`Unexpected end of ${source}`);}
+        if (token.type === "number") {
+            const value = token.value;
+            return () => value;
+        }
+        if (token.type === "op" && token.value === "(") {
+            const inner = parseExpression();
+            expect(")");
+            return inner;
+        }
+        if (token.type === "name") {
+            if (token.value === "_val") {return v => v;}
+            if (isOp("(")) {
+                const fn = MATH_FUNCTIONS[token.value];
+                if (!fn) {throw new SyntaxError(`Unknown function ${token.value} in ${source}`);}
+                pos += 1;
+                const args = [];
+                if (!isOp(")")) {
+                    args.push(parseExpression());
+                    while (isOp(",")) {
+                        pos += 1;
+                        args.push(parseExpression());
+                    }
+                }
+                expect(")");
+                return v => fn(...args.map(arg => arg(v)));
+            }
+            if (token.value in MATH_CONSTANTS) {
+                const value = MATH_CONSTANTS[token.value];
+                return () => value;
+            }
+        }
+        throw new SyntaxError(`Unexpected "${token.value}" in ${source}`);
+    }
+
+    const compiled = parseExpression();
+    if (pos < tokens.length) {
+        throw new SyntaxError(`Unexpected "${tokens[pos].value}" in ${source}`);
+    }
+    return compiled;
+}
+
+function compileFormatter(format) {
+    if (!format) {return value => String(value);}
+
+    let expression = null;
+    let specifier = format;
+    const match = format.match(MATH_FORMAT_RE);
+    if (match) {
+        specifier = match[2];
+        try {
+            expression = compileExpression(match[1]);
+        } catch (err) {
+            // Fall back to the plain value if the math cannot be parsed
+            expression = null;
+        }
+    }
+
+    let formatNumber;
+    try {
+        formatNumber = d3Format(specifier);
+    } catch (err) {
+        formatNumber = value => String(value);
+    }
+    if (!expression) {return formatNumber;}
+    return value => {
+        const result = expression(value);
+        return formatNumber(Number.isNaN(result) ? value : result);
+    };
+}
+
+// Formatter function for a format string, compiled once per format
+export function getFormatter(format) {
+    let formatter = formatters.get(format);
+    if (!formatter) {
+        formatter = compileFormatter(format);
+        formatters.set(format, formatter);
+    }
+    return formatter;
+}
+
+export function formatValue(value, format) {
+    return getFormatter(format)(value);
+}
@@ -0,0 +1,109 @@
+/*
+ * Opt-in timings for the `debug` prop.
+ *
+ * Durations are collected per name ("sources", "layers", "hover", ...) and
+ * reported as one summary per interval, so enabling instrumentation costs a
+ * single prop update per interval at most. Every measurement is also
+ * recorded as a performance.measure entry ("dash-maplibre:<name>") for the
+ * browser's performance panel.
+ */
+
+const MEASURE_PREFIX = "dash-maplibre:";
+const MS_PRECISION = 1000;
+const MS_PER_SECOND = 1000;
+
+function now() {
+    return window.performance.now();
+}
+
+function roundMs(value) {
+    return Math.round(value * MS_PRECISION) / MS_PRECISION;
+}
+
+export class Instrumentation {
+    constructor(report, interval) {
+        this.report = report;
+        this.interval = interval;
+        this.timer = null;
+        this.reset();
+    }
+
+    reset() {
+        this.timings = {};
+        this.frames = 0;
+        this.frameTime = 0;
+        this.windowStart = now();
+    }
+
+    record(name, start, end = now()) {
+        const duration = end - start;
+        const timing = this.timings[name] || (this.timings[name] = { count: 0, total_ms: 0, max_ms: 0 });
+        timing.count += 1;
+        timing.total_ms += duration;
+        timing.max_ms = Math.max(timing.max_ms, duration);
+        timing.last_ms = duration;
+        try {
+            window.performance.measure(MEASURE_PREFIX + name, { start, end });
+        } catch (err) {
+            // User Timing Level 3 is not available everywhere
+        }
+        this.schedule();
+    }
+
+    // Run fn and record how long it took
+    time(name, fn) {
+        const start = now();
+        try {
+            return fn();
+        } finally {
+            this.record(name, start);
+        }
+    }
+
+    // Time between two rendered map frames
+    recordFrame(duration) {
+        this.frames += 1;
+        this.frameTime += duration;
+        this.schedule();
+    }
+
+    schedule() {
+        if (this.timer === null) {
+            this.timer = window.setTimeout(() => this.flush(), this.interval);
+        }
+    }
+
+    flush() {
+        this.timer = null;
+        const elapsed = now() - this.windowStart;
+        const timings = {};
+        Object.entries(this.timings).forEach(([name, timing]) => {
+            timings[name] = {
+                count: timing.count,
+                total_ms: roundMs(timing.total_ms),
+                mean_ms: roundMs(timing.total_ms / timing.count),
+                max_ms: roundMs(timing.max_ms),
+                last_ms: roundMs(timing.last_ms),
+            };
+        });
+        const stats = {
+            timestamp: Date.now(),
+            interval_ms: roundMs(elapsed),
+            timings,
+            frames: {
+                count: this.frames,
+                fps: elapsed > 0 ? roundMs(this.frames * MS_PER_SECOND / elapsed) : 0,
+                mean_frame_ms: this.frames ? roundMs(this.frameTime / this.frames) : 0,
+            },
+        };
+        this.reset();
+        this.report(stats);
+    }
+
+    stop() {
+        if (this.timer !== null) {
+            window.clearTimeout(this.timer);
+            this.timer = null;
+        }
+    }
+}
@@ -0,0 +1,180 @@
+/*
+ * Static KD-tree over the point features of a geojson FeatureCollection,
+ * used for nearest-feature hover lookups without querying rendered
+ * features. Points are stored in Web Mercator world coordinates (0..1)
+ * so distances can be compared in screen pixels at any zoom.
+ */
+
+const MAX_LATITUDE = 85.0511287798066;
+const NODE_SIZE = 16;
+
+// Indexes are built lazily, once per FeatureCollection object.
+const indexCache = new WeakMap();
+
+export function lngLatToWorld(lng, lat) {
+    const clamped = Math.max(-MAX_LATITUDE, Math.min(MAX_LATITUDE, lat));
+    const sin = Math.sin(clamped * Math.PI / 180);
+    return [
+        lng / 360 + 0.5,
+        0.5 - 0.25 * Math.log((1 + sin) / (1 - sin)) / Math.PI,
+    ];
+}
+
+function swap(ids, coords, i, j) {
+    const id = ids[i];
+    ids[i] = ids[j];
+    ids[j] = id;
+    const x = coords[2 * i];
+    const y = coords[2 * i + 1];
+    coords[2 * i] = coords[2 * j];
+    coords[2 * i + 1] = coords[2 * j + 1];
+    coords[2 * j] = x;
+    coords[2 * j + 1] = y;
+}
+
+// Partial sort so that the k-th element is in place along one axis
+function select(ids, coords, k, left, right, axis) {
+    let lo = left;
+    let hi = right;
+    while (hi > lo) {
+        const t = coords[2 * k + axis];
+        let i = lo;
+        let j = hi;
+        swap(ids, coords, lo, k);
+        if (coords[2 * hi + axis] > t) {swap(ids, coords, lo, hi);}
+        while (i < j) {
+            swap(ids, coords, i, j);
+            i++;
+            j--;
+            while (coords[2 * i + axis] < t) {i++;}
+            while (coords[2 * j + axis] > t) {j--;}
+        }
+        if (coords[2 * lo + axis] === t) {
+            swap(ids, coords, lo, j);
+        } else {
+            j++;
+            swap(ids, coords, j, hi);
+        }
+        if (j <= k) {lo = j + 1;}
+        if (k <= j) {hi = j - 1;}
+    }
+}
+
+function sortKD(ids, coords, left, right, axis) {
+    if (right - left <= NODE_SIZE) {return;}
+    const m = (left + right) >> 1;
+    select(ids, coords, m, left, right, axis);
+    sortKD(ids, coords, left, m - 1, 1 - axis);
+    sortKD(ids, coords, m + 1, right, 1 - axis);
+}
+
+export class PointIndex {
+    constructor(points) {
+        // points: array of [worldX, worldY, featureIndex]
+        this.ids = new Uint32Array(points.length);
+        this.coords = new Float64Array(points.length * 2);
+        points.forEach(([x, y, featureIndex], i) => {
+            this.ids[i] = featureIndex;
+            this.coords[2 * i] = x;
+            this.coords[2 * i + 1] = y;
+        });
+        sortKD(this.ids, this.coords, 0, points.length - 1, 0);
+    }
+
+    // Index of the feature closest to (x, y) within maxDist, or -1
+    nearest(x, y, maxDist) {
+        const { ids, coords } = this;
+        let best = -1;
+        let bestSq = maxDist * maxDist;
+        const stack = [0, ids.length - 1, 0];
+        while (stack.length) {
+            const axis = stack.pop();
+            const right = stack.pop();
+            const left = stack.pop();
+            if (right - left <= NODE_SIZE) {
+                for (let i = left; i <= right; i++) {
+                    const dx = coords[2 * i] - x;
+                    const dy = coords[2 * i + 1] - y;
+                    const d = dx * dx + dy * dy;
+                    if (d <= bestSq) {
+                        bestSq = d;
+                        best = ids[i];
+                    }
+                }
+                continue;
+            }
+            const m = (left + right) >> 1;
+            const mx = coords[2 * m];
+            const my = coords[2 * m + 1];
+            const dx = mx - x;
+            const dy = my - y;
+            const d = dx * dx + dy * dy;
+            if (d <= bestSq) {
+                bestSq = d;
+                best = ids[m];
+            }
+            const delta = axis === 0 ? x - mx : y - my;
+            const near = delta <= 0 ? [left, m - 1] : [m + 1, right];
+            const far = delta <= 0 ? [m + 1, right] : [left, m - 1];
+            if (delta * delta <= bestSq) {
+                stack.push(far[0], far[1], 1 - axis);
+            }
+            // Pushed last so the near side is searched first
+            stack.push(near[0], near[1], 1 - axis);
+        }
+        return best;
+    }
+
+    // Indices of the features inside the box whose position passes test(x, y)
+    within(minX, minY, maxX, maxY, test) {
+        const { ids, coords } = this;
+        const found = [];
+        const check = i => {
+            const x = coords[2 * i];
+            const y = coords[2 * i + 1];
+            if (x >= minX && x <= maxX && y >= minY && y <= maxY && (!test || test(x, y))) {
+                found.push(ids[i]);
+            }
+        };
+        const stack = [0, ids.length - 1, 0];
+        while (stack.length) {
+            const axis = stack.pop();
+            const right = stack.pop();
+            const left = stack.pop();
+            if (right - left <= NODE_SIZE) {
+                for (let i = left; i <= right; i++) {check(i);}
+                continue;
+            }
+            const m = (left + right) >> 1;
+            check(m);
+            const value = coords[2 * m + axis];
+            if ((axis === 0 ? minX : minY) <= value) {stack.push(left, m - 1, 1 - axis);}
+            if ((axis === 0 ? maxX : maxY) >= value) {stack.push(m + 1, right, 1 - axis);}
+        }
+        return found;
+    }
+}
+
+/*
+ * Return a PointIndex over the Point features of a FeatureCollection,
+ * or null if the data is not an in-memory FeatureCollection.
+ */
+export function getPointIndex(data) {
+    if (!data || typeof data !== "object" || !Array.isArray(data.features)) {
+        return null;
+    }
+    let index = indexCache.get(data);
+    if (!index) {
+        const points = [];
+        data.features.forEach((feature, i) => {
+            const geometry = feature && feature.geometry;
+            if (geometry && geometry.type === "Point") {
+                const [x, y] = lngLatToWorld(geometry.coordinates[0], geometry.coordinates[1]);
+                points.push([x, y, i]);
+            }
+        });
+        index = new PointIndex(points);
+        indexCache.set(data, index);
+    }
+    return index;
+}
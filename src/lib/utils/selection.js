@@ -0,0 +1,174 @@
+/*
+ * Box and lasso selection over the in-memory data of geojson sources.
+ *
+ * The selection ring is projected to Web Mercator world coordinates (see
+ * pointIndex). Point features are looked up in the source's KD-tree; other
+ * features are pre-filtered by their bounding boxes, which are computed
+ * once per FeatureCollection. A feature is selected when it intersects the
+ * selection polygon.
+ */
+import { getPointIndex, lngLatToWorld } from './pointIndex';
+
+// Per FeatureCollection: indices and world bounding boxes of non-point features
+const boxCache = new WeakMap();
+
+function projectPositions(positions) {
+    const out = new Float64Array(positions.length * 2);
+    positions.forEach((position, i) => {
+        const [x, y] = lngLatToWorld(position[0], position[1]);
+        out[2 * i] = x;
+        out[2 * i + 1] = y;
+    });
+    return out;
+}
+
+// Even-odd test of (x, y) against a flat, closed ring
+function inRing(x, y, ring) {
+    let inside = false;
+    for (let i = 0, j = ring.length - 2; i < ring.length; j = i, i += 2) {
+        const xi = ring[i];
+        const yi = ring[i + 1];
+        const xj = ring[j];
+        const yj = ring[j + 1];
+        if ((yi > y) !== (yj > y) && x < (xj - xi) * (y - yi) / (yj - yi) + xi) {
+            inside = !inside;
+        }
+    }
+    return inside;
+}
+
+function inPolygon(x, y, rings) {
+    if (!inRing(x, y, rings[0])) {return false;}
+    for (let k = 1; k < rings.length; k++) {
+        if (inRing(x, y, rings[k])) {return false;}
+    }
+    return true;
+}
+
+function orientation(ax, ay, bx, by, cx, cy) {
+    return Math.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax));
+}
+
+// Whether any segment of line a crosses any segment of line b (flat arrays)
+function linesCross(a, b) {
+    for (let i = 0; i + 3 < a.length; i += 2) {
+        const [ax, ay, bx, by] = [a[i], a[i + 1], a[i + 2], a[i + 3]];
+        for (let j = 0; j + 3 < b.length; j += 2) {
+            const [cx, cy, dx, dy] = [b[j], b[j + 1], b[j + 2], b[j + 3]];
+            if (
+                orientation(ax, ay, bx, by, cx, cy) !== orientation(ax, ay, bx, by, dx, dy) &&
+                orientation(cx, cy, dx, dy, ax, ay) !== orientation(cx, cy, dx, dy, bx, by)
+            ) {
+                return true;
+            }
+        }
+    }
+    return false;
+}
+
+// Points, lines and polygons (as lists of flat rings) of a geometry, in world coordinates
+function geometryParts(geometry, parts) {
+    const coords = geometry.coordinates;
+    switch (geometry.type) {
+    case "Point": parts.lines.push(projectPositions([coords])); break;
+    case "MultiPoint": parts.lines.push(projectPositions(coords)); break;
+    case "LineString": parts.lines.push(projectPositions(coords)); break;
+    case "MultiLineString": coords.forEach(line => parts.lines.push(projectPositions(line))); break;
+    case "Polygon": parts.polygons.push(coords.map(projectPositions)); break;
+    case "MultiPolygon": coords.forEach(polygon => parts.polygons.push(polygon.map(projectPositions))); break;
+    case "GeometryCollection": (geometry.geometries || []).forEach(g => geometryParts(g, parts)); break;
+    default: break;
+    }
+    return parts;
+}
+
+function intersects(geometry, selection) {
+    const { lines, polygons } = geometryParts(geometry, { lines: [], polygons: [] });
+    const selectionRing = selection[0];
+    const paths = lines.concat(...polygons);
+    for (const path of paths) {
+        for (let i = 0; i < path.length; i += 2) {
+            if (inPolygon(path[i], path[i + 1], selection)) {return true;}
+        }
+    }
+    // A selection drawn inside a polygon feature
+    if (polygons.some(rings => inPolygon(selectionRing[0], selectionRing[1], rings))) {return true;}
+    return paths.some(path => path.length > 2 && linesCross(path, selectionRing));
+}
+
+function getFeatureBoxes(data) {
+    let boxes = boxCache.get(data);
+    if (!boxes) {
+        const indices = [];
+        const bounds = [];
+        data.features.forEach((feature, i) => {
+            const geometry = feature && feature.geometry;
+            if (!geometry || geometry.type === "Point") {return;}
+            const { lines, polygons } = geometryParts(geometry, { lines: [], polygons: [] });
+            let [minX, minY, maxX, maxY] = [Infinity, Infinity, -Infinity, -Infinity];
+            lines.concat(...polygons).forEach(path => {
+                for (let k = 0; k < path.length; k += 2) {
+                    minX = Math.min(minX, path[k]);
+                    maxX = Math.max(maxX, path[k]);
+                    minY = Math.min(minY, path[k + 1]);
+                    maxY = Math.max(maxY, path[k + 1]);
+                }
+            });
+            if (minX > maxX) {return;}
+            indices.push(i);
+            bounds.push(minX, minY, maxX, maxY);
+        });
+        boxes = { indices: Uint32Array.from(indices), bounds: Float64Array.from(bounds) };
+        boxCache.set(data, boxes);
+    }
+    return boxes;
+}
+
+// Id reported for a feature, as MapLibre would assign it
+function featureId(feature, index, src) {
+    if (typeof src.promoteId === "string") {
+        return feature.properties ? feature.properties[src.promoteId] : undefined;
+    }
+    if (typeof feature.id !== "undefined") {return feature.id;}
+    return src.generateId ? index : undefined;
+}
+
+/*
+ * Ids of the features of a geojson source definition (with in-memory
+ * FeatureCollection data) intersecting the closed [lng, lat] ring.
+ * Returns null if the source has no in-memory data.
+ */
+export function selectFeatureIds(src, ring) {
+    const data = src && src.data;
+    if (!data || typeof data !== "object" || !Array.isArray(data.features)) {return null;}
+    const selection = [projectPositions(ring)];
+    const flat = selection[0];
+    let [minX, minY, maxX, maxY] = [Infinity, Infinity, -Infinity, -Infinity];
+    for (let k = 0; k < flat.length; k += 2) {
+        minX = Math.min(minX, flat[k]);
+        maxX = Math.max(maxX, flat[k]);
+        minY = Math.min(minY, flat[k + 1]);
+        maxY = Math.max(maxY, flat[k + 1]);
+    }
+
+    const selected = getPointIndex(data).within(minX, minY, maxX, maxY, (x, y) => inPolygon(x, y, selection));
+    const { indices, bounds } = getFeatureBoxes(data);
+    for (let k = 0; k < indices.length; k++) {
+        if (
+            bounds[4 * k] > maxX || bounds[4 * k + 2] < minX ||
+            bounds[4 * k + 1] > maxY || bounds[4 * k + 3] < minY
+        ) {
+            continue;
+        }
+        if (intersects(data.features[indices[k]].geometry, selection)) {
+            selected.push(indices[k]);
+        }
+    }
+    selected.sort((a, b) => a - b);
+    const ids = [];
+    selected.forEach(i => {
+        const id = featureId(data.features[i], i, src);
+        if (typeof id !== "undefined" && id !== null) {ids.push(id);}
+    });
+    return ids;
+}
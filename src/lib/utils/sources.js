@@ -0,0 +1,153 @@
+/*
+ * Expands the source types dash_maplibre adds on top of MapLibre's into
+ * plain geojson sources:
+ *   "geojson-columnar":   packed binary columns, see ./columnar.js
+ *   "geojson-serialized": {json: "<FeatureCollection text>"} as built by
+ *                         dash_maplibre.encoding; parsed with JSON.parse
+ *   "geojson-shared":     {url: ...} as built by dash_maplibre.shared; fetched
+ *                         and parsed once per page and shared by all maps.
+ *                         expandSource returns null until loadSharedSources
+ *                         has resolved.
+ *   "geojson-stream":     {url, batch_size} as built by dash_maplibre.streaming;
+ *                         starts out empty, the component appends the
+ *                         streamed features to its data (see ./stream.js).
+ * Geojson sources with `zoom_data` ({zoom: data}, see
+ * dash_maplibre.zoom_variants) get the data of the current zoom range.
+ * Every other source is returned unchanged.
+ */
+import { expandColumnarSource } from './columnar';
+import { zoomBreakpoints, zoomKey } from './zoomLevels';
+
+const SERIALIZED_KEYS = ["type", "json"];
+const SHARED_KEYS = ["type", "url"];
+const STREAM_KEYS = ["type", "url", "batch_size"];
+
+// Parsed once per source object, like the columnar decoder
+const parsedCache = new WeakMap();
+
+function expandSerializedSource(src) {
+    let expanded = parsedCache.get(src);
+    if (!expanded) {
+        expanded = { type: "geojson", data: JSON.parse(src.json) };
+        Object.keys(src).forEach(key => {
+            if (!SERIALIZED_KEYS.includes(key)) {
+                expanded[key] = src[key];
+            }
+        });
+        parsedCache.set(src, expanded);
+    }
+    return expanded;
+}
+
+// Shared data of the page, keyed by URL: {promise, data}
+const sharedData = new Map();
+const sharedCache = new WeakMap();
+
+function fetchSharedData(url) {
+    let entry = sharedData.get(url);
+    if (!entry) {
+        entry = { data: null, failed: false };
+        entry.promise = window.fetch(new URL(url, window.location.href).href)
+            .then(response => {
+                if (!response.ok) {throw new Error(`HTTP ${response.status} for ${url}`);}
+                return response.json();
+            })
+            .then(data => {
+                entry.data = data;
+                return data;
+            })
+            .catch(err => {
+                entry.failed = true;
+                console.error("[DashMaplibre] Could not load shared source:", url, err);
+            });
+        sharedData.set(url, entry);
+    }
+    return entry;
+}
+
+// Start loading the shared sources of a sources prop; resolves once all of
+// them are available (immediately if there are none to load)
+export function loadSharedSources(sources) {
+    const pending = Object.values(sources || {})
+        .filter(src => src && src.type === "geojson-shared")
+        .map(src => fetchSharedData(src.url))
+        .filter(entry => entry.data === null && !entry.failed)
+        .map(entry => entry.promise);
+    return pending.length ? Promise.all(pending) : null;
+}
+
+function expandSharedSource(src) {
+    const entry = sharedData.get(src.url);
+    if (!entry || entry.data === null) {return null;}
+    let expanded = sharedCache.get(src);
+    if (!expanded || expanded.data !== entry.data) {
+        expanded = { type: "geojson", data: entry.data };
+        Object.keys(src).forEach(key => {
+            if (!SHARED_KEYS.includes(key)) {
+                expanded[key] = src[key];
+            }
+        });
+        sharedCache.set(src, expanded);
+    }
+    return expanded;
+}
+
+// Streamed sources keep one expanded source, whose data grows as features arrive
+const streamCache = new WeakMap();
+
+function expandStreamSource(src) {
+    let expanded = streamCache.get(src);
+    if (!expanded) {
+        expanded = { type: "geojson", data: { type: "FeatureCollection", features: [] } };
+        Object.keys(src).forEach(key => {
+            if (!STREAM_KEYS.includes(key)) {
+                expanded[key] = src[key];
+            }
+        });
+        streamCache.set(src, expanded);
+    }
+    return expanded;
+}
+
+// One expanded source per zoom_data variant, so the data keeps its identity
+const variantCache = new WeakMap();
+
+// Key of the zoom_data variant shown at zoom, null for other sources
+export function zoomDataKey(src, zoom) {
+    const breakpoints = src && zoomBreakpoints(src.zoom_data);
+    if (!breakpoints) {return null;}
+    // Below the first breakpoint the coarsest variant is shown
+    return zoomKey(breakpoints, zoom) ?? breakpoints[0].key;
+}
+
+function expandZoomVariant(src, zoom) {
+    const key = zoomDataKey(src, zoom);
+    if (key === null) {return src;}
+    let variants = variantCache.get(src);
+    if (!variants) {
+        variants = {};
+        variantCache.set(src, variants);
+    }
+    if (!variants[key]) {
+        // eslint-disable-next-line no-unused-vars
+        const { zoom_data, ...rest } = src;
+        variants[key] = { ...rest, data: zoom_data[key] };
+    }
+    return variants[key];
+}
+
+export function expandSource(src, zoom) {
+    if (src && src.type === "geojson-serialized") {
+        return expandSerializedSource(src);
+    }
+    if (src && src.type === "geojson-shared") {
+        return expandSharedSource(src);
+    }
+    if (src && src.type === "geojson-stream") {
+        return expandStreamSource(src);
+    }
+    if (src && src.zoom_data) {
+        return expandZoomVariant(src, zoom);
+    }
+    return expandColumnarSource(src);
+}
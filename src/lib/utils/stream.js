@@ -0,0 +1,44 @@
+/*
+ * Reader for "geojson-stream" sources: newline-delimited GeoJSON features
+ * (NDJSON) fetched with a streaming response body and handed on in batches
+ * as they arrive.
+ */
+
+export const DEFAULT_STREAM_BATCH = 10000;
+
+// Fetch url and call onBatch(features) per batchSize parsed features, and
+// once more for the rest. Resolves when the stream has been read.
+export async function streamFeatures(url, batchSize, onBatch, signal) {
+    const response = await window.fetch(url, { signal });
+    if (!response.ok) {throw new Error(`HTTP ${response.status} for ${url}`);}
+
+    let batch = [];
+    function addLine(line) {
+        if (!line.trim()) {return;}
+        batch.push(JSON.parse(line));
+        if (batch.length >= batchSize) {
+            onBatch(batch);
+            batch = [];
+        }
+    }
+
+    if (!response.body || typeof response.body.getReader !== "function") {
+        // No streaming support: parse the whole body at once
+        (await response.text()).split("\n").forEach(addLine);
+    } else {
+        const reader = response.body.getReader();
+        const decoder = new window.TextDecoder();
+        let buffered = "";
+        for (;;) {
+            const { done, value } = await reader.read();
+            if (done) {break;}
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split("\n");
+            // The last piece may be an incomplete line
+            buffered = lines.pop();
+            lines.forEach(addLine);
+        }
+        addLine(buffered + decoder.decode());
+    }
+    if (batch.length) {onBatch(batch);}
+}
@@ -0,0 +1,61 @@
+/*
+ * Compiled hover_html templates.
+ *
+ * Templates look like "<b>{name}</b> {risk:.2f}". They are parsed once into
+ * literal and token parts and cached by template string, so rendering a
+ * popup does no regex work.
+ *
+ * Number formats use the colorbar syntax (see ./format.js): any d3-format
+ * specifier, optionally with math on the value, e.g. "{ratio:100*_val.1f}".
+ */
+import { getFormatter } from './format';
+
+const TOKEN_RE = /\{(\w+)(?::([^{}]+))?\}/g;
+
+const compiledTemplates = new Map();
+
+function compileToken(key, format) {
+    const formatNumber = format ? getFormatter(format) : null;
+    return props => {
+        const value = props[key];
+        if (value === null) {return '';}
+        if (formatNumber && typeof value === 'number') {
+            return formatNumber(value);
+        }
+        return String(value);
+    };
+}
+
+export function compileTemplate(template) {
+    let compiled = compiledTemplates.get(template);
+    if (compiled) {
+        return compiled;
+    }
+    const parts = [];
+    let last = 0;
+    let match;
+    TOKEN_RE.lastIndex = 0;
+    while ((match = TOKEN_RE.exec(template)) !== null) {
+        if (match.index > last) {
+            parts.push(template.slice(last, match.index));
+        }
+        parts.push(compileToken(match[1], match[2]));
+        last = TOKEN_RE.lastIndex;
+    }
+    if (last < template.length) {
+        parts.push(template.slice(last));
+    }
+    compiled = props => {
+        let out = '';
+        for (const part of parts) {
+            out += typeof part === 'string' ? part : part(props);
+        }
+        return out;
+    };
+    compiledTemplates.set(template, compiled);
+    return compiled;
+}
+
+export function interpolateTemplate(template, props) {
+    return compileTemplate(template)(props);
+}
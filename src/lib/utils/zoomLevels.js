@@ -0,0 +1,32 @@
+/*
+ * Lookup of zoom-keyed objects ({"0": ..., "6": ..., "10": ...}), as used by
+ * `colorbar_map` and the `zoom_data` of sources.
+ */
+
+// Sorted breakpoints are computed once per mapping object
+const breakpointsCache = new WeakMap();
+
+// Sorted [{zoom, key}] of a mapping, or null if not all keys are numeric
+export function zoomBreakpoints(mapping) {
+    if (!mapping || typeof mapping !== "object" || Array.isArray(mapping)) {return null;}
+    if (breakpointsCache.has(mapping)) {return breakpointsCache.get(mapping);}
+    const keys = Object.keys(mapping);
+    const breakpoints = keys.length > 0 && keys.every(k => !isNaN(Number(k)))
+        ? keys.map(key => ({ zoom: Number(key), key })).sort((a, b) => a.zoom - b.zoom)
+        : null;
+    breakpointsCache.set(mapping, breakpoints);
+    return breakpoints;
+}
+
+// Key of the highest breakpoint at or below zoom, null below the first one
+export function zoomKey(breakpoints, zoom) {
+    let chosen = null;
+    for (let i = 0; i < breakpoints.length; i++) {
+        if (zoom >= breakpoints[i].zoom) {
+            chosen = breakpoints[i].key;
+        } else {
+            break;
+        }
+    }
+    return chosen;
+}
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+BENCHMARK_OUTPUT = "benchmark-results.json"
+ASYNC_CHUNK = os.path.join(os.path.dirname(__file__), os.pardir, "dash_maplibre", "async-DashMaplibre.js")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmarks",
+        action="store_true",
+        default=False,
+        help="Run the browser benchmarks in tests/test_benchmarks.py.",
+    )
+    parser.addoption(
+        "--benchmark-sizes",
+        default="1000,10000,50000",
+        help="Comma separated feature counts the benchmarks run with.",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: browser benchmark, only run with --benchmarks")
+    config._benchmark_results = []
+
+
+def pytest_collection_modifyitems(config, items):
+    if not config.getoption("--benchmarks"):
+        skip = pytest.mark.skip(reason="benchmarks only run with --benchmarks")
+    elif not os.path.exists(ASYNC_CHUNK):
+        # Timing a stale bundle would report numbers for code that is not in the tree
+        skip = pytest.mark.skip(reason="the component bundle is not built, run `npm run build` first")
+    else:
+        return
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_generate_tests(metafunc):
+    if "n_features" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("--benchmark-sizes").split(",")]
+        metafunc.parametrize("n_features", sizes)
+
+
+def pytest_setup_options():
+    # Headless Chrome has no GPU; MapLibre needs WebGL, so use SwiftShader.
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--use-angle=swiftshader")
+    options.add_argument("--enable-unsafe-swiftshader")
+    options.add_argument("--window-size=1200,900")
+    return options
+
+
+@pytest.fixture
+def benchmark_record(request):
+    """Record one benchmark measurement, written out at the end of the session."""
+
+    def record(scenario, **values):
+        entry = {"test": request.node.name, "scenario": scenario}
+        entry.update(values)
+        request.config._benchmark_results.append(entry)
+
+    return record
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = getattr(config, "_benchmark_results", [])
+    if not results:
+        return
+    terminalreporter.section("dash-maplibre benchmarks")
+    for entry in results:
+        values = ", ".join(
+            "{}={}".format(k, v) for k, v in entry.items() if k not in ("test", "scenario")
+        )
+        terminalreporter.write_line("{:<22} {}".format(entry["scenario"], values))
+    path = os.path.join(str(config.rootpath), BENCHMARK_OUTPUT)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    terminalreporter.write_line("written to {}".format(path))
@@ -0,0 +1,52 @@
+import pytest
+
+from dash_maplibre.aggregation import PointAggregator, _to_pixels, bin_points
+
+np = pytest.importorskip("numpy")
+
+
+def test_grid_bins_count_and_sum_weights():
+    lng = [0.001, 0.002, 10.0]
+    lat = [0.001, 0.002, 10.0]
+    bins = bin_points(lng, lat, zoom=4, kind="grid", cell_size=64, weights=[1.0, 2.0, 5.0])
+
+    assert sorted(bins.count.tolist()) == [1, 2]
+    assert sorted(bins.total.tolist()) == [3.0, 5.0]
+    assert bins.members[0] == bins.members[1] != bins.members[2]
+
+
+def test_hex_bins_assign_points_to_nearest_centre():
+    rng = np.random.default_rng(0)
+    lng = rng.uniform(-10, 10, 2000)
+    lat = rng.uniform(-10, 10, 2000)
+    bins = bin_points(lng, lat, zoom=5, kind="hex", cell_size=40)
+
+    assert bins.count.sum() == 2000
+    # Every point is closer (in screen pixels) to its own bin centre than to any other
+    x, y = _to_pixels(lng, lat, 5)
+    cx, cy = _to_pixels(bins.lng, bins.lat, 5)
+    own = np.hypot(x - cx[bins.members], y - cy[bins.members])
+    nearest = np.hypot(x[:, None] - cx, y[:, None] - cy).min(axis=1)
+    assert np.allclose(own, nearest, atol=1e-6)
+
+
+def test_aggregator_switches_to_raw_points():
+    aggregator = PointAggregator([0.0, 0.001, 5.0], [0.0, 0.001, 5.0],
+                                 properties={"name": ["a", "b", "c"]}, raw_min_zoom=10)
+
+    binned = aggregator.source(3.7)
+    assert binned["length"] == 2
+    assert set(binned["properties"]) == {"count", "total", "mean"}
+    assert aggregator.bins(3.2) is aggregator.bins(3.9)
+
+    raw = aggregator.source(10)
+    assert raw["length"] == 3
+    assert raw["properties"]["name"] == ["a", "b", "c"]
+
+
+def test_polygon_bins():
+    aggregator = PointAggregator([0.0, 5.0], [0.0, 5.0], kind="hex")
+
+    source = aggregator.source(2, polygons=True)
+    assert source["geometry_type"] == "Polygon"
+    assert len(source["offsets"]) == 2
@@ -0,0 +1,42 @@
+import base64
+
+import pytest
+
+from dash_maplibre import DashMaplibre, frame_animation
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+
+def _unpack(packed):
+    return np.frombuffer(base64.b64decode(packed["data"]), dtype=packed["dtype"])
+
+
+def test_values_are_packed_frame_by_frame():
+    values = np.array([[1.0, 2.0, 3.0], [10.0, np.nan, 30.0]])
+    animation = frame_animation("regions", values, ids=[7, 8], state_key="risk", loop=False)
+
+    assert animation["frames"] == 3
+    assert animation["state_key"] == "risk"
+    assert animation["loop"] is False
+    assert _unpack(animation["ids"]).tolist() == [7, 8]
+    frames = _unpack(animation["values"]).reshape(3, 2)
+    assert frames[0].tolist() == [1.0, 10.0]
+    assert frames[2].tolist() == [3.0, 30.0]
+    assert np.isnan(frames[1, 1])
+
+
+def test_dataframe_index_gives_the_ids():
+    frame = pd.DataFrame({"2020": [0.1, 0.2], "2021": [0.3, 0.4]}, index=["a", "b"])
+    animation = frame_animation("regions", frame)
+
+    assert animation["ids"] == ["a", "b"]
+    assert _unpack(animation["values"]).tolist() == pytest.approx([0.1, 0.2, 0.3, 0.4])
+    DashMaplibre(id="map", animation=animation, playing=True, fps=24, current_frame=1)
+
+
+def test_shape_is_checked():
+    with pytest.raises(ValueError):
+        frame_animation("regions", [[1.0, 2.0]], ids=[1, 2])
+    with pytest.raises(ValueError):
+        frame_animation("regions", [[1.0, 2.0]])
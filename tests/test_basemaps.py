@@ -0,0 +1,66 @@
+import json
+
+import dash
+from dash import html
+
+from dash_maplibre import basemap_url, get_basemap, register_basemap
+
+STYLE = {
+    "version": 8,
+    "sprite": "https://example.invalid/sprites/basic",
+    "glyphs": "https://example.invalid/fonts/{fontstack}/{range}.pbf",
+    "sources": {
+        "tiles": {"type": "vector", "tiles": ["https://example.invalid/tiles/{z}/{x}/{y}.pbf"]},
+    },
+    "layers": [],
+}
+
+
+def test_style_urls_are_rewritten_to_app_routes():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    url = register_basemap(app, "basic", STYLE)
+    assert url == basemap_url(app, "basic") == "/_dash-maplibre/basemaps/basic/style.json"
+
+    style = get_basemap(app, "basic")
+    assert style is get_basemap(app, "basic")
+    assert style["sprite"] == "/_dash-maplibre/basemaps/basic/sprite/default/sprite"
+    assert style["glyphs"] == "/_dash-maplibre/basemaps/basic/glyphs/{fontstack}/{range}.pbf"
+    assert style["sources"]["tiles"]["tiles"] == ["/_dash-maplibre/basemaps/basic/tiles/tiles/0/{z}/{x}/{y}"]
+
+    response = app.server.test_client().get(url)
+    served = json.loads(response.data)
+    assert served["glyphs"] == "/_dash-maplibre/basemaps/basic/glyphs/{fontstack}/{range}.pbf"
+    assert response.headers["ETag"]
+
+
+def test_resources_are_served_from_the_assets_dir(tmp_path):
+    glyphs = tmp_path / "glyphs" / "Open Sans Regular"
+    glyphs.mkdir(parents=True)
+    (glyphs / "0-255.pbf").write_bytes(b"glyph-bytes")
+
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    register_basemap(app, "offline", STYLE, assets_dir=str(tmp_path))
+    client = app.server.test_client()
+
+    response = client.get("/_dash-maplibre/basemaps/offline/glyphs/Open%20Sans%20Regular/0-255.pbf")
+    assert response.status_code == 200
+    assert response.data == b"glyph-bytes"
+    assert "max-age" in response.headers["Cache-Control"]
+    assert client.get("/_dash-maplibre/basemaps/missing/style.json").status_code == 404
+
+
+def test_unreachable_upstream_serves_cached_resources_or_404(tmp_path):
+    glyphs = tmp_path / "glyphs" / "Open Sans Regular"
+    glyphs.mkdir(parents=True)
+    (glyphs / "0-255.pbf").write_bytes(b"glyph-bytes")
+
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    register_basemap(app, "remote", "http://127.0.0.1:9/style.json", assets_dir=str(tmp_path), timeout=1)
+    client = app.server.test_client()
+
+    assert client.get("/_dash-maplibre/basemaps/remote/glyphs/Open%20Sans%20Regular/0-255.pbf").data == b"glyph-bytes"
+    assert client.get("/_dash-maplibre/basemaps/remote/glyphs/Open%20Sans%20Regular/256-511.pbf").status_code == 404
+    assert client.get("/_dash-maplibre/basemaps/remote/style.json").status_code == 502
@@ -0,0 +1,228 @@
+"""Browser benchmarks of the component's update paths.
+
+Run with ``pytest tests/test_benchmarks.py --benchmarks --headless`` (add
+``--benchmark-sizes 1000,100000`` to pick the feature counts).  Each
+scenario clicks a button whose callback updates the map, waits until the
+change is visible on the map and MapLibre is idle again, and records that
+time together with the size of the callback response.  Results are
+printed at the end of the run and written to ``benchmark-results.json``.
+"""
+import random
+
+import dash
+import flask
+import pytest
+from dash import Input, Output, Patch, html
+
+from dash_maplibre import DashMaplibre
+
+pytestmark = pytest.mark.benchmark
+
+MOVED_FEATURES = 10
+HOVER_MOVES = 200
+BASEMAP_COLORS = ["#ffffff", "#202020"]
+
+# Click a button, wait until `predicate(map)` holds and the map is idle again,
+# and return the elapsed milliseconds.
+TIME_TO_IDLE = """
+const [buttonId, predicateSource, done] = arguments;
+const predicate = new Function("map", predicateSource);
+const map = window._map;
+const start = performance.now();
+document.getElementById(buttonId).click();
+(function poll() {
+    let ready = false;
+    try { ready = predicate(map); } catch (err) { ready = false; }
+    if (!ready) {
+        requestAnimationFrame(poll);
+        return;
+    }
+    map.once("idle", () => done(performance.now() - start));
+    map.triggerRepaint();
+})();
+"""
+
+# Sweep the pointer across the map and return the hover timings of the
+# component's instrumentation.
+HOVER_SWEEP = """
+const [moves, done] = arguments;
+const canvas = window._map.getCanvas();
+const rect = canvas.getBoundingClientRect();
+performance.clearMeasures("dash-maplibre:hover");
+let i = 0;
+(function step() {
+    if (i >= moves) {
+        requestAnimationFrame(() => {
+            const durations = performance.getEntriesByName("dash-maplibre:hover").map(e => e.duration);
+            done(durations);
+        });
+        return;
+    }
+    const t = i / moves;
+    canvas.dispatchEvent(new MouseEvent("mousemove", {
+        clientX: rect.left + t * rect.width,
+        clientY: rect.top + rect.height * (0.5 + 0.3 * Math.sin(t * 20)),
+        bubbles: true,
+    }));
+    i += 1;
+    requestAnimationFrame(step);
+})();
+"""
+
+
+def _basemap(color):
+    return {
+        "version": 8,
+        "sources": {},
+        "layers": [{"id": "background", "type": "background", "paint": {"background-color": color}}],
+    }
+
+
+def _points(n_features):
+    rng = random.Random(0)
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": i,
+                "geometry": {"type": "Point", "coordinates": [rng.uniform(-60, 60), rng.uniform(-40, 40)]},
+                "properties": {"name": "point {}".format(i), "value": rng.random(), "moved": 0},
+            }
+            for i in range(n_features)
+        ],
+    }
+
+
+def _make_app(n_features):
+    app = dash.Dash(__name__)
+    app.payload_sizes = []
+
+    @app.server.after_request
+    def record_payload(response):
+        if flask.request.path.endswith("_dash-update-component"):
+            app.payload_sizes.append(len(response.get_data()))
+        return response
+
+    app.layout = html.Div([
+        html.Button("load", id="load"),
+        html.Button("move", id="move"),
+        html.Button("state", id="state"),
+        html.Button("basemap", id="basemap"),
+        DashMaplibre(
+            id="map",
+            basemap=_basemap(BASEMAP_COLORS[0]),
+            center=[0, 0],
+            zoom=1,
+            debug=True,
+            style={"width": "1000px", "height": "700px"},
+        ),
+    ])
+
+    @app.callback(
+        Output("map", "sources"),
+        Output("map", "layers"),
+        Input("load", "n_clicks"),
+        prevent_initial_call=True,
+    )
+    def load(_):
+        sources = {"points": {"type": "geojson", "data": _points(n_features)}}
+        layers = [{
+            "id": "points-layer",
+            "type": "circle",
+            "source": "points",
+            "paint": {
+                "circle-radius": 3,
+                "circle-color": ["case", ["boolean", ["feature-state", "selected"], False], "#e63946", "#007cbf"],
+            },
+            "hover_html": "<b>{name}</b> {value:.2f}",
+            "hover_index": True,
+        }]
+        return sources, layers
+
+    @app.callback(
+        Output("map", "sources", allow_duplicate=True),
+        Input("move", "n_clicks"),
+        prevent_initial_call=True,
+    )
+    def move(n_clicks):
+        patch = Patch()
+        rng = random.Random(n_clicks)
+        for i in range(min(MOVED_FEATURES, n_features)):
+            feature = patch["points"]["data"]["features"][i]
+            feature["geometry"]["coordinates"] = [rng.uniform(-60, 60), rng.uniform(-40, 40)]
+            feature["properties"]["moved"] = n_clicks
+        return patch
+
+    @app.callback(
+        Output("map", "feature_state"),
+        Input("state", "n_clicks"),
+        prevent_initial_call=True,
+    )
+    def state(n_clicks):
+        selected = n_clicks % 2 == 1
+        return {"points": {"": {"selected": {"ids": list(range(n_features)), "values": selected}}}}
+
+    @app.callback(
+        Output("map", "basemap"),
+        Input("basemap", "n_clicks"),
+        prevent_initial_call=True,
+    )
+    def toggle_basemap(n_clicks):
+        return _basemap(BASEMAP_COLORS[n_clicks % 2])
+
+    return app
+
+
+def _time_to_idle(dash_duo, button, predicate):
+    return round(dash_duo.driver.execute_async_script(TIME_TO_IDLE, button, predicate), 1)
+
+
+def test_update_paths(dash_duo, benchmark_record, n_features):
+    app = _make_app(n_features)
+    dash_duo.start_server(app)
+    dash_duo.wait_for_element("#map .maplibregl-canvas")
+    dash_duo.driver.set_script_timeout(120)
+
+    elapsed = _time_to_idle(
+        dash_duo, "load",
+        "return Boolean(map.getSource('points')) && map.isSourceLoaded('points') && Boolean(map.getLayer('points-layer'));",
+    )
+    benchmark_record("initial_load", n_features=n_features, time_to_idle_ms=elapsed,
+                     payload_bytes=app.payload_sizes[-1])
+
+    for n_clicks in (1, 2, 3):
+        elapsed = _time_to_idle(
+            dash_duo, "move",
+            "return map.querySourceFeatures('points', {filter: ['==', ['get', 'moved'], %d]}).length > 0;" % n_clicks,
+        )
+        benchmark_record("patch_move", n_features=n_features, moved=MOVED_FEATURES,
+                         time_to_idle_ms=elapsed, payload_bytes=app.payload_sizes[-1])
+
+    for n_clicks in (1, 2):
+        elapsed = _time_to_idle(
+            dash_duo, "state",
+            "return map.getFeatureState({source: 'points', id: %d}).selected === %s;"
+            % (n_features - 1, "true" if n_clicks % 2 else "false"),
+        )
+        benchmark_record("feature_state_bulk", n_features=n_features, time_to_idle_ms=elapsed,
+                         payload_bytes=app.payload_sizes[-1])
+
+    for n_clicks in (1, 2):
+        elapsed = _time_to_idle(
+            dash_duo, "basemap",
+            "return map.getPaintProperty('background', 'background-color') === '%s' && Boolean(map.getLayer('points-layer'));"
+            % BASEMAP_COLORS[n_clicks % 2],
+        )
+        benchmark_record("basemap_toggle", n_features=n_features, time_to_idle_ms=elapsed,
+                         payload_bytes=app.payload_sizes[-1])
+
+    durations = dash_duo.driver.execute_async_script(HOVER_SWEEP, HOVER_MOVES)
+    assert durations, "no hover lookups were measured"
+    benchmark_record(
+        "hover_sweep",
+        n_features=n_features,
+        lookups=len(durations),
+        mean_ms=round(sum(durations) / len(durations), 3),
+        max_ms=round(max(durations), 3),
+    )
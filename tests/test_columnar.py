@@ -0,0 +1,53 @@
+import base64
+
+import pytest
+
+from dash_maplibre import columnar_source
+
+np = pytest.importorskip("numpy")
+
+
+def _unpack(column):
+    return np.frombuffer(base64.b64decode(column["data"]), dtype=column["dtype"])
+
+
+def test_point_source_packs_coordinates_and_columns():
+    source = columnar_source(
+        [13.4, 2.35],
+        [52.5, 48.86],
+        properties={"risk": [1.5, 2.5], "count": [3, 400], "city": ["Berlin", "Paris"]},
+        coordinate_dtype="float64",
+        promoteId="city",
+    )
+
+    assert source["type"] == "geojson-columnar"
+    assert source["geometry_type"] == "Point"
+    assert source["promoteId"] == "city"
+    assert source["length"] == 2
+    assert _unpack(source["coordinates"]).tolist() == [13.4, 52.5, 2.35, 48.86]
+    assert source["properties"]["risk"]["dtype"] == "float32"
+    assert source["properties"]["count"]["dtype"] == "uint16"
+    assert source["properties"]["city"] == ["Berlin", "Paris"]
+
+
+def test_repeated_text_is_dictionary_encoded():
+    source = columnar_source([0, 1, 2, 3], [0, 1, 2, 3], properties={"kind": ["a", "b", "a", "a"]})
+
+    kind = source["properties"]["kind"]
+    assert kind["dtype"] == "dictionary"
+    assert kind["values"] == ["a", "b"]
+    assert _unpack(kind["codes"]).tolist() == [0, 1, 0, 0]
+
+
+def test_pandas_missing_values_are_null():
+    pd = pytest.importorskip("pandas")
+    frame = pd.DataFrame({
+        "name": pd.array(["a", None, "b"], dtype="string"),
+        "count": pd.array([1, None, 3], dtype="Int64"),
+    })
+    source = columnar_source([0, 1, 2], [0, 1, 2], properties=frame)
+
+    assert source["properties"]["name"] == ["a", None, "b"]
+    # Nullable integers arrive as floats with NaN for the missing values
+    count = _unpack(source["properties"]["count"])
+    assert count[0] == 1 and np.isnan(count[1]) and count[2] == 3
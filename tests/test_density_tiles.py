@@ -0,0 +1,100 @@
+import struct
+import zlib
+
+import dash
+from dash import html
+import pytest
+
+from dash_maplibre import density_tile_source, register_density_tiles
+from dash_maplibre.density_tiles import DensityTileSet, parse_color
+
+np = pytest.importorskip("numpy")
+
+STOPS = {0: ["#000000", "#000000"], 10: ["#ff0000", "#0000ff"], 20: ["rgb(0, 255, 0)", "rgba(0, 255, 0, 0.5)"]}
+
+
+def _decode_png(data):
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    pos = 8
+    idat = b""
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos:pos + 4])
+        kind = data[pos + 4:pos + 8]
+        if kind == b"IDAT":
+            idat += data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+    rows = np.frombuffer(zlib.decompress(idat), dtype="uint8").reshape(height, width * 4 + 1)
+    assert not rows[:, 0].any()
+    return rows[:, 1:].reshape(height, width, 4)
+
+
+def test_parse_color():
+    assert parse_color("#f00") == (255, 0, 0, 255)
+    assert parse_color("#00ff0080") == (0, 255, 0, 128)
+    assert parse_color("rgba(1, 2, 3, 0.5)") == (1, 2, 3, 127.5)
+    with pytest.raises(ValueError):
+        parse_color("red")
+
+
+def test_tile_slices_match_a_brute_force_filter():
+    rng = np.random.default_rng(0)
+    lng = rng.uniform(-20, 20, 5000)
+    lat = rng.uniform(-20, 20, 5000)
+    tileset = DensityTileSet(lng, lat, STOPS, bin_size=1)
+
+    for z, x, y in [(0, 0, 0), (3, 3, 3), (3, 4, 4), (5, 16, 15), (18, 131072, 131072)]:
+        values, counts = tileset.grid(z, x, y)
+        n = 2 ** z
+        tx = (lng / 360 + 0.5) * n
+        lat_rad = np.radians(lat)
+        ty = (1 - np.log(np.tan(lat_rad) + 1 / np.cos(lat_rad)) / np.pi) / 2 * n
+        inside = (np.floor(tx) == x) & (np.floor(ty) == y)
+        assert counts.sum() == inside.sum()
+        assert np.array_equal(values, counts)
+
+
+def test_colours_follow_the_colorbar_stops():
+    tileset = DensityTileSet([0.0], [0.0], STOPS)
+    values = np.array([-5.0, 5.0, 15.0, 25.0])
+    rgba = tileset.colorize(values, np.array([True, True, True, False]))
+
+    assert rgba[0].tolist() == [0, 0, 0, 255]
+    assert rgba[1].tolist() == [128, 0, 0, 255]
+    # Between stops the right colour of the lower stop blends into the left colour of the upper one
+    assert rgba[2].tolist() == [0, 128, 128, 255]
+    assert rgba[3].tolist() == [0, 0, 0, 0]
+
+
+def test_mean_needs_weights():
+    with pytest.raises(ValueError):
+        DensityTileSet([0.0], [0.0], STOPS, statistic="mean")
+
+
+def test_tiles_are_served_as_png():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    lng = [0.001] * 15 + [-100.0]
+    lat = [0.001] * 15 + [-60.0]
+    source = register_density_tiles(app, "events", lng, lat, STOPS, bin_size=4, max_zoom=12)
+
+    assert source == density_tile_source(app, "events")
+    assert source["type"] == "raster"
+    assert source["tileSize"] == 256
+    assert source["tiles"] == ["/_dash-maplibre/density/events/{z}/{x}/{y}.png"]
+
+    client = app.server.test_client()
+    response = client.get("/_dash-maplibre/density/events/1/1/0.png")
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    image = _decode_png(response.data)
+    assert image.shape == (256, 256, 4)
+    filled = image[..., 3] > 0
+    # 15 points fall into the bin at the tile's south-west corner, drawn as a 4 x 4 block
+    assert filled.sum() == 16
+    assert image[filled][0].tolist() == [0, 128, 128, 255]
+
+    assert client.get("/_dash-maplibre/density/events/1/0/0.png").status_code == 204
+    assert client.get("/_dash-maplibre/density/events/13/0/0.png").status_code == 204
+    with pytest.raises(KeyError):
+        density_tile_source(app, "missing")
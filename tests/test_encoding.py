@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from dash_maplibre import encode_points, serialized_source
+
+np = pytest.importorskip("numpy")
+
+
+def test_points_round_trip_with_quantised_coordinates():
+    text = encode_points(
+        [13.40495412, 2.3522],
+        [52.52000659, 48.8566],
+        properties={"city": ["Berlin", "Paris"], "count": [3, 400], "risk": [1.5, float("nan")], "big": [True, False]},
+        ids=[10, 11],
+        precision=4,
+    )
+    data = json.loads(text)
+
+    assert data["type"] == "FeatureCollection"
+    first, second = data["features"]
+    assert first["id"] == 10
+    assert first["geometry"] == {"type": "Point", "coordinates": [13.405, 52.52]}
+    assert first["properties"] == {"city": "Berlin", "count": 3, "risk": 1.5, "big": True}
+    assert second["properties"]["risk"] is None
+    assert second["properties"]["big"] is False
+
+
+def test_column_selection_and_text_escaping():
+    text = encode_points(
+        np.array([0.0]),
+        np.array([0.0]),
+        properties={"name": ['say "hi"\n'], "skipped": [1]},
+        columns=["name"],
+    )
+
+    assert json.loads(text)["features"][0]["properties"] == {"name": 'say "hi"\n'}
+
+
+def test_property_precision_and_missing_text():
+    text = encode_points(
+        [0, 1],
+        [0, 1],
+        properties={"value": [0.123456, 1.0], "label": ["a", None]},
+        property_precision=2,
+    )
+    features = json.loads(text)["features"]
+
+    assert [f["properties"]["value"] for f in features] == [0.12, 1.0]
+    assert features[1]["properties"]["label"] is None
+
+
+def test_datetimes_are_encoded_as_iso_strings():
+    pd = pytest.importorskip("pandas")
+    frame = pd.DataFrame({
+        "day": np.array(["2024-01-01T00:00", "NaT"], dtype="datetime64[ns]"),
+        "time": np.array(["2024-01-02T10:00:01.5", "2024-01-03"], dtype="datetime64[ms]"),
+        "utc": pd.to_datetime(["2024-01-01", None], utc=True),
+    })
+    features = json.loads(encode_points([0, 1], [0, 1], properties=frame))["features"]
+
+    assert features[0]["properties"] == {
+        "day": "2024-01-01T00:00:00",
+        "time": "2024-01-02T10:00:01.500",
+        "utc": "2024-01-01T00:00:00+00:00",
+    }
+    assert features[1]["properties"]["day"] is None
+    assert features[1]["properties"]["utc"] is None
+
+
+def test_pandas_missing_values_are_null():
+    pd = pytest.importorskip("pandas")
+    frame = pd.DataFrame({"name": pd.array(["a", None], dtype="string"), "count": pd.array([None, 2], dtype="Int64")})
+    features = json.loads(encode_points([0, 1], [0, 1], properties=frame))["features"]
+
+    assert [f["properties"] for f in features] == [{"name": "a", "count": None}, {"name": None, "count": 2}]
+
+
+def test_empty_and_mismatched_input():
+    assert json.loads(encode_points([], [])) == {"type": "FeatureCollection", "features": []}
+    with pytest.raises(ValueError):
+        encode_points([0, 1], [0])
+
+
+def test_serialized_source_passes_options():
+    source = serialized_source(b'{"type":"FeatureCollection","features":[]}', promoteId="id")
+
+    assert source == {
+        "type": "geojson-serialized",
+        "json": '{"type":"FeatureCollection","features":[]}',
+        "promoteId": "id",
+    }
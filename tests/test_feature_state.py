@@ -0,0 +1,28 @@
+import pytest
+
+from dash_maplibre import bulk_feature_state
+
+np = pytest.importorskip("numpy")
+
+
+def test_bulk_feature_state_packs_each_state_key():
+    state = bulk_feature_state(
+        "regions",
+        {"risk": np.array([0.5, np.nan]), "selected": np.array([True, False]), "group": "a"},
+        ids=np.array([10, 11]),
+    )
+
+    layer_state = state["regions"][""]
+    assert set(layer_state) == {"risk", "selected", "group"}
+    assert layer_state["risk"]["ids"]["dtype"] == "uint8"
+    assert layer_state["risk"]["values"]["dtype"] == "float32"
+    assert layer_state["selected"]["values"]["dtype"] == "bool"
+    assert layer_state["group"]["values"] == "a"
+
+
+def test_bulk_feature_state_extends_existing_state():
+    existing = {"points": {"": {"hover": {"1": True}}}}
+    state = bulk_feature_state("regions", {"risk": [1.0]}, ids=[1], feature_state=existing)
+
+    assert state is existing
+    assert set(state) == {"points", "regions"}
@@ -0,0 +1,87 @@
+import dash
+
+from dash_maplibre.patches import MapState, diff_features, patch_features
+
+
+def _point(fid, lng, lat, **props):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lng, lat]},
+        "properties": dict(props, fid=fid),
+    }
+
+
+OLD = [_point(1, 0, 0), _point(2, 1, 1), _point(3, 2, 2)]
+
+
+def test_diff_matches_features_by_id():
+    new = [_point(3, 2, 2), _point(1, 5, 5), _point(4, 3, 3)]
+    diff = diff_features(OLD, new, id_property="fid")
+
+    assert diff.added == [new[2]]
+    assert diff.updated == [(0, new[1])]
+    assert diff.removed == [1]
+
+
+def test_diff_falls_back_to_positions_without_ids():
+    old = [{k: v for k, v in f.items() if k != "properties"} for f in OLD]
+    new = old[:1] + [_point(9, 9, 9)]
+    diff = diff_features(old, new)
+
+    assert diff.added == []
+    assert diff.updated == [(1, new[1])]
+    assert diff.removed == [2]
+
+
+def test_patch_only_touches_changed_features():
+    new = [OLD[0], _point(2, 7, 7), _point(4, 3, 3)]
+    operations = patch_features("pts", OLD, new, id_property="fid").to_plotly_json()["operations"]
+
+    assert [op["operation"] for op in operations] == ["Assign", "Delete", "Extend"]
+    assert operations[0]["location"] == ["pts", "data", "features", 1]
+    assert operations[1]["location"] == ["pts", "data", "features", 2]
+    assert operations[2]["params"]["value"] == [new[2]]
+
+
+def test_map_state_sends_full_value_then_patches():
+    state = MapState()
+    sources = {
+        "pts": {"type": "geojson", "promoteId": "fid", "data": {"type": "FeatureCollection", "features": OLD}},
+        "tiles": {"type": "vector", "url": "/tiles.json"},
+    }
+    assert state.patch_sources("session", sources) is sources
+
+    moved = [OLD[0], _point(2, 7, 7), OLD[2]]
+    new_sources = {
+        "pts": {"type": "geojson", "promoteId": "fid", "data": {"type": "FeatureCollection", "features": moved}},
+        "tiles": sources["tiles"],
+    }
+    operations = state.patch_sources("session", new_sources).to_plotly_json()["operations"]
+    assert operations == [{
+        "operation": "Assign",
+        "location": ["pts", "data", "features", 1],
+        "params": {"value": moved[1]},
+    }]
+    assert state.patch_sources("session", new_sources) is dash.no_update
+
+    # Other sessions start with the full value
+    assert state.patch_sources("other", new_sources) is new_sources
+
+
+def test_map_state_patches_single_layer_keys():
+    state = MapState()
+    layers = [
+        {"id": "a", "type": "circle", "source": "pts", "paint": {"circle-color": "#000", "circle-radius": 4}},
+    ]
+    state.patch_layers("session", layers)
+
+    recolored = [dict(layers[0], paint={"circle-color": "#f00", "circle-radius": 4})]
+    added = recolored + [{"id": "b", "type": "line", "source": "lines"}]
+    operations = state.patch_layers("session", added).to_plotly_json()["operations"]
+    assert [(op["operation"], op["location"]) for op in operations] == [
+        ("Assign", [0, "paint", "circle-color"]),
+        ("Extend", []),
+    ]
+
+    reordered = list(reversed(added))
+    assert state.patch_layers("session", reordered) == reordered
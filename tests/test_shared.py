@@ -0,0 +1,70 @@
+import gzip
+import json
+
+import dash
+from dash import html
+import pytest
+
+from dash_maplibre import register_shared_source, shared_source
+
+DATA = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "id": 1, "properties": {"name": "a"}, "geometry": {"type": "Point", "coordinates": [1, 2]}},
+    ],
+}
+
+
+def test_source_url_carries_a_content_hash():
+    app = dash.Dash(__name__)
+    source = register_shared_source(app, "points", DATA, promoteId="name")
+
+    assert source["type"] == "geojson-shared"
+    assert source["promoteId"] == "name"
+    assert source["url"].startswith("/_dash-maplibre/shared/points.geojson?v=")
+    assert shared_source(app, "points", cluster=True) == dict(source, cluster=True)
+
+    changed = register_shared_source(app, "points", {"type": "FeatureCollection", "features": []})
+    assert changed["url"] != source["url"]
+
+
+def test_data_is_served_with_caching_headers():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    source = register_shared_source(app, "points", DATA)
+    client = app.server.test_client()
+
+    response = client.get(source["url"])
+    assert json.loads(response.data) == DATA
+    assert "immutable" in response.headers["Cache-Control"]
+    etag = response.headers["ETag"]
+
+    assert client.get(source["url"], headers={"If-None-Match": etag}).status_code == 304
+
+    zipped = client.get(source["url"], headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(zipped.data)) == DATA
+    assert zipped.headers["ETag"] != etag
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]}
+    assert client.get(source["url"], headers=headers).status_code == 304
+
+
+def test_serialized_text_is_served_as_is():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    text = '{"type":"FeatureCollection","features":[]}'
+    source = register_shared_source(app, "empty", text)
+
+    assert app.server.test_client().get(source["url"]).data == text.encode("utf-8")
+
+
+def test_unknown_source_name():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    with pytest.raises(KeyError):
+        shared_source(app, "missing")
+
+    # The route only exists once a source is registered; before that Dash's
+    # catch-all answers with the index page.
+    register_shared_source(app, "points", DATA)
+    assert app.server.test_client().get("/_dash-maplibre/shared/missing.geojson").status_code == 404
@@ -0,0 +1,78 @@
+import pytest
+
+from dash_maplibre import simplify_features, zoom_variants
+from dash_maplibre.simplify import decimals_for_zoom, simplify_geometry
+
+np = pytest.importorskip("numpy")
+
+
+def _wiggly_line(n=2001):
+    # A straight line with 1e-6 degree noise, invisible below very high zooms
+    return [[-10 + 20 * i / (n - 1), 1e-6 * (-1) ** i] for i in range(n)]
+
+
+def _square(size=1.0):
+    ring = [[0, 0], [size, 0], [size, size], [0, size], [0, 0]]
+    # Densify the edges with collinear vertices
+    dense = []
+    for a, b in zip(ring, ring[1:]):
+        dense += [[a[0] + (b[0] - a[0]) * t / 10, a[1] + (b[1] - a[1]) * t / 10] for t in range(10)]
+    return dense + [ring[-1]]
+
+
+def test_line_is_reduced_to_its_end_points_at_low_zoom():
+    geometry = simplify_geometry({"type": "LineString", "coordinates": _wiggly_line()}, zoom=4, decimals=4)
+
+    assert geometry["coordinates"] == [[-10.0, 0.0], [10.0, 0.0]]
+
+
+def test_high_zoom_keeps_visible_detail():
+    line = [[0, 0], [0.5, 0.1], [1, 0]]
+    assert len(simplify_geometry({"type": "LineString", "coordinates": line}, zoom=10)["coordinates"]) == 3
+    assert len(simplify_geometry({"type": "LineString", "coordinates": line}, zoom=0)["coordinates"]) == 2
+
+
+def test_polygon_keeps_corners_and_stays_closed():
+    geometry = simplify_geometry({"type": "Polygon", "coordinates": [_square()]}, zoom=8)
+    ring = geometry["coordinates"][0]
+
+    assert ring[0] == ring[-1]
+    assert sorted(map(tuple, ring[:-1])) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+
+def test_collapsed_polygons_and_holes_are_dropped():
+    tiny = _square(1e-6)
+    assert simplify_geometry({"type": "Polygon", "coordinates": [tiny]}, zoom=2) is None
+
+    geometry = simplify_geometry({"type": "Polygon", "coordinates": [_square(), tiny]}, zoom=2)
+    assert len(geometry["coordinates"]) == 1
+
+
+def test_simplify_features_rounds_and_drops_collapsed_features():
+    data = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": 1, "properties": {"a": 1},
+             "geometry": {"type": "Point", "coordinates": [13.404954, 52.520008]}},
+            {"type": "Feature", "id": 2, "properties": {},
+             "geometry": {"type": "Polygon", "coordinates": [_square(1e-6)]}},
+        ],
+    }
+    result = simplify_features(data, zoom=0)
+
+    assert decimals_for_zoom(0) == 2
+    assert [f["id"] for f in result["features"]] == [1]
+    assert result["features"][0]["geometry"]["coordinates"] == [13.4, 52.52]
+    assert result["features"][0]["properties"] == {"a": 1}
+
+
+def test_zoom_variants_simplify_for_the_top_of_each_range():
+    feature = {"type": "Feature", "properties": {}, "geometry": {"type": "LineString", "coordinates": _wiggly_line()}}
+    source = zoom_variants([feature], zooms=[6, 0], promoteId="id")
+
+    assert source["type"] == "geojson"
+    assert source["promoteId"] == "id"
+    assert list(source["zoom_data"]) == ["0", "6"]
+    assert len(source["zoom_data"]["0"]["features"][0]["geometry"]["coordinates"]) == 2
+    # The last variant keeps full resolution without max_zoom
+    assert len(source["zoom_data"]["6"]["features"][0]["geometry"]["coordinates"]) == 2001
@@ -0,0 +1,70 @@
+import json
+
+import dash
+from dash import html
+import pytest
+
+from dash_maplibre import points_stream, register_stream, stream_source
+from dash_maplibre.streaming import iter_ndjson
+
+
+def _feature(i):
+    return {"type": "Feature", "id": i, "properties": {"n": i}, "geometry": {"type": "Point", "coordinates": [i, 0]}}
+
+
+def _lines(body):
+    return [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+
+def test_iter_ndjson_chunks_features_and_passes_text_through():
+    chunks = list(iter_ndjson([_feature(0), _feature(1), _feature(2), '{"raw":1}\n', _feature(3)], chunk_size=2))
+
+    assert len(chunks) == 4
+    assert chunks[2] == '{"raw":1}\n'
+    assert [json.loads(line) for chunk in chunks for line in chunk.splitlines()][3] == {"raw": 1}
+
+
+def test_stream_is_served_as_ndjson():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    source = register_stream(app, "points", [_feature(i) for i in range(5)], batch_size=2, promoteId="n")
+
+    assert source == {
+        "type": "geojson-stream",
+        "url": "/_dash-maplibre/streams/points.ndjson",
+        "batch_size": 2,
+        "promoteId": "n",
+    }
+    assert stream_source(app, "points", cluster=True)["cluster"] is True
+
+    response = app.server.test_client().get(source["url"])
+    assert response.mimetype == "application/x-ndjson"
+    assert _lines(response.data) == [_feature(i) for i in range(5)]
+
+
+def test_generator_factory_is_called_per_request():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    source = register_stream(app, "gen", lambda: (_feature(i) for i in range(3)))
+    client = app.server.test_client()
+
+    assert len(_lines(client.get(source["url"]).data)) == 3
+    assert len(_lines(client.get(source["url"]).data)) == 3
+
+
+def test_points_stream_encodes_chunks():
+    pytest.importorskip("numpy")
+    chunks = list(points_stream([0, 1, 2], [10, 11, 12], properties={"name": ["a", "b", "c"]}, ids=[5, 6, 7],
+                                chunk_size=2))
+
+    assert len(chunks) == 2
+    features = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [f["id"] for f in features] == [5, 6, 7]
+    assert features[2]["geometry"]["coordinates"] == [2.0, 12.0]
+    assert features[1]["properties"] == {"name": "b"}
+
+
+def test_unknown_stream_name():
+    app = dash.Dash(__name__)
+    with pytest.raises(KeyError):
+        stream_source(app, "missing")
@@ -0,0 +1,158 @@
+import gzip
+import json
+import sqlite3
+import struct
+
+import dash
+from dash import html
+import pytest
+
+from dash_maplibre import register_tile_archive, tile_archive_source
+from dash_maplibre.tile_archives import (
+    MBTilesArchive,
+    PMTilesArchive,
+    open_tile_archive,
+    zxy_to_tile_id,
+)
+
+TILES = {(0, 0, 0): b"world", (1, 0, 0): b"north-west", (1, 1, 1): b"south-east", (2, 3, 1): b"east"}
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _write_pmtiles(path, tiles, tile_type=2, tile_compression=1, metadata=None):
+    """A minimal uncompressed PMTiles v3 file with a single root directory."""
+    entries = sorted((zxy_to_tile_id(*zxy), data) for zxy, data in tiles.items())
+    blob = b"".join(data for _, data in entries)
+    directory = _varint(len(entries))
+    last = 0
+    for tile_id, _ in entries:
+        directory += _varint(tile_id - last)
+        last = tile_id
+    directory += b"".join(_varint(1) for _ in entries)
+    directory += b"".join(_varint(len(data)) for _, data in entries)
+    directory += _varint(1) + b"".join(_varint(0) for _ in entries[1:])
+    meta = json.dumps(metadata or {}).encode()
+    root_offset = 127
+    meta_offset = root_offset + len(directory)
+    data_offset = meta_offset + len(meta)
+    header = struct.pack(
+        "<7sBQQQQQQQQQQQBBBBBBiiiiBii",
+        b"PMTiles", 3,
+        root_offset, len(directory), meta_offset, len(meta), data_offset, 0, data_offset, len(blob),
+        len(entries), len(entries), len(entries),
+        1, 1, tile_compression, tile_type, 0, 2,
+        -1800000000, -850000000, 1800000000, 850000000, 0, 0, 0,
+    )
+    with open(path, "wb") as f:
+        f.write(header + directory + meta + blob)
+
+
+def _write_mbtiles(path, tiles, fmt="pbf"):
+    connection = sqlite3.connect(str(path))
+    connection.execute("CREATE TABLE metadata (name text, value text)")
+    connection.execute("CREATE TABLE tiles (zoom_level integer, tile_column integer, tile_row integer, tile_data blob)")
+    connection.executemany(
+        "INSERT INTO metadata VALUES (?, ?)",
+        [("format", fmt), ("minzoom", "0"), ("maxzoom", "2"), ("bounds", "-10,-5,10,5")],
+    )
+    connection.executemany(
+        "INSERT INTO tiles VALUES (?, ?, ?, ?)",
+        [(z, x, (1 << z) - 1 - y, data) for (z, x, y), data in tiles.items()],
+    )
+    connection.commit()
+    connection.close()
+
+
+def test_hilbert_tile_ids():
+    assert [zxy_to_tile_id(0, 0, 0)] == [0]
+    assert [zxy_to_tile_id(1, x, y) for x, y in [(0, 0), (0, 1), (1, 1), (1, 0)]] == [1, 2, 3, 4]
+    assert zxy_to_tile_id(2, 0, 0) == 5
+    with pytest.raises(ValueError):
+        zxy_to_tile_id(1, 2, 0)
+
+
+def test_pmtiles_reads_tiles_and_header(tmp_path):
+    path = tmp_path / "tiles.pmtiles"
+    _write_pmtiles(path, TILES, metadata={"name": "test"})
+    archive = open_tile_archive(str(path))
+
+    assert isinstance(archive, PMTilesArchive)
+    assert (archive.format, archive.minzoom, archive.maxzoom) == ("png", 0, 2)
+    assert archive.bounds == [-180, -85, 180, 85]
+    for zxy, data in TILES.items():
+        assert bytes(archive.get_tile(*zxy)) == data
+    assert archive.get_tile(1, 0, 1) is None
+    assert archive.get_tile(3, 0, 0) is None
+    assert archive.metadata == {"name": "test"}
+
+
+def test_mbtiles_flips_rows(tmp_path):
+    path = tmp_path / "tiles.mbtiles"
+    _write_mbtiles(path, TILES)
+    archive = open_tile_archive(str(path))
+
+    assert isinstance(archive, MBTilesArchive)
+    assert archive.is_vector
+    assert archive.bounds == [-10, -5, 10, 5]
+    for zxy, data in TILES.items():
+        assert archive.get_tile(*zxy) == data
+    assert archive.get_tile(1, 0, 1) is None
+
+
+def test_tiles_are_served_with_caching_headers(tmp_path):
+    path = tmp_path / "tiles.mbtiles"
+    _write_mbtiles(path, {(0, 0, 0): gzip.compress(b"tile")})
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    source = register_tile_archive(app, "parcels", str(path), max_age=60, promoteId="id")
+
+    assert source["type"] == "vector"
+    assert source["tiles"] == ["/_dash-maplibre/archives/parcels/{z}/{x}/{y}.pbf"]
+    assert (source["minzoom"], source["maxzoom"], source["promoteId"]) == (0, 2, "id")
+    assert tile_archive_source(app, "parcels", promoteId="id") == source
+
+    client = app.server.test_client()
+    response = client.get("/_dash-maplibre/archives/parcels/0/0/0.pbf")
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+    assert gzip.decompress(response.data) == b"tile"
+    etag = response.headers["ETag"]
+    assert client.get("/_dash-maplibre/archives/parcels/0/0/0.pbf", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/_dash-maplibre/archives/parcels/1/0/0.pbf").status_code == 204
+
+
+def test_raster_archive_source(tmp_path):
+    path = tmp_path / "tiles.pmtiles"
+    _write_pmtiles(path, TILES)
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    source = register_tile_archive(app, "imagery", str(path))
+
+    assert source["type"] == "raster"
+    assert source["tileSize"] == 256
+    response = app.server.test_client().get("/_dash-maplibre/archives/imagery/1/1/1.png")
+    assert response.data == b"south-east"
+    assert response.mimetype == "image/png"
+    assert "Content-Encoding" not in response.headers
+
+
+def test_unknown_archive(tmp_path):
+    app = dash.Dash(__name__)
+    with pytest.raises(KeyError):
+        tile_archive_source(app, "missing")
+    path = tmp_path / "not-tiles.txt"
+    path.write_text("hello")
+    with pytest.raises(ValueError):
+        open_tile_archive(str(path))
@@ -8,18 +8,15 @@ def test_render_component(dash_duo):
     app = import_app('usage')
     dash_duo.start_server(app)
 
-    # Get the generated component input with selenium
-    # The html input will be a children of the #input dash component
-    my_component = dash_duo.find_element('#input > input')
+    # The map canvas is created on mount
+    dash_duo.wait_for_element('#my-map .maplibregl-canvas')
 
-    assert 'my-value' == my_component.get_attribute('value')
+    # Initializing the map adds the point layer to the legend, which also
+    # shows the version string
+    dash_duo.find_element('#init-btn').click()
+    dash_duo.wait_for_contains_text('#my-map', 'Point layer')
+    dash_duo.wait_for_contains_text('#my-map', 'my-test-version')
 
-    # Clear the input
-    dash_duo.clear_input(my_component)
-
-    # Send keys to the custom input.
-    my_component.send_keys('Hello dash')
-
-    # Wait for the text to equal, if after the timeout (default 10 seconds)
-    # the text is not equal it will fail the test.
-    dash_duo.wait_for_text_to_equal('#output', 'You have entered Hello dash')
+    # Adding the second layer adds its legend entry
+    dash_duo.find_element('#add-layer-btn').click()
+    dash_duo.wait_for_contains_text('#my-map', 'Second Point')
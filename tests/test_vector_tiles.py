@@ -0,0 +1,144 @@
+import dash
+from dash import html
+
+from dash_maplibre import register_vector_tiles
+from dash_maplibre.vector_tiles import TILE_MIMETYPE, VectorTileSet
+
+
+POINTS = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [13.404954, 52.520008]},
+            "properties": {"name": "Berlin", "id": 7},
+        },
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [2.352222, 48.856613]},
+            "properties": {"name": "Paris", "id": 8},
+        },
+    ],
+}
+
+
+def _fields(buf):
+    """Yield ``(field, value)`` pairs of a protobuf message (varint and bytes only)."""
+    pos = 0
+    while pos < len(buf):
+        key, pos = _varint(buf, pos)
+        if key & 7 == 0:
+            value, pos = _varint(buf, pos)
+        else:
+            length, pos = _varint(buf, pos)
+            value, pos = buf[pos:pos + length], pos + length
+        yield key >> 3, value
+
+
+def _varint(buf, pos):
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return result, pos
+
+
+def _decode_tile(tile):
+    """Decode layers into ``{name: [(geom_type, properties), ...]}``."""
+    layers = {}
+    for _, layer in _fields(tile):
+        name, keys, values, features = None, [], [], []
+        for field, value in _fields(layer):
+            if field == 1:
+                name = value.decode()
+            elif field == 2:
+                features.append(value)
+            elif field == 3:
+                keys.append(value.decode())
+            elif field == 4:
+                # Only string (1) and unsigned integer (5) values occur here
+                ((kind, raw),) = _fields(value)
+                values.append(raw.decode() if kind == 1 else raw)
+        decoded = []
+        for feature in features:
+            fields = dict(_fields(feature))
+            tags, pos = [], 0
+            while pos < len(fields[2]):
+                tag, pos = _varint(fields[2], pos)
+                tags.append(tag)
+            properties = {keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])}
+            decoded.append((fields[3], properties))
+        layers[name] = decoded
+    return layers
+
+
+def test_tiles_decode_to_the_features():
+    tileset = VectorTileSet(POINTS, "cities")
+    layers = _decode_tile(tileset.get_tile(0, 0, 0))
+
+    assert list(layers) == ["cities"]
+    # geom_type 1 is POINT
+    assert sorted(layers["cities"], key=lambda f: f[1]["name"]) == [
+        (1, {"name": "Berlin", "id": 7}),
+        (1, {"name": "Paris", "id": 8}),
+    ]
+
+
+def test_tiles_only_contain_features_in_range():
+    tileset = VectorTileSet(POINTS, "cities")
+    # Both cities are in the north-eastern quadrant at zoom 1.
+    assert tileset.get_tile(1, 1, 0)
+    assert tileset.get_tile(1, 0, 1) == b""
+    assert tileset.get_tile(20, 0, 0) == b""
+
+
+def test_tiles_are_cached():
+    tileset = VectorTileSet(POINTS, "cities")
+    first = tileset.get_tile(0, 0, 0)
+    assert tileset.get_tile(0, 0, 0) is first
+    assert tileset.cache.hits == 1
+
+
+def test_simplified_geometries_are_cached_in_a_bounded_cache(monkeypatch):
+    monkeypatch.setattr("dash_maplibre.vector_tiles.SIMPLIFIED_CACHE_SIZE", 2)
+    line = {"type": "LineString", "coordinates": [[0, 0], [1, 0.001], [2, 0], [3, 1]]}
+    tileset = VectorTileSet({"type": "Feature", "geometry": line, "properties": {}}, "roads")
+    for z in range(5):
+        tileset.get_tile(z, 2 ** (z - 1) if z else 0, 2 ** (z - 1) - 1 if z else 0)
+
+    assert len(tileset._simplified) == 2
+    assert (0, 4) in tileset._simplified
+
+
+def test_register_serves_tiles_through_the_dash_server():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    source = register_vector_tiles(app, "cities", POINTS, id_property="id", max_zoom=10)
+
+    assert source["type"] == "vector"
+    assert source["maxzoom"] == 10
+    url = source["tiles"][0]
+    tileset = app.server.extensions["dash_maplibre"]["vector_tiles"]["cities"]
+    assert url == "/_dash-maplibre/tiles/cities/{z}/{x}/{y}.pbf?v=" + tileset.version
+
+    client = app.server.test_client()
+    response = client.get(url.format(z=1, x=1, y=0))
+    assert response.status_code == 200
+    assert response.mimetype == TILE_MIMETYPE
+    assert "immutable" in response.headers["Cache-Control"]
+    assert client.get("/_dash-maplibre/tiles/cities/1/1/0.pbf").headers["Cache-Control"] == "no-cache"
+    assert client.get(url.format(z=1, x=0, y=1)).status_code == 204
+    assert client.get("/_dash-maplibre/tiles/unknown/0/0/0.pbf").status_code == 404
+
+
+def test_reregistering_changes_the_tile_url():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    first = register_vector_tiles(app, "cities", POINTS)["tiles"][0]
+    assert register_vector_tiles(app, "cities", POINTS)["tiles"][0] == first
+
+    paris = {"type": "FeatureCollection", "features": POINTS["features"][1:]}
+    assert register_vector_tiles(app, "cities", paris)["tiles"][0] != first
@@ -0,0 +1,91 @@
+import dash
+import pytest
+
+from dash_maplibre import register_dataset, select_features, visible_features
+
+
+def _point(lng, lat, name):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lng, lat]},
+        "properties": {"name": name, "population": 1},
+    }
+
+
+CITIES = {
+    "type": "FeatureCollection",
+    "features": [
+        _point(13.40, 52.52, "Berlin"),
+        _point(2.35, 48.86, "Paris"),
+        _point(179.5, -16.5, "Labasa"),
+        _point(-179.9, -16.1, "Rabi"),
+    ],
+}
+
+
+def _names(collection):
+    return [f["properties"]["name"] for f in collection["features"]]
+
+
+def test_only_features_in_bounds_are_returned():
+    app = dash.Dash(__name__)
+    register_dataset(app, "cities", CITIES, min_zoom=3, properties=["name"])
+
+    result = visible_features(app, "cities", [[10, 50], [15, 55]], zoom=5)
+    assert _names(result) == ["Berlin"]
+    assert result["features"][0]["properties"] == {"name": "Berlin"}
+
+    assert _names(visible_features(app, "cities", [[10, 50], [15, 55]], zoom=2)) == []
+    assert _names(visible_features(app, "cities", [[0, 45], [10, 50]], pad=1)) == ["Berlin", "Paris"]
+
+
+def test_bounds_across_the_antimeridian():
+    app = dash.Dash(__name__)
+    register_dataset(app, "cities", CITIES)
+
+    assert _names(visible_features(app, "cities", [[178, -18], [182, -15]])) == ["Labasa", "Rabi"]
+    assert _names(visible_features(app, "cities", [[-182, -18], [-178, -15]])) == ["Labasa", "Rabi"]
+
+
+SHAPES = {
+    "type": "FeatureCollection",
+    "features": [
+        _point(1, 1, "inside"),
+        _point(8, 8, "outside the triangle"),
+        {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": [[-5, 2], [20, 2]]},
+            "properties": {"name": "crossing line"},
+        },
+        {
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [[[-50, -50], [50, -50], [50, 50], [-50, 50], [-50, -50]]]},
+            "properties": {"name": "around the selection"},
+        },
+        _point(30, 30, "far"),
+    ],
+}
+TRIANGLE = {"type": "Polygon", "coordinates": [[[0, 0], [10, 0], [0, 10], [0, 0]]]}
+EXPECTED = ["inside", "crossing line", "around the selection"]
+
+
+def test_selection_polygon_lookup():
+    app = dash.Dash(__name__)
+    dataset = register_dataset(app, "shapes", SHAPES)
+    # Pure Python lookup through the grid index
+    dataset._tree = False
+
+    assert _names(select_features(app, "shapes", TRIANGLE)) == EXPECTED
+    selection = {"mode": "lasso", "geometry": TRIANGLE, "ids": {}}
+    assert _names(select_features(app, "shapes", selection, max_features=1)) == ["inside"]
+    assert _names(select_features(app, "shapes", None)) == []
+    with pytest.raises(ValueError):
+        select_features(app, "shapes", {"type": "Point", "coordinates": [0, 0]})
+
+
+def test_selection_with_strtree():
+    pytest.importorskip("shapely", minversion="2")
+    app = dash.Dash(__name__)
+    register_dataset(app, "shapes", SHAPES)
+
+    assert _names(select_features(app, "shapes", TRIANGLE)) == EXPECTED
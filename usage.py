@@ -1,22 +1,15 @@
 import dash
 from dash import html, dcc, Output, Input, State, Patch, ctx
 from dash.exceptions import PreventUpdate
-from dash_maplibre import DashMaplibre
+from dash_maplibre import DashMaplibre, register_basemap, basemap_url
 import dash_mantine_components as dmc
-import requests
 
 app = dash.Dash(__name__)
 dash._dash_renderer._set_react_version("18.2.0")
 
-def get_basemap(scheme):
-    """Loads the basemap from the Carto server and modifies it, returning a Maplibre mapstyle object."""
-    if scheme == "light":
-        basemap = "https://basemaps.cartocdn.com/gl/positron-gl-style/style.json"
-    else:
-        basemap = "https://basemaps.cartocdn.com/gl/dark-matter-gl-style/style.json"
-    response = requests.get(basemap)
-
-    return response.json()
+# Basemaps are fetched once, cached and served (with their sprites and glyphs) by the app
+register_basemap(app, "light", "https://basemaps.cartocdn.com/gl/positron-gl-style/style.json")
+register_basemap(app, "dark", "https://basemaps.cartocdn.com/gl/dark-matter-gl-style/style.json")
 
 # The initial GeoJSON with a single point
 base_geojson = {
@@ -51,6 +44,7 @@ initial_sources = {
             "features": [
                 {
                     "type": "Feature",
+                    "id": 1,
                     "geometry": {"type": "Point", "coordinates": [13.404954, 52.520008]},
                     "properties": {"name": "Berlin"}
                 }
@@ -122,9 +116,9 @@ def toggle_scheme(n_clicks, current_scheme):
     if n_clicks is None:
         raise PreventUpdate
     if n_clicks % 2 == 0:
-        return get_basemap("light")
+        return basemap_url(app, "light")
     else:
-        return get_basemap("dark")
+        return basemap_url(app, "dark")
     
 
 # Update coordinates, color, and add layer